@@ -0,0 +1,89 @@
+"""
+Benchmark de `_compute_category_counts`: passada única sobre códigos inteiros
+contra a implementação anterior com um `groupby(...).transform("count")` por
+coluna.
+
+Uso:
+    PYTHONPATH=".:src" python benchmarks/bench_category_counts.py --rows 10000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.features.pp_mix import _compute_category_counts
+
+CATEGORY_COLUMNS = ["localState", "localRegion", "themeMain", "themeSub"]
+
+
+def groupby_category_counts(df_mix: pd.DataFrame) -> pd.DataFrame:
+    """
+    Implementação anterior, mantida como referência.
+    """
+    for col in CATEGORY_COLUMNS:
+        title = col[0].upper() + col[1:]
+        df_mix[f"count{title}User"] = df_mix.groupby(["userId", col], observed=True)[
+            "pageId"
+        ].transform("count")
+    df_mix["totalUserNews"] = df_mix.groupby("userId")["pageId"].transform("count")
+    for col in CATEGORY_COLUMNS:
+        title = col[0].upper() + col[1:]
+        df_mix[f"rel{title}"] = df_mix[f"count{title}User"] / df_mix["totalUserNews"]
+    return df_mix
+
+
+def make_mix(rows: int, users: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Gera um mix sintético com o formato do `mix_feats` (ids em texto,
+    categorias como `category` e ~10% de nulos).
+    """
+    rng = np.random.default_rng(seed)
+
+    def categorical(prefix: str, size: int) -> pd.Categorical:
+        codes = rng.integers(0, size, rows)
+        codes[rng.random(rows) < 0.1] = -1
+        return pd.Categorical.from_codes(codes, [f"{prefix}{i}" for i in range(size)])
+
+    user_ids = np.array([f"user{i:07d}" for i in range(users)], dtype=object)
+    return pd.DataFrame(
+        {
+            "userId": user_ids[rng.integers(0, users, rows)],
+            "pageId": rng.integers(0, 250_000, rows).astype(str).astype(object),
+            "localState": categorical("uf", 27),
+            "localRegion": categorical("regiao", 300),
+            "themeMain": categorical("tema", 40),
+            "themeSub": categorical("sub", 400),
+        }
+    )
+
+
+def run(rows: int, users: int, repeat: int) -> None:
+    df_mix = make_mix(rows, users)
+    print(f"{rows:,} linhas | {users:,} usuários")
+    timings = {}
+    results = {}
+    for name, func in [
+        ("groupby", groupby_category_counts),
+        ("passada única", _compute_category_counts),
+    ]:
+        best = float("inf")
+        for _ in range(repeat):
+            frame = df_mix.copy()
+            start = time.perf_counter()
+            results[name] = func(frame)
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best
+        print(f"  {name:<14} {best:8.2f}s")
+    pd.testing.assert_frame_equal(results["passada única"], results["groupby"])
+    print(f"  speedup        {timings['groupby'] / timings['passada única']:8.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000_000, help="Linhas do mix sintético.")
+    parser.add_argument("--users", type=int, default=500_000, help="Usuários distintos.")
+    parser.add_argument("--repeat", type=int, default=1, help="Execuções por implementação.")
+    args = parser.parse_args()
+    run(args.rows, args.users, args.repeat)
@@ -1,10 +1,12 @@
 import os
+import threading
 import time
 from typing import List, Optional, Dict, Union
 from contextlib import asynccontextmanager
 
 import mlflow
 import pandas as pd
+from pandas.api.types import is_integer_dtype
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field, ConfigDict
@@ -14,10 +16,19 @@ from src.predict.pipeline import predict_for_userId
 from src.config import get_config, USE_S3, configure_logger
 from src.storage.io import Storage
 from src.data.data_loader import load_data_for_prediction
+from src.data.candidate_store import CandidateStore
+from src.data.history_index import load_history_index
+from src.data.id_dictionary import load_id_dictionary
+from src.data.news_delta import NewsDeltaIngestor
+from src.data.serving_bundle import downcast_numeric_columns, load_model_bundle
+from src.predict.constants import CANDIDATE_FILTER_COLUMNS, CANDIDATE_TIME_COLUMN
+from src.recommendation_model.compiled_predictor import CompiledTreePredictor
 from src.recommendation_model.mocked_model import MockedRecommender
 
 # Configura o logger centralizado
 logger = configure_logger("api")
+# Logs emitidos a cada requisição (amostrados via LOG_SAMPLE_RATES)
+request_logger = configure_logger("api.request")
 
 # Cache global para dados
 DATA_CACHE: Dict[str, pd.DataFrame] = {}
@@ -35,6 +46,8 @@ def load_mlflow_model():
             mlflow.set_tracking_uri(mlflow_tracking_uri)
         model_uri = f"models:/{model_name}@{model_alias}"
         model = mlflow.pyfunc.load_model(model_uri)
+        if get_config("PREDICTOR_BACKEND", "booster") == "compiled":
+            model = compile_model(model)
         load_time = time.time() - start_time
         logger.info(f"Modelo carregado: {model_name}@{model_alias} em {load_time:.2f} segundos")
         return model
@@ -44,6 +57,39 @@ def load_mlflow_model():
         return MockedRecommender()
 
 
+def compile_model(model):
+    """
+    Troca o modelo pyfunc pelo CompiledTreePredictor do booster registrado.
+    Em caso de falha, mantém o modelo original.
+    """
+    try:
+        ranker = model.unwrap_python_model().model
+        compiled = CompiledTreePredictor.from_ranker(ranker)
+        compiled.metadata = model.metadata
+        logger.info(
+            f"Preditor compilado: {len(compiled.roots)} árvores, "
+            f"profundidade {compiled.max_depth}"
+        )
+        return compiled
+    except Exception as e:
+        logger.warning(f"Não foi possível compilar o modelo, usando o booster: {e}")
+        return model
+
+
+def load_serving_data(storage: Storage) -> Dict[str, pd.DataFrame]:
+    """
+    Carrega o serving bundle da versão do modelo (ou o mais recente). Sem
+    bundle, deriva as tabelas dos dados de treino.
+    """
+    model = getattr(app.state, "model", None)
+    run_id = getattr(getattr(model, "metadata", None), "run_id", None)
+    data = load_model_bundle(storage, run_id=run_id)
+    if data is not None:
+        return data
+    logger.warning("Derivando dados de serving do dataset de treino.")
+    return load_data_for_prediction(storage, include_metadata=True)
+
+
 # Função para carregar os dados de predição e armazená-los em cache
 
 
@@ -56,23 +102,56 @@ def load_prediction_data() -> Dict[str, pd.DataFrame]:
     try:
         logger.info("Carregando dados para predição (primeira vez)...")
         storage = Storage(use_s3=USE_S3)
-        # Inclui metadados se disponível
-        data = load_data_for_prediction(storage, include_metadata=True)
+        data = load_serving_data(storage)
 
         # Otimização: Converter colunas numéricas para tipos mais eficientes
-        for df_name, df in data.items():
-            for col in df.columns:
-                if df[col].dtype == "float64":
-                    # Downcasting de float64 para float32
-                    df[col] = pd.to_numeric(df[col], downcast="float")
-                elif df[col].dtype == "int64":
-                    # Downcasting de int64 para int32/int16
-                    df[col] = pd.to_numeric(df[col], downcast="integer")
+        downcast_numeric_columns(data)
 
         # Otimização: Pré-calcular estatísticas úteis
         if "news_features" in data:
             data["news_count"] = len(data["news_features"])
 
+        # Catálogo ordenado por data de publicação (janela de frescor)
+        if CANDIDATE_TIME_COLUMN in data["news_features"].columns:
+            candidate_store = CandidateStore(
+                data["news_features"],
+                time_column=CANDIDATE_TIME_COLUMN,
+                use_wall_clock=get_config("CANDIDATE_WALL_CLOCK", False),
+                filter_columns=CANDIDATE_FILTER_COLUMNS,
+            )
+            candidate_store.evict_expired(get_config("CANDIDATE_RETENTION_HOURS"))
+            data["news_features"] = candidate_store.news_df
+            data["news_count"] = len(candidate_store)
+            data["candidate_store"] = candidate_store
+
+        # Dicionário de IDs: os dados usam códigos int32 e os IDs em texto só
+        # existem na borda da API
+        if is_integer_dtype(data["clients_features"]["userId"]):
+            data["id_dictionary"] = load_id_dictionary(storage)
+
+        # Índice de histórico para excluir notícias já lidas
+        try:
+            history_index = load_history_index(storage)
+            # Códigos em array separado: o catálogo (visões do cache Arrow) não é copiado
+            page_codes = history_index.encode_pages(data["news_features"]["pageId"])
+            if "candidate_store" in data:
+                data["candidate_store"].page_codes = page_codes
+            else:
+                data["page_codes"] = page_codes
+            data["history_index"] = history_index
+        except Exception as exc:
+            logger.warning(f"Índice de histórico indisponível, sem exclusão de lidas: {exc}")
+
+        # Notícias novas publicadas como arquivos delta entram direto no catálogo
+        if "candidate_store" in data:
+            data["news_ingestor"] = NewsDeltaIngestor(
+                data["candidate_store"],
+                storage,
+                id_dictionary=data.get("id_dictionary"),
+                history_index=data.get("history_index"),
+            )
+            refresh_catalogue(data)
+
         load_time = time.time() - start_time
         logger.info(f"Dados carregados e otimizados em {load_time:.2f} segundos.")
 
@@ -83,6 +162,32 @@ def load_prediction_data() -> Dict[str, pd.DataFrame]:
         raise e
 
 
+def refresh_catalogue(data: Dict[str, pd.DataFrame]) -> int:
+    """
+    Ingere os arquivos delta pendentes e sincroniza o catálogo em `data`.
+    """
+    ingestor = data.get("news_ingestor")
+    if ingestor is None:
+        return 0
+    added = ingestor.poll()
+    if added:
+        candidate_store = data["candidate_store"]
+        data["news_features"] = candidate_store.news_df
+        data["news_count"] = len(candidate_store)
+    return added
+
+
+def poll_news_deltas(stop_event: threading.Event, interval: float) -> None:
+    """
+    Verifica periodicamente novos arquivos delta de notícias.
+    """
+    while not stop_event.wait(interval):
+        try:
+            refresh_catalogue(get_prediction_data())
+        except Exception as e:
+            logger.warning(f"Erro ao atualizar o catálogo de notícias: {e}")
+
+
 # Dependências para injeção via FastAPI
 
 
@@ -133,6 +238,30 @@ class PredictRequest(BaseModel):
         example=0.3,
         description="Score mínimo para considerar uma recomendação",
     )
+    max_age_hours: Optional[float] = Field(
+        default=None,
+        alias="maxAgeHours",
+        example=48,
+        description="Idade máxima (em horas) das notícias recomendadas",
+    )
+    themeMain: Optional[List[str]] = Field(
+        default=None, example=["esportes"], description="Temas principais aceitos"
+    )
+    themeSub: Optional[List[str]] = Field(
+        default=None, example=["futebol"], description="Subtemas aceitos"
+    )
+    localState: Optional[List[str]] = Field(
+        default=None, example=["sp", "rj"], description="Estados aceitos"
+    )
+    localRegion: Optional[List[str]] = Field(
+        default=None, example=["sao-paulo"], description="Regiões aceitas"
+    )
+
+    def get_filters(self) -> Dict[str, List[str]]:
+        """Filtros por atributo: OR entre valores de um campo, AND entre campos."""
+        return {
+            col: getattr(self, col) for col in CANDIDATE_FILTER_COLUMNS if getattr(self, col)
+        }
 
     class Config:
         populate_by_field_name = True
@@ -195,7 +324,16 @@ async def lifespan(app: FastAPI):
         logger.info(f"Modelo e dados carregados com sucesso em {init_time:.2f} segundos")
     except Exception as e:
         logger.error(f"Erro na inicialização: {e}")
+
+    stop_event = threading.Event()
+    poll_seconds = get_config("NEWS_DELTA_POLL_SECONDS")
+    if poll_seconds:
+        threading.Thread(
+            target=poll_news_deltas, args=(stop_event, poll_seconds), daemon=True
+        ).start()
+        logger.info(f"Ingestão de notícias novas a cada {poll_seconds}s.")
     yield
+    stop_event.set()
     logger.info("Desligando API de Recomendação de Notícias")
     DATA_CACHE.clear()
 
@@ -237,18 +375,44 @@ def predict(request: PredictRequest):
         prediction_data = get_prediction_data()
         news_features_df = prediction_data["news_features"]
         clients_features_df = prediction_data["clients_features"]
+        id_dictionary = prediction_data.get("id_dictionary")
+        user_key = (
+            id_dictionary.encode("userId", [request.userId])[0]
+            if id_dictionary is not None
+            else request.userId
+        )
         timing["dependencies"] = time.time() - deps_start
 
+        # Filtros por atributo dependem do CandidateStore (notícias com issuedDatetime)
+        filters = request.get_filters()
+        if filters and "candidate_store" not in prediction_data:
+            raise HTTPException(
+                status_code=400,
+                detail="Filtros por atributo indisponíveis: catálogo sem data de publicação.",
+            )
+
         # Timer para a predição
         predict_start = time.time()
         rec_entries, cold_start_flag = predict_for_userId(
-            userId=request.userId,
+            userId=user_key,
             news_features_df=news_features_df,
             clients_features_df=clients_features_df,
             model=model,
             n=request.max_results,
             score_threshold=request.min_score,
+            history_index=prediction_data.get("history_index"),
+            candidate_store=prediction_data.get("candidate_store"),
+            max_age_hours=(
+                request.max_age_hours
+                if request.max_age_hours is not None
+                else get_config("CANDIDATE_MAX_AGE_HOURS")
+            ),
+            filters=filters,
+            affinity=prediction_data.get("affinity"),
+            page_codes=prediction_data.get("page_codes"),
         )
+        if id_dictionary is not None:
+            rec_entries = id_dictionary.decode_records(rec_entries)
         timing["prediction"] = time.time() - predict_start
 
         # Timer para formatação da resposta
@@ -277,11 +441,13 @@ def predict(request: PredictRequest):
         timing["total_ms"] = processing_time_ms
 
         # Log de métricas de performance
-        logger.info(
-            f"""Predição para {request.userId}: {len(rec_items)}
-             recomendações em {processing_time_ms:.2f}ms"""
+        request_logger.info(
+            "Predição para %s: %d recomendações em %.2fms",
+            request.userId,
+            len(rec_items),
+            processing_time_ms,
         )
-        logger.info(f"Métricas de tempo: {timing}")
+        request_logger.info("Métricas de tempo: %s", timing)
 
         return PredictResponse(
             userId=request.userId,
@@ -291,12 +457,25 @@ def predict(request: PredictRequest):
             processing_time_ms=processing_time_ms,
             timing_details=timing,
         )
+    except HTTPException:
+        raise
     except Exception as e:
         error_time = (time.time() - start_time) * 1000
         logger.error(f"Erro na predição após {error_time:.2f}ms: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/catalogue/refresh", tags=["Catalogue"])
+def refresh_catalogue_endpoint(data=Depends(get_prediction_data)):
+    """Ingere imediatamente os arquivos delta de notícias pendentes."""
+    try:
+        added = refresh_catalogue(data)
+        return {"added": added, "news_count": data.get("news_count", 0)}
+    except Exception as e:
+        logger.error(f"Erro ao atualizar o catálogo: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/info", tags=["Monitoring"])
 async def model_info(model=Depends(get_model)):
     try:
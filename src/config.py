@@ -1,7 +1,13 @@
 import os
+import json
+import atexit
+import copy
 import logging
+import queue
+import threading
 import colorama
-from typing import Any, Dict, Tuple
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional, Tuple
 
 import mlflow
 import pandas as pd
@@ -10,30 +16,170 @@ from dotenv import load_dotenv
 
 colorama.init(autoreset=True)
 
+# Modo de logging padrão; atualizado por `apply_logging_config` após carregar o YAML
+LOG_SETTINGS: Dict[str, Any] = {"async": False, "json": False, "sample_rates": {}}
+_LOG_LISTENERS: Dict[bool, Tuple[queue.SimpleQueue, QueueListener]] = {}
 
-def configure_logger(logger_name: str = __name__, level: int = logging.INFO) -> logging.Logger:
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formata cada registro como uma linha JSON (logs estruturados).
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "timestamp": self.formatTime(record),
+            "logger": record.name,
+            "level": record.levelname,
+            "file": record.filename,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Deixa passar uma fração `rate` dos registros abaixo de WARNING (de forma
+    determinística: 1 a cada 1/rate). Avisos e erros sempre passam.
+
+    O contador é protegido por um lock, pois o mesmo filtro é chamado por
+    várias threads (ex.: requisições da API).
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+        self._budget = 1.0 - rate
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.rate >= 1:
+            return True
+        with self._lock:
+            self._budget += self.rate
+            if self._budget >= 1.0:
+                self._budget -= 1.0
+                return True
+        return False
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler que deixa a formatação (data, nível, JSON) para o
+    QueueListener. Só a mensagem é interpolada na thread chamadora e gravada
+    em `msg` (com `args = None`), para que argumentos mutáveis alterados após
+    a chamada não mudem o que é registrado.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        message = record.getMessage()
+        record = copy.copy(record)
+        record.msg = message
+        record.args = None
+        return record
+
+
+def _build_formatter(json_format: bool) -> logging.Formatter:
+    if json_format:
+        return JsonFormatter()
+    green = "\033[92m"
+    reset = "\033[0m"
+    fmt = f"{green}%(asctime)s - %(name)s - %(levelname)s - %(filename)s - %(message)s{reset}"
+    return logging.Formatter(fmt)
+
+
+def _build_handler(async_mode: bool, json_format: bool) -> logging.Handler:
+    """
+    Cria o handler do logger. No modo assíncrono, todos os loggers com o mesmo
+    formato compartilham uma fila e uma thread de escrita (QueueListener).
+    """
+    if not async_mode:
+        handler = logging.StreamHandler()
+        handler.setFormatter(_build_formatter(json_format))
+        return handler
+    if json_format not in _LOG_LISTENERS:
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(_build_formatter(json_format))
+        listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        _LOG_LISTENERS[json_format] = (log_queue, listener)
+    return DeferredQueueHandler(_LOG_LISTENERS[json_format][0])
+
+
+def configure_logger(
+    logger_name: str = __name__,
+    level: int = logging.INFO,
+    async_mode: Optional[bool] = None,
+    json_format: Optional[bool] = None,
+    sample_rate: Optional[float] = None,
+) -> logging.Logger:
     """
     Configura e retorna um logger.
 
     Args:
         logger_name (str): Nome do logger.
         level (int): Nível de log.
+        async_mode (bool, optional): Escreve os logs em uma thread de fundo
+            (QueueHandler/QueueListener). Se None, usa `LOG_ASYNC`.
+        json_format (bool, optional): Emite uma linha JSON por registro. Se
+            None, usa `LOG_JSON`.
+        sample_rate (float, optional): Fração dos registros abaixo de WARNING
+            emitidos. Se None, usa `LOG_SAMPLE_RATES[logger_name]` (padrão 1.0).
 
     Returns:
         logging.Logger: Logger configurado.
     """
     logger = logging.getLogger(logger_name)
+    if async_mode is None:
+        async_mode = LOG_SETTINGS["async"]
+    if json_format is None:
+        json_format = LOG_SETTINGS["json"]
+    if sample_rate is None:
+        sample_rate = LOG_SETTINGS["sample_rates"].get(logger_name, 1.0)
+
     if not logger.hasHandlers():
-        handler = logging.StreamHandler()
-        green = "\033[92m"
-        reset = "\033[0m"
-        fmt = f"{green}%(asctime)s - %(name)s - %(levelname)s - %(filename)s - %(message)s{reset}"
-        handler.setFormatter(logging.Formatter(fmt))
-        logger.addHandler(handler)
+        logger.addHandler(_build_handler(async_mode, json_format))
+    for log_filter in [f for f in logger.filters if isinstance(f, SamplingFilter)]:
+        logger.removeFilter(log_filter)
+    if sample_rate < 1:
+        logger.addFilter(SamplingFilter(sample_rate))
     logger.setLevel(level)
     return logger
 
 
+def use_sync_logging() -> None:
+    """
+    Troca os handlers assíncronos dos loggers já configurados por handlers
+    síncronos e desativa o modo assíncrono para os próximos.
+
+    Usado como initializer de processos filhos: eles terminam sem executar os
+    handlers de `atexit`, então registros ainda na fila do QueueListener
+    seriam perdidos.
+    """
+    LOG_SETTINGS["async"] = False
+    loggers = [logging.getLogger()] + [
+        log
+        for log in logging.Logger.manager.loggerDict.values()
+        if isinstance(log, logging.Logger)
+    ]
+    for log in loggers:
+        for handler in [h for h in log.handlers if isinstance(h, DeferredQueueHandler)]:
+            json_format = next(
+                (
+                    fmt
+                    for fmt, (log_queue, _) in _LOG_LISTENERS.items()
+                    if log_queue is handler.queue
+                ),
+                LOG_SETTINGS["json"],
+            )
+            log.removeHandler(handler)
+            log.addHandler(_build_handler(False, json_format))
+
+
 logger = configure_logger()
 load_dotenv()
 
@@ -85,6 +231,25 @@ def load_config() -> Tuple[str, Dict[str, Any]]:
 ENV, CONFIG = load_config()
 
 
+def apply_logging_config(config: Dict[str, Any]) -> None:
+    """
+    Aplica as chaves `LOG_ASYNC`, `LOG_JSON` e `LOG_SAMPLE_RATES` da
+    configuração e reconfigura o logger principal.
+
+    Args:
+        config (Dict[str, Any]): Configuração carregada do YAML.
+    """
+    LOG_SETTINGS["async"] = bool(config.get("LOG_ASYNC", False))
+    LOG_SETTINGS["json"] = bool(config.get("LOG_JSON", False))
+    LOG_SETTINGS["sample_rates"] = dict(config.get("LOG_SAMPLE_RATES") or {})
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    configure_logger(logger.name)
+
+
+apply_logging_config(CONFIG)
+
+
 def get_config(key: str, default: Any = None) -> Any:
     """
     Retorna o valor de uma chave na configuração.
@@ -162,5 +327,21 @@ USERS_DIRECTORY = os.path.join(
     DATA_PATH, get_config("USERS_DIRECTORY", "challenge-webmedia-e-globo-2023/files/treino")
 )
 SCALING_RANGE = get_config("SCALING_RANGE", 100)
+COVISIT_WINDOW_HOURS = get_config("COVISIT_WINDOW_HOURS", 24)
+COVISIT_TOP_N = get_config("COVISIT_TOP_N", 50)
+COVISIT_CHUNK_SIZE = get_config("COVISIT_CHUNK_SIZE", 2048)
+COVISIT_HALF_LIFE_DAYS = get_config("COVISIT_HALF_LIFE_DAYS", 7)
+ENCODE_IDS = get_config("ENCODE_IDS", False)
+CSV_READ_WORKERS = get_config("CSV_READ_WORKERS", 8)
+CSV_ENGINE = get_config("CSV_ENGINE")
+NEWS_TEXT_FEATURES = get_config("NEWS_TEXT_FEATURES", False)
+NEWS_READ_CHUNK_SIZE = get_config("NEWS_READ_CHUNK_SIZE")
+RAW_PARQUET_INGESTION = get_config("RAW_PARQUET_INGESTION", False)
+USERS_CHUNKED = get_config("USERS_CHUNKED", False)
+USERS_CHUNK_ROWS = get_config("USERS_CHUNK_ROWS")
+USERS_CHUNK_MEMORY_FRACTION = get_config("USERS_CHUNK_MEMORY_FRACTION", 0.25)
+MIX_JOIN_CHUNK_ROWS = get_config("MIX_JOIN_CHUNK_ROWS", 2_000_000)
+FEATURE_MAX_WORKERS = get_config("FEATURE_MAX_WORKERS", 1)
+FEATURE_PARTITIONS = get_config("FEATURE_PARTITIONS", 1)
 DT_TODAY = pd.Timestamp.today().date()
 TODAY = DT_TODAY.strftime("%Y-%m-%d")
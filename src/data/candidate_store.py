@@ -0,0 +1,473 @@
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.config import logger
+
+NANOS_PER_HOUR = 3600 * 10**9
+TimeLike = Union[pd.Timestamp, str, None]
+NAT_NS = np.iinfo(np.int64).min
+# Capacidade mínima dos buffers de `append`
+MIN_CAPACITY = 1024
+
+
+class CandidateStore:
+    """
+    Catálogo de notícias candidatas mantido em ordem de `issuedDatetime`.
+
+    As datas de publicação ficam em um array int64 (epoch em nanossegundos),
+    de modo que a janela de frescor é aplicada com uma busca binária. Notícias
+    sem data de publicação ficam no início e nunca entram em uma janela.
+
+    Para cada valor das colunas de filtro é pré-calculado um bitmap (compactado
+    com `np.packbits`) sobre o catálogo; filtros por atributo viram operações
+    OR/AND sobre esses bitmaps.
+
+    Os códigos de `pageId` no índice de histórico (`page_codes`), quando
+    informados, ficam em um array alinhado com o catálogo, fora do DataFrame.
+
+    Notícias novas podem ser acrescentadas com `append` sem recarregar o
+    catálogo; alterações e leituras consistentes (`select_candidates`) são
+    serializadas por um lock.
+    """
+
+    def __init__(
+        self,
+        news_df: pd.DataFrame,
+        time_column: str = "issuedDatetime",
+        use_wall_clock: bool = False,
+        filter_columns: Sequence[str] = (),
+        page_codes: Optional[np.ndarray] = None,
+    ):
+        """
+        Ordena o catálogo pela data de publicação e monta os bitmaps de filtro.
+
+        Um catálogo já ordenado (ex.: serving bundle) é usado sem cópia, o que
+        preserva as colunas mapeadas do cache Arrow.
+
+        Args:
+            news_df (pd.DataFrame): Notícias candidatas contendo `time_column`.
+            time_column (str): Coluna com a data/hora de publicação.
+            use_wall_clock (bool): Se True, as janelas são relativas ao horário
+                atual; caso contrário, à notícia mais recente do catálogo.
+            filter_columns (Sequence[str]): Colunas filtráveis (as ausentes em
+                `news_df` são ignoradas).
+            page_codes (np.ndarray, optional): Códigos dos pageIds no índice de
+                histórico, alinhados com `news_df`.
+        """
+        self.time_column = time_column
+        self.use_wall_clock = use_wall_clock
+        self.filter_columns = [col for col in filter_columns if col in news_df.columns]
+        self.lock = threading.RLock()
+        issued_ns = _to_epoch_ns(news_df[time_column])
+        if np.all(issued_ns[1:] >= issued_ns[:-1]):
+            if not news_df.index.equals(pd.RangeIndex(len(news_df))):
+                news_df = news_df.copy(deep=False)
+                news_df.index = pd.RangeIndex(len(news_df))
+            self.news_df = news_df
+            self.issued_ns = issued_ns
+        else:
+            order = np.argsort(issued_ns, kind="stable")
+            self.news_df = news_df.iloc[order].reset_index(drop=True)
+            self.issued_ns = issued_ns[order]
+            if page_codes is not None:
+                page_codes = np.asarray(page_codes)[order]
+        self._buffers: Optional[Dict[str, _ColumnBuffer]] = None
+        self.page_codes = page_codes
+        self._bitmaps: Dict[str, Dict[str, np.ndarray]] = {}
+        self._build_bitmaps()
+
+    def __len__(self) -> int:
+        return len(self.news_df)
+
+    @property
+    def page_codes(self) -> Optional[np.ndarray]:
+        """Códigos dos pageIds no índice de histórico, alinhados com `news_df`."""
+        return self._page_codes
+
+    @page_codes.setter
+    def page_codes(self, page_codes: Optional[np.ndarray]) -> None:
+        self._page_codes = page_codes
+        self._codes_buffer: Optional[_GrowableArray] = None
+
+    def reference_ns(self, now: TimeLike = None) -> int:
+        """
+        Retorna o instante de referência da janela em nanossegundos.
+
+        Args:
+            now (TimeLike, optional): Instante explícito. Se None, usa o horário
+                atual (`use_wall_clock`) ou a notícia mais recente do catálogo.
+
+        Returns:
+            int: Epoch em nanossegundos.
+        """
+        if now is None and self.use_wall_clock:
+            now = pd.Timestamp.now()
+        if now is not None:
+            return pd.Timestamp(now).value
+        if len(self.issued_ns) == 0 or self.issued_ns[-1] == NAT_NS:
+            return 0
+        return int(self.issued_ns[-1])
+
+    def window_start(self, max_age_hours: float, now: TimeLike = None) -> int:
+        """
+        Posição da primeira notícia publicada há no máximo `max_age_hours`.
+
+        Args:
+            max_age_hours (float): Idade máxima em horas.
+            now (TimeLike, optional): Instante de referência.
+
+        Returns:
+            int: Posição inicial da janela no catálogo.
+        """
+        cutoff = self.reference_ns(now) - int(max_age_hours * NANOS_PER_HOUR)
+        return int(np.searchsorted(self.issued_ns, cutoff, side="left"))
+
+    def filter_bitmap(self, filters: Dict[str, List[str]]) -> Optional[np.ndarray]:
+        """
+        Combina os bitmaps dos filtros: OR entre valores de uma coluna e AND
+        entre colunas.
+
+        Args:
+            filters (Dict[str, List[str]]): Valores aceitos por coluna. Listas
+                vazias ou None são ignoradas.
+
+        Returns:
+            np.ndarray, optional: Bitmap compactado (uint8) ou None se não houver filtro.
+
+        Raises:
+            KeyError: Se uma coluna não for filtrável.
+        """
+        combined = None
+        for col, values in filters.items():
+            if not values:
+                continue
+            if col not in self._bitmaps:
+                raise KeyError(f"Coluna não filtrável: {col}")
+            empty = self._empty_bitmap()
+            col_bitmap = empty.copy()
+            for value in values:
+                np.bitwise_or(col_bitmap, self._bitmaps[col].get(value, empty), out=col_bitmap)
+            if combined is None:
+                combined = col_bitmap
+            else:
+                np.bitwise_and(combined, col_bitmap, out=combined)
+        return combined
+
+    def select(
+        self,
+        max_age_hours: Optional[float] = None,
+        now: TimeLike = None,
+        filters: Optional[Dict[str, List[str]]] = None,
+    ) -> np.ndarray:
+        """
+        Seleciona as posições dos candidatos dentro da janela de frescor que
+        atendem aos filtros por atributo.
+
+        Args:
+            max_age_hours (float, optional): Idade máxima em horas. None seleciona tudo.
+            now (TimeLike, optional): Instante de referência.
+            filters (Dict[str, List[str]], optional): Ver `filter_bitmap`.
+
+        Returns:
+            np.ndarray: Posições (crescentes) em `news_df`.
+        """
+        with self.lock:
+            start = 0 if max_age_hours is None else self.window_start(max_age_hours, now)
+            bitmap = self.filter_bitmap(filters) if filters else None
+            if bitmap is None:
+                return np.arange(start, len(self.news_df))
+            mask = np.unpackbits(bitmap, count=len(self.news_df)).view(bool)
+            return np.flatnonzero(mask[start:]) + start
+
+    def select_candidates(
+        self,
+        max_age_hours: Optional[float] = None,
+        now: TimeLike = None,
+        filters: Optional[Dict[str, List[str]]] = None,
+    ) -> Tuple[pd.DataFrame, np.ndarray]:
+        """
+        Igual a `select`, mas retorna também o catálogo usado, de modo que as
+        posições continuem válidas mesmo com `append` concorrente.
+
+        Returns:
+            Tuple[pd.DataFrame, np.ndarray]: Catálogo e posições selecionadas.
+        """
+        with self.lock:
+            return self.news_df, self.select(max_age_hours, now, filters)
+
+    def append(self, news_df: pd.DataFrame, page_codes: Optional[np.ndarray] = None) -> int:
+        """
+        Acrescenta notícias novas ao catálogo sem alterar as existentes.
+
+        pageIds já presentes são ignorados. Quando as notícias novas são
+        mais recentes que o catálogo (caso comum), elas vão para o final e os
+        bitmaps são estendidos apenas com as novas linhas; caso contrário, o
+        catálogo é reordenado e os bitmaps recalculados.
+
+        Args:
+            news_df (pd.DataFrame): Notícias novas com as colunas do catálogo.
+            page_codes (np.ndarray, optional): Códigos dos pageIds no índice de
+                histórico, alinhados com `news_df` (usados se o catálogo tiver
+                `page_codes`; ausentes viram -1).
+
+        Returns:
+            int: Quantidade de notícias acrescentadas.
+        """
+        with self.lock:
+            is_new = (
+                ~news_df["pageId"].isin(self.news_df["pageId"]) & ~news_df["pageId"].duplicated()
+            )
+            positions = np.flatnonzero(is_new.to_numpy())
+            if len(positions) == 0:
+                return 0
+            issued_ns = _to_epoch_ns(news_df[self.time_column].iloc[positions])
+            order = np.argsort(issued_ns, kind="stable")
+            positions = positions[order]
+            rows = news_df.iloc[positions][list(self.news_df.columns)]
+            issued_ns = issued_ns[order]
+            new_codes = None
+            if self.page_codes is not None:
+                new_codes = (
+                    np.full(len(positions), -1, dtype=self.page_codes.dtype)
+                    if page_codes is None
+                    else np.asarray(page_codes, dtype=self.page_codes.dtype)[positions]
+                )
+
+            n_old = len(self.news_df)
+            if n_old and issued_ns[0] < self.issued_ns[-1]:
+                self._append_and_resort(rows, issued_ns, new_codes)
+            else:
+                self._append_in_order(rows, issued_ns, new_codes)
+                self._extend_bitmaps(rows, n_old)
+            logger.info(
+                "🆕 [Candidates] %d notícias acrescentadas (catálogo: %d).",
+                len(rows),
+                len(self.news_df),
+            )
+            return len(rows)
+
+    def _append_in_order(
+        self, rows: pd.DataFrame, issued_ns: np.ndarray, page_codes: Optional[np.ndarray]
+    ) -> None:
+        """
+        Acrescenta ao final notícias mais recentes que o catálogo, copiando só
+        as linhas novas: as colunas ficam em buffers com capacidade extra
+        (criados no primeiro append) e `news_df` passa a ser uma visão deles.
+        Catálogos retornados antes continuam válidos, pois só posições ainda
+        não usadas dos buffers são escritas.
+        """
+        if self._buffers is None:
+            self._buffers = {col: _ColumnBuffer(self.news_df[col]) for col in self.news_df}
+            self._issued_buffer = _GrowableArray(self.issued_ns)
+        if self.page_codes is not None and self._codes_buffer is None:
+            self._codes_buffer = _GrowableArray(self.page_codes)
+        self.news_df = pd.DataFrame(
+            {col: buffer.extend(rows[col]) for col, buffer in self._buffers.items()}, copy=False
+        )
+        self.issued_ns = self._issued_buffer.extend(issued_ns)
+        if self._codes_buffer is not None:
+            self._page_codes = self._codes_buffer.extend(page_codes)
+
+    def _append_and_resort(
+        self, rows: pd.DataFrame, issued_ns: np.ndarray, page_codes: Optional[np.ndarray]
+    ) -> None:
+        """
+        Acrescenta notícias fora de ordem: reordena o catálogo inteiro e
+        recalcula os bitmaps.
+        """
+        combined = pd.concat([self.news_df, rows], ignore_index=True)
+        combined_ns = np.concatenate([self.issued_ns, issued_ns])
+        resort = np.argsort(combined_ns, kind="stable")
+        self.news_df = combined.iloc[resort].reset_index(drop=True)
+        self.issued_ns = combined_ns[resort]
+        if self.page_codes is not None:
+            self.page_codes = np.concatenate([self.page_codes, page_codes])[resort]
+        self._buffers = None
+        self._build_bitmaps()
+
+    def evict_expired(self, retention_hours: Optional[float], now: TimeLike = None) -> int:
+        """
+        Remove do catálogo as notícias mais antigas que `retention_hours`.
+
+        Args:
+            retention_hours (float, optional): Retenção em horas. None não remove nada.
+            now (TimeLike, optional): Instante de referência.
+
+        Returns:
+            int: Quantidade de notícias removidas.
+        """
+        if retention_hours is None:
+            return 0
+        with self.lock:
+            start = self.window_start(retention_hours, now)
+            if start > 0:
+                self.news_df = self.news_df.iloc[start:].reset_index(drop=True)
+                self.issued_ns = self.issued_ns[start:]
+                if self.page_codes is not None:
+                    self.page_codes = self.page_codes[start:]
+                self._buffers = None
+                self._build_bitmaps()
+                logger.info("🧹 [Candidates] %d notícias expiradas removidas do catálogo.", start)
+            return start
+
+    def _empty_bitmap(self) -> np.ndarray:
+        """
+        Bitmap compactado sem nenhuma notícia selecionada.
+        """
+        return np.zeros((len(self.news_df) + 7) // 8, dtype=np.uint8)
+
+    def _extend_bitmaps(self, new_rows: pd.DataFrame, n_old: int) -> None:
+        """
+        Estende os bitmaps de filtro com as linhas acrescentadas ao final.
+        """
+        for col in self.filter_columns:
+            values = new_rows[col].to_numpy()
+            col_bitmaps = self._bitmaps[col]
+            empty = np.zeros((n_old + 7) // 8, dtype=np.uint8)
+            for value in set(col_bitmaps) | set(pd.unique(new_rows[col].dropna())):
+                col_bitmaps[value] = _extend_bitmap(
+                    col_bitmaps.get(value, empty), n_old, values == value
+                )
+
+    def _build_bitmaps(self) -> None:
+        """
+        Pré-calcula um bitmap por valor de cada coluna de filtro.
+        """
+        self._bitmaps = {}
+        for col in self.filter_columns:
+            codes, uniques = pd.factorize(self.news_df[col])
+            order = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+            col_bitmaps = {}
+            for code, value in enumerate(uniques):
+                mask = np.zeros(len(self.news_df), dtype=bool)
+                mask[order[bounds[code] : bounds[code + 1]]] = True
+                col_bitmaps[value] = np.packbits(mask)
+            self._bitmaps[col] = col_bitmaps
+        if self.filter_columns:
+            logger.info(
+                "🗂️ [Candidates] Bitmaps de filtro: %s",
+                {col: len(values) for col, values in self._bitmaps.items()},
+            )
+
+
+class _GrowableArray:
+    """
+    Array NumPy com capacidade extra: `extend` copia apenas os valores novos
+    e a capacidade dobra quando se esgota (custo amortizado O(novos)).
+    """
+
+    def __init__(self, values: np.ndarray):
+        self.buffer = np.empty(max(2 * len(values), MIN_CAPACITY), dtype=values.dtype)
+        self.buffer[: len(values)] = values
+        self.size = len(values)
+
+    def view(self) -> np.ndarray:
+        return self.buffer[: self.size]
+
+    def extend(self, values: np.ndarray) -> np.ndarray:
+        """
+        Acrescenta `values` e retorna a visão com todos os valores.
+        """
+        size = self.size + len(values)
+        if size > len(self.buffer):
+            grown = np.empty(max(size, 2 * len(self.buffer)), dtype=self.buffer.dtype)
+            grown[: self.size] = self.buffer[: self.size]
+            self.buffer = grown
+        self.buffer[self.size : size] = values
+        self.size = size
+        return self.buffer[:size]
+
+
+class _ColumnBuffer:
+    """
+    Coluna do catálogo em um `_GrowableArray`.
+
+    Colunas categóricas guardam os códigos; categorias novas entram no final,
+    sem recodificar as linhas existentes. Tipos sem representação NumPy (ou
+    valores novos incompatíveis com o tipo da coluna) caem para `pd.concat`.
+    """
+
+    def __init__(self, column: pd.Series):
+        self.dtype = column.dtype
+        self.values: Optional[_GrowableArray] = None
+        self.column: Optional[pd.Series] = None
+        if isinstance(self.dtype, pd.CategoricalDtype):
+            self.values = _GrowableArray(column.cat.codes.to_numpy())
+        elif isinstance(self.dtype, np.dtype):
+            self.values = _GrowableArray(column.to_numpy())
+        else:
+            self.column = column.reset_index(drop=True)
+
+    def extend(self, new: pd.Series) -> Union[np.ndarray, pd.Categorical, pd.Series]:
+        """
+        Acrescenta as linhas de `new` e retorna a coluna completa.
+        """
+        if isinstance(self.dtype, pd.CategoricalDtype):
+            return self._extend_categorical(new)
+        if self.values is not None:
+            try:
+                return self.values.extend(new.astype(self.dtype).to_numpy())
+            except (TypeError, ValueError) as e:
+                logger.warning(
+                    "⚠️ [Candidates] Coluna %s (%s) não comporta os valores novos (%s); "
+                    "usando concatenação.",
+                    new.name,
+                    self.dtype,
+                    e,
+                )
+                self.column = pd.Series(self.values.view(), name=new.name)
+                self.values = None
+        self.column = pd.concat([self.column, new], ignore_index=True)
+        return self.column
+
+    def _extend_categorical(self, new: pd.Series) -> pd.Categorical:
+        values = new.astype(object).to_numpy()
+        categories = self.dtype.categories
+        unseen = pd.Index(pd.unique(values[pd.notna(values)])).difference(categories)
+        if len(unseen):
+            self.dtype = pd.CategoricalDtype(categories.append(unseen), self.dtype.ordered)
+            codes_dtype = pd.Categorical([], dtype=self.dtype).codes.dtype
+            if codes_dtype != self.values.buffer.dtype:
+                self.values = _GrowableArray(self.values.view().astype(codes_dtype))
+        codes = self.dtype.categories.get_indexer(values).astype(self.values.buffer.dtype)
+        return pd.Categorical.from_codes(
+            self.values.extend(codes), dtype=self.dtype, validate=False
+        )
+
+
+def _extend_bitmap(bitmap: np.ndarray, n_old: int, new_mask: np.ndarray) -> np.ndarray:
+    """
+    Estende um bitmap compactado de `n_old` linhas com os bits de `new_mask`,
+    reaproveitando os bytes completos já existentes.
+
+    Args:
+        bitmap (np.ndarray): Bitmap compactado (uint8) das linhas antigas.
+        n_old (int): Quantidade de linhas antigas.
+        new_mask (np.ndarray): Máscara booleana das linhas novas.
+
+    Returns:
+        np.ndarray: Bitmap compactado com `n_old + len(new_mask)` linhas.
+    """
+    full_bytes = n_old // 8
+    tail = np.unpackbits(bitmap[full_bytes:], count=n_old % 8).view(bool)
+    return np.concatenate([bitmap[:full_bytes], np.packbits(np.concatenate([tail, new_mask]))])
+
+
+def _to_epoch_ns(values: pd.Series) -> np.ndarray:
+    """
+    Converte datas em epoch int64 (ns); valores inválidos viram o menor int64.
+
+    Args:
+        values (pd.Series): Datas/horas de publicação.
+
+    Returns:
+        np.ndarray: Epochs em nanossegundos.
+    """
+    as_datetime = pd.to_datetime(values, errors="coerce")
+    if getattr(as_datetime.dt, "tz", None) is not None:
+        as_datetime = as_datetime.dt.tz_convert(None)
+    return as_datetime.to_numpy(dtype="datetime64[ns]").view(np.int64)
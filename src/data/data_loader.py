@@ -4,7 +4,10 @@ from typing import Any, Dict, List, Optional
 import pandas as pd
 
 from src.config import DATA_PATH, USE_S3, logger
+from src.data.id_dictionary import normalize_ids
 from src.predict.constants import (
+    CANDIDATE_FILTER_COLUMNS,
+    CANDIDATE_TIME_COLUMN,
     CLIENT_FEATURES_COLUMNS, 
     METADATA_COLS, 
     NEWS_FEATURES_COLUMNS)
@@ -111,15 +114,32 @@ def load_data_for_prediction(storage: Optional[object] = None, include_metadata:
         storage = _Storage(use_s3=USE_S3)
     full_path = os.path.join(DATA_PATH, "train", "X_train_full.parquet")
     logger.info("[Data Loader] Carregando dados completos de: %s", full_path)
-    full_df = storage.read_parquet(full_path)
-
-    news_df = full_df[["pageId"] + NEWS_FEATURES_COLUMNS].copy()
-    news_df["pageId"] = news_df["pageId"].astype(str)
+    # Lê apenas as colunas usadas na predição
+    full_df = storage.read_parquet_projected(
+        full_path,
+        columns=["pageId"] + NEWS_FEATURES_COLUMNS + CLIENT_FEATURES_COLUMNS,
+        optional_columns=["userId", CANDIDATE_TIME_COLUMN] + CANDIDATE_FILTER_COLUMNS,
+    )
+
+    news_cols = ["pageId"] + NEWS_FEATURES_COLUMNS
+    news_cols += [
+        col
+        for col in [CANDIDATE_TIME_COLUMN] + CANDIDATE_FILTER_COLUMNS
+        if col in full_df.columns
+    ]
+    news_df = full_df[news_cols].copy()
+    news_df["pageId"] = normalize_ids(news_df["pageId"])
 
     if include_metadata:
         try:
-            metadata_df = pd.read_parquet(os.path.join("data", "features", "news_feats.parquet"))[METADATA_COLS]
-            metadata_df["pageId"] = metadata_df["pageId"].astype(str)
+            metadata_path = os.path.join(DATA_PATH, "features", "news_feats.parquet")
+            # Apenas os metadados das notícias candidatas
+            metadata_df = storage.read_parquet_projected(
+                metadata_path,
+                columns=METADATA_COLS,
+                filters=[("pageId", "in", news_df["pageId"].unique().tolist())],
+            )
+            metadata_df["pageId"] = normalize_ids(metadata_df["pageId"])
             news_df = news_df.merge(metadata_df, on="pageId", how="left")
             logger.info("[Data Loader] Metadados de notícias adicionados: %d registros.", len(news_df))
         except Exception as exc:  # pragma: no cover - IO environment dependent
@@ -0,0 +1,215 @@
+import os
+from typing import Any, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.config import DATA_PATH, USE_S3, logger
+from src.data.id_dictionary import normalize_ids
+
+HISTORY_INDEX_DIR = os.path.join(DATA_PATH, "features", "history_index")
+
+
+class UserHistoryIndex:
+    """
+    Índice compacto com as notícias já lidas por cada usuário.
+
+    Os históricos ficam em formato CSR: `codes[offsets[i]:offsets[i + 1]]` contém,
+    ordenados, os códigos int32 dos pageIds lidos pelo usuário `user_ids[i]`.
+    Os arrays numéricos podem ser salvos em `.npy` e abertos com memory map.
+    IDs já codificados como inteiros (ver `IdDictionary`) são mantidos como tal.
+    """
+
+    def __init__(
+        self,
+        user_ids: np.ndarray,
+        page_ids: np.ndarray,
+        offsets: np.ndarray,
+        codes: np.ndarray,
+    ):
+        self.user_ids = _id_array(user_ids)
+        self.page_ids = _id_array(page_ids)
+        self.offsets = offsets
+        self.codes = codes
+        self._user_index = pd.Index(self.user_ids)
+        self._page_index = pd.Index(self.page_ids)
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    def encode_pages(self, page_ids: Iterable[str]) -> np.ndarray:
+        """
+        Converte pageIds em códigos do índice.
+
+        Args:
+            page_ids (Iterable[str]): pageIds a converter.
+
+        Returns:
+            np.ndarray: Códigos int32 (-1 para pageIds fora do vocabulário).
+        """
+        return self._page_index.get_indexer(pd.Index(page_ids)).astype(np.int32)
+
+    def seen_codes(self, user_id: str) -> np.ndarray:
+        """
+        Retorna os códigos (ordenados) das notícias lidas pelo usuário.
+
+        Args:
+            user_id (str): Identificador do usuário.
+
+        Returns:
+            np.ndarray: Códigos lidos; vazio se o usuário não estiver no índice.
+        """
+        pos = self._user_index.get_indexer([user_id])[0]
+        if pos < 0:
+            return self.codes[:0]
+        return self.codes[self.offsets[pos] : self.offsets[pos + 1]]
+
+    def seen_mask(self, user_id: str, candidate_codes: np.ndarray) -> np.ndarray:
+        """
+        Máscara vetorizada indicando quais candidatos o usuário já leu.
+
+        Args:
+            user_id (str): Identificador do usuário.
+            candidate_codes (np.ndarray): Códigos dos candidatos (ver `encode_pages`).
+
+        Returns:
+            np.ndarray: Array booleano alinhado com `candidate_codes`.
+        """
+        seen = self.seen_codes(user_id)
+        if len(seen) == 0:
+            return np.zeros(len(candidate_codes), dtype=bool)
+        pos = np.searchsorted(seen, candidate_codes)
+        pos[pos == len(seen)] = len(seen) - 1
+        return seen[pos] == candidate_codes
+
+    def save(self, directory: str, storage: Optional[Any] = None) -> None:
+        """
+        Salva o índice (arrays em `.npy`, vocabulários em Parquet).
+
+        Args:
+            directory (str): Diretório de destino.
+            storage: Instância de storage (padrão: disco local).
+        """
+        storage = storage or _local_storage()
+        storage.save_numpy(np.asarray(self.offsets), os.path.join(directory, "offsets.npy"))
+        storage.save_numpy(np.asarray(self.codes), os.path.join(directory, "codes.npy"))
+        storage.write_parquet(
+            pd.DataFrame({"userId": self.user_ids}), os.path.join(directory, "user_ids.parquet")
+        )
+        storage.write_parquet(
+            pd.DataFrame({"pageId": self.page_ids}), os.path.join(directory, "page_ids.parquet")
+        )
+        logger.info("💾 [History] Índice salvo em: %s", directory)
+
+    @classmethod
+    def load(
+        cls, directory: str, mmap_mode: Optional[str] = "r", storage: Optional[Any] = None
+    ) -> "UserHistoryIndex":
+        """
+        Carrega um índice salvo por `save`.
+
+        Args:
+            directory (str): Diretório do índice.
+            mmap_mode (str, optional): Modo de memory map dos `.npy` (None lê
+                tudo; no S3 os arrays são sempre lidos em memória).
+            storage: Instância de storage (padrão: disco local).
+
+        Returns:
+            UserHistoryIndex: Índice carregado.
+        """
+        storage = storage or _local_storage()
+        offsets = storage.load_numpy(os.path.join(directory, "offsets.npy"), mmap_mode=mmap_mode)
+        codes = storage.load_numpy(os.path.join(directory, "codes.npy"), mmap_mode=mmap_mode)
+        user_ids = storage.read_parquet(os.path.join(directory, "user_ids.parquet"))["userId"]
+        page_ids = storage.read_parquet(os.path.join(directory, "page_ids.parquet"))["pageId"]
+        logger.info("📂 [History] Índice carregado de: %s", directory)
+        return cls(user_ids.to_numpy(), page_ids.to_numpy(), offsets, codes)
+
+    @staticmethod
+    def files(directory: str) -> List[str]:
+        """
+        Arquivos gravados por `save` em `directory`.
+        """
+        return [
+            os.path.join(directory, name)
+            for name in ("offsets.npy", "codes.npy", "user_ids.parquet", "page_ids.parquet")
+        ]
+
+
+def build_history_index(users_df: pd.DataFrame) -> UserHistoryIndex:
+    """
+    Constrói o índice de histórico a partir das features de usuários.
+
+    Args:
+        users_df (pd.DataFrame): DataFrame com as colunas `userId` e `pageId`
+            (uma linha por visita).
+
+    Returns:
+        UserHistoryIndex: Índice com os pageIds lidos por usuário.
+    """
+    pairs = users_df[["userId", "pageId"]].dropna()
+    user_codes, user_ids = pd.factorize(pairs["userId"].to_numpy())
+    page_codes, page_ids = pd.factorize(normalize_ids(pairs["pageId"]).to_numpy())
+
+    # Ordena por (usuário, notícia) e remove visitas repetidas
+    keys = np.unique(user_codes.astype(np.int64) * len(page_ids) + page_codes)
+    users_sorted = keys // max(len(page_ids), 1)
+    codes = (keys % max(len(page_ids), 1)).astype(np.int32)
+    offsets = np.zeros(len(user_ids) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(users_sorted, minlength=len(user_ids)), out=offsets[1:])
+
+    logger.info(
+        "📚 [History] Índice construído: %d usuários | %d notícias | %d leituras",
+        len(user_ids),
+        len(page_ids),
+        len(codes),
+    )
+    return UserHistoryIndex(user_ids, page_ids, offsets, codes)
+
+
+def load_history_index(
+    storage: Optional[Any] = None, index_dir: str = HISTORY_INDEX_DIR
+) -> UserHistoryIndex:
+    """
+    Carrega o índice salvo pela etapa `users` do pipeline de features (com
+    memory map no storage local). Se ele ainda não existir, constrói o índice
+    a partir de `features/users_feats.parquet`.
+
+    Args:
+        storage: Instância de storage (usa Storage padrão se None).
+        index_dir (str): Diretório do índice salvo.
+
+    Returns:
+        UserHistoryIndex: Índice com os pageIds lidos por usuário.
+    """
+    if storage is None:
+        from src.storage.io import Storage as _Storage
+
+        storage = _Storage(use_s3=USE_S3)
+    if all(storage.exists(path) for path in UserHistoryIndex.files(index_dir)):
+        return UserHistoryIndex.load(index_dir, storage=storage)
+    users_path = os.path.join(DATA_PATH, "features", "users_feats.parquet")
+    logger.warning(
+        "⚠️ [History] Índice salvo não encontrado em %s; construindo de: %s",
+        index_dir,
+        users_path,
+    )
+    users_df = storage.read_parquet(users_path, columns=["userId", "pageId"])
+    return build_history_index(users_df)
+
+
+def _local_storage() -> Any:
+    """
+    Storage local padrão de `save`/`load`.
+    """
+    from src.storage.local import LocalStorage
+
+    return LocalStorage()
+
+
+def _id_array(ids: Iterable) -> np.ndarray:
+    """
+    Converte IDs em array, mantendo códigos inteiros e usando object para texto.
+    """
+    ids = np.asarray(ids)
+    return ids if ids.dtype.kind in "iu" else ids.astype(object)
@@ -0,0 +1,216 @@
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_integer_dtype
+
+from src.config import DATA_PATH, USE_S3, logger
+
+ID_DICTIONARY_DIR = os.path.join(DATA_PATH, "features", "ids")
+ID_COLUMNS = ("userId", "pageId")
+UNKNOWN_CODE = -1
+
+
+class IdDictionary:
+    """
+    Dicionário persistente que mapeia `userId` (hash hexadecimal) e `pageId`
+    (UUID) para códigos int32 densos.
+
+    Os vocabulários só crescem: IDs novos recebem o próximo código livre e os
+    códigos existentes nunca mudam, de modo que artefatos gerados em execuções
+    anteriores continuam válidos.
+    """
+
+    def __init__(self, vocab: Optional[Dict[str, Iterable[str]]] = None):
+        vocab = vocab or {}
+        self._vocab: Dict[str, np.ndarray] = {}
+        self._index: Dict[str, pd.Index] = {}
+        for kind in ID_COLUMNS:
+            self._set_vocab(kind, np.asarray(list(vocab.get(kind, [])), dtype=object))
+
+    def size(self, kind: str) -> int:
+        """
+        Quantidade de IDs conhecidos de um tipo (`userId` ou `pageId`).
+        """
+        return len(self._vocab[kind])
+
+    def extend(self, kind: str, values: Iterable[Any]) -> int:
+        """
+        Adiciona ao vocabulário os IDs ainda não conhecidos.
+
+        Args:
+            kind (str): `userId` ou `pageId`.
+            values (Iterable[Any]): IDs (convertidos para str).
+
+        Returns:
+            int: Quantidade de IDs adicionados.
+        """
+        uniques = pd.unique(pd.Series(values, dtype=object).dropna().astype(str))
+        new = uniques[self._index[kind].get_indexer(uniques) < 0]
+        if len(new):
+            if len(self._vocab[kind]) + len(new) > np.iinfo(np.int32).max:
+                raise OverflowError(f"Vocabulário de {kind} excede o limite de int32.")
+            self._set_vocab(kind, np.concatenate([self._vocab[kind], new]))
+        return len(new)
+
+    def encode(self, kind: str, values: Iterable[Any], extend: bool = False) -> np.ndarray:
+        """
+        Converte IDs em códigos int32.
+
+        Args:
+            kind (str): `userId` ou `pageId`.
+            values (Iterable[Any]): IDs a converter.
+            extend (bool): Se True, IDs desconhecidos são adicionados antes.
+
+        Returns:
+            np.ndarray: Códigos int32 (`UNKNOWN_CODE` para IDs fora do vocabulário).
+        """
+        values = pd.Series(values, dtype=object)
+        if extend:
+            self.extend(kind, values)
+        codes = self._index[kind].get_indexer(values.where(values.isna(), values.astype(str)))
+        return codes.astype(np.int32)
+
+    def decode(self, kind: str, codes: Iterable[int]) -> np.ndarray:
+        """
+        Converte códigos de volta para os IDs originais.
+
+        Args:
+            kind (str): `userId` ou `pageId`.
+            codes (Iterable[int]): Códigos int32.
+
+        Returns:
+            np.ndarray: IDs (object); códigos inválidos viram None.
+        """
+        codes = np.asarray(codes, dtype=np.int64)
+        vocab = self._vocab[kind]
+        valid = (codes >= 0) & (codes < len(vocab))
+        decoded = np.full(len(codes), None, dtype=object)
+        decoded[valid] = vocab[codes[valid]]
+        return decoded
+
+    def encode_frame(self, df: pd.DataFrame, extend: bool = False) -> pd.DataFrame:
+        """
+        Substitui as colunas `userId`/`pageId` presentes por códigos int32.
+
+        Args:
+            df (pd.DataFrame): Dados com IDs em texto.
+            extend (bool): Se True, IDs desconhecidos são adicionados ao vocabulário.
+
+        Returns:
+            pd.DataFrame: Cópia com as colunas de ID codificadas.
+        """
+        encoded = {
+            kind: self.encode(kind, df[kind], extend=extend)
+            for kind in ID_COLUMNS
+            if kind in df.columns and not is_integer_dtype(df[kind])
+        }
+        return df.assign(**encoded)
+
+    def decode_records(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Decodifica `userId`/`pageId` em uma lista de dicionários (ex.:
+        recomendações retornadas pela API).
+
+        Args:
+            records (List[Dict[str, Any]]): Registros com códigos.
+
+        Returns:
+            List[Dict[str, Any]]: Novos registros com os IDs originais.
+        """
+        decoded = [dict(record) for record in records]
+        for kind in ID_COLUMNS:
+            positions = [i for i, record in enumerate(decoded) if kind in record]
+            if positions:
+                ids = self.decode(kind, [decoded[i][kind] for i in positions])
+                for i, value in zip(positions, ids):
+                    decoded[i][kind] = value
+        return decoded
+
+    def save(self, storage: Any, directory: str = ID_DICTIONARY_DIR) -> None:
+        """
+        Salva os vocabulários em Parquet (`<kind>s.parquet`; a posição é o código).
+
+        Args:
+            storage: Instância de storage.
+            directory (str): Diretório de destino.
+        """
+        for kind in ID_COLUMNS:
+            storage.write_parquet(
+                pd.DataFrame({kind: self._vocab[kind]}),
+                os.path.join(directory, f"{kind}s.parquet"),
+                index=False,
+            )
+        logger.info(
+            "💾 [Ids] Dicionário salvo em: %s | %s",
+            directory,
+            {kind: self.size(kind) for kind in ID_COLUMNS},
+        )
+
+    @classmethod
+    def load(cls, storage: Any, directory: str = ID_DICTIONARY_DIR) -> "IdDictionary":
+        """
+        Carrega um dicionário salvo por `save`.
+
+        Args:
+            storage: Instância de storage.
+            directory (str): Diretório do dicionário.
+
+        Returns:
+            IdDictionary: Dicionário carregado.
+        """
+        vocab = {
+            kind: storage.read_parquet(os.path.join(directory, f"{kind}s.parquet"))[kind]
+            for kind in ID_COLUMNS
+        }
+        ids = cls(vocab)
+        logger.info(
+            "📂 [Ids] Dicionário carregado de: %s | %s",
+            directory,
+            {kind: ids.size(kind) for kind in ID_COLUMNS},
+        )
+        return ids
+
+    def _set_vocab(self, kind: str, vocab: np.ndarray) -> None:
+        """
+        Atualiza o vocabulário e o índice de busca de um tipo de ID.
+        """
+        self._vocab[kind] = vocab
+        self._index[kind] = pd.Index(vocab, dtype=object)
+
+
+def load_id_dictionary(
+    storage: Optional[Any] = None, directory: str = ID_DICTIONARY_DIR
+) -> Optional[IdDictionary]:
+    """
+    Carrega o dicionário de IDs, se existir.
+
+    Args:
+        storage: Instância de storage (usa Storage padrão se None).
+        directory (str): Diretório do dicionário.
+
+    Returns:
+        IdDictionary, optional: Dicionário carregado ou None se ainda não foi gerado.
+    """
+    if storage is None:
+        from src.storage.io import Storage as _Storage
+
+        storage = _Storage(use_s3=USE_S3)
+    if not storage.exists(os.path.join(directory, f"{ID_COLUMNS[0]}s.parquet")):
+        return None
+    return IdDictionary.load(storage, directory)
+
+
+def normalize_ids(values: pd.Series) -> pd.Series:
+    """
+    Padroniza uma coluna de IDs: códigos inteiros são mantidos; demais
+    valores viram str.
+
+    Args:
+        values (pd.Series): Coluna `userId` ou `pageId`.
+
+    Returns:
+        pd.Series: IDs padronizados.
+    """
+    return values if is_integer_dtype(values) else values.astype(str)
@@ -0,0 +1,179 @@
+import os
+from typing import Any, Dict, Optional, Set
+
+import pandas as pd
+
+from src.config import DATA_PATH, get_config, logger
+from src.data.candidate_store import CandidateStore
+from src.data.history_index import UserHistoryIndex
+from src.data.id_dictionary import IdDictionary
+from src.features.pp_news import extract_news_features
+from src.predict.constants import AFFINITY_COLUMNS, CANDIDATE_TIME_COLUMN
+
+NEWS_DELTA_DIR = os.path.join(DATA_PATH, get_config("NEWS_DELTA_DIRECTORY", "news_delta"))
+NEWS_CATEGORY_COLUMNS = list(AFFINITY_COLUMNS)
+
+
+def frequency_encoders(news_df: pd.DataFrame) -> Dict[str, Dict[Any, float]]:
+    """
+    Recupera o frequency encoding das categorias a partir do catálogo.
+
+    Como `<categoria>Freq` é função apenas do valor da categoria, o mapeamento
+    usado no treino é reconstruído a partir dos pares (valor, frequência).
+
+    Args:
+        news_df (pd.DataFrame): Catálogo com as colunas de categoria e `*Freq`.
+
+    Returns:
+        Dict[str, Dict[Any, float]]: Frequência por valor de cada categoria.
+    """
+    encoders = {}
+    for col in NEWS_CATEGORY_COLUMNS:
+        freq_col = f"{col}Freq"
+        if col in news_df.columns and freq_col in news_df.columns:
+            pairs = news_df[[col, freq_col]].dropna().drop_duplicates(col)
+            encoders[col] = dict(zip(pairs[col], pairs[freq_col]))
+    return encoders
+
+
+def build_news_candidates(
+    raw_df: pd.DataFrame,
+    catalogue_columns: pd.Series,
+    encoders: Dict[str, Dict[Any, float]],
+    id_dictionary: Optional[IdDictionary] = None,
+) -> pd.DataFrame:
+    """
+    Converte notícias brutas (mesmo formato dos CSVs de itens) em linhas do
+    catálogo de candidatas.
+
+    Aplica a extração de URL/categorias de `pp_news`, o frequency encoding do
+    treino (valores nunca vistos recebem 0, como no conjunto de teste) e deixa
+    as features de afinidade (`rel*`) nulas, pois elas dependem do usuário.
+
+    Args:
+        raw_df (pd.DataFrame): Notícias brutas (`page`, `url`, `issued`, ...).
+        catalogue_columns (pd.Series): Tipos das colunas do catálogo (`dtypes`).
+        encoders (Dict[str, Dict[Any, float]]): Ver `frequency_encoders`.
+        id_dictionary (IdDictionary, optional): Codifica os pageIds quando o
+            catálogo usa códigos int32.
+
+    Returns:
+        pd.DataFrame: Linhas com as mesmas colunas (e tipos) do catálogo.
+    """
+    raw_df = raw_df.rename(columns={"page": "pageId"})
+    issued = pd.to_datetime(raw_df["issued"], errors="coerce")
+    if getattr(issued.dt, "tz", None) is not None:
+        issued = issued.dt.tz_localize(None)
+
+    news = extract_news_features(raw_df)
+    news[CANDIDATE_TIME_COLUMN] = issued.to_numpy()
+    for col in ["issuedDate", "issuedTime"]:
+        news[col] = news[col].astype(str)
+    for col, mapping in encoders.items():
+        news[f"{col}Freq"] = news[col].map(mapping).astype(float).fillna(0)
+    if id_dictionary is not None and pd.api.types.is_integer_dtype(catalogue_columns["pageId"]):
+        news = id_dictionary.encode_frame(news[news["pageId"].notna()], extend=True)
+
+    news = news.reindex(columns=catalogue_columns.index)
+    for col, dtype in catalogue_columns.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            # Valores fora das categorias do catálogo virariam NaN no cast
+            values = news[col].dropna().unique()
+            unseen = pd.Index(values).difference(dtype.categories)
+            if len(unseen):
+                dtype = pd.CategoricalDtype(dtype.categories.append(unseen), dtype.ordered)
+        try:
+            news[col] = news[col].astype(dtype)
+        except (TypeError, ValueError) as e:
+            logger.warning(
+                "⚠️ [Delta] Coluna %s mantida como %s (tipo do catálogo: %s): %s",
+                col,
+                news[col].dtype,
+                dtype,
+                e,
+            )
+    return news.reset_index(drop=True)
+
+
+class NewsDeltaIngestor:
+    """
+    Acrescenta ao `CandidateStore` as notícias de arquivos delta (CSV no
+    formato dos itens) gravados em `delta_dir`.
+
+    Cada arquivo é processado uma única vez (arquivos com erro de leitura são
+    tentados de novo no próximo `poll`); `poll` pode ser chamado
+    periodicamente para tornar notícias novas recomendáveis sem recarregar os
+    dados de serving.
+    """
+
+    def __init__(
+        self,
+        candidate_store: CandidateStore,
+        storage: Any,
+        delta_dir: str = NEWS_DELTA_DIR,
+        id_dictionary: Optional[IdDictionary] = None,
+        history_index: Optional[UserHistoryIndex] = None,
+    ):
+        self.candidate_store = candidate_store
+        self.storage = storage
+        self.delta_dir = delta_dir
+        self.id_dictionary = id_dictionary
+        self.history_index = history_index
+        self.encoders = frequency_encoders(candidate_store.news_df)
+        self.processed: Set[str] = set()
+
+    def poll(self) -> int:
+        """
+        Processa os arquivos delta ainda não ingeridos.
+
+        Returns:
+            int: Quantidade de notícias acrescentadas ao catálogo.
+        """
+        try:
+            files = sorted(self.storage.list_files(self.delta_dir, "*.csv"))
+        except Exception as e:
+            logger.warning("⚠️ [Delta] Não foi possível listar %s: %s", self.delta_dir, e)
+            return 0
+        added = 0
+        for path in files:
+            if path in self.processed:
+                continue
+            try:
+                added += self.ingest_file(path)
+            except Exception as e:
+                # Ex.: arquivo ainda sendo gravado; nova tentativa no próximo poll
+                logger.error(
+                    "🚨 [Delta] Erro ao ingerir %s (nova tentativa no próximo poll): %s", path, e
+                )
+                continue
+            self.processed.add(path)
+        return added
+
+    def ingest_file(self, path: str) -> int:
+        """
+        Lê um arquivo delta e acrescenta suas notícias ao catálogo.
+
+        Args:
+            path (str): Caminho do CSV no storage.
+
+        Returns:
+            int: Quantidade de notícias acrescentadas.
+        """
+        raw_df = self.storage.read_csv(path)
+        candidates = build_news_candidates(
+            raw_df,
+            self.candidate_store.news_df.dtypes,
+            self.encoders,
+            id_dictionary=self.id_dictionary,
+        )
+        page_codes = None
+        if self.history_index is not None:
+            page_codes = self.history_index.encode_pages(candidates["pageId"])
+        added = self.candidate_store.append(candidates, page_codes=page_codes)
+        logger.info(
+            "📥 [Delta] %s: %d notícias lidas, %d novas no catálogo.",
+            os.path.basename(path),
+            len(raw_df),
+            added,
+        )
+        return added
@@ -0,0 +1,348 @@
+import os
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from pyarrow import feather
+
+from src.config import DATA_PATH, USE_S3, get_config, logger
+from src.data.id_dictionary import normalize_ids
+from src.predict.constants import (
+    AFFINITY_COLUMNS,
+    CANDIDATE_FILTER_COLUMNS,
+    CANDIDATE_TIME_COLUMN,
+    CLIENT_FEATURES_COLUMNS,
+    METADATA_COLS,
+    NEWS_FEATURES_COLUMNS,
+)
+
+SERVING_DIR = os.path.join(DATA_PATH, "serving")
+SERVING_CACHE_DIR = get_config("SERVING_CACHE_DIR", os.path.join(".cache", "serving"))
+SERVING_CACHE_FORMAT = get_config("SERVING_CACHE_FORMAT", "parquet")
+MANIFEST_FILE = "manifest.pkl"
+LATEST_FILE = "latest.pkl"
+
+
+class AffinityTables:
+    """
+    Afinidade de cada usuário por categoria (ex.: `relThemeMain` = fração das
+    leituras do usuário no `themeMain` da notícia).
+
+    As tabelas são gravadas no bundle ordenadas por (userId, categoria), então
+    as linhas de um usuário são localizadas por busca binária sobre a coluna
+    `userId` e as colunas são usadas como estão (no cache Arrow, visões do
+    arquivo mapeado). Tabelas fora de ordem (bundles antigos) são ordenadas
+    uma única vez na carga.
+    """
+
+    def __init__(self, tables: Dict[str, pd.DataFrame]):
+        self._tables: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        for col, rel_col in AFFINITY_COLUMNS.items():
+            if col not in tables:
+                continue
+            table = tables[col]
+            if not table["userId"].is_monotonic_increasing:
+                logger.warning(
+                    "⚠️ [Serving] Tabela de afinidade %s fora de ordem; ordenando.", col
+                )
+                table = table.sort_values("userId", kind="stable")
+            self._tables[col] = (
+                table["userId"].to_numpy(),
+                table[col].to_numpy(),
+                table[rel_col].to_numpy(dtype=np.float32, copy=False),
+            )
+
+    def user_features(self, user_id: str, candidates: pd.DataFrame) -> pd.DataFrame:
+        """
+        Preenche as colunas `rel*` dos candidatos para o usuário.
+
+        Categorias nunca lidas pelo usuário recebem afinidade 0; categorias
+        ausentes na notícia (ou sem tabela no bundle) ficam NaN.
+
+        Args:
+            user_id (str): Identificador do usuário.
+            candidates (pd.DataFrame): Notícias com as colunas de categoria.
+
+        Returns:
+            pd.DataFrame: Cópia de `candidates` com as colunas `rel*`.
+        """
+        rel_values = {}
+        for col, rel_col in AFFINITY_COLUMNS.items():
+            table = self._tables.get(col)
+            if table is None or col not in candidates.columns:
+                rel_values[rel_col] = np.full(len(candidates), np.nan, dtype=np.float32)
+                continue
+            user_ids, categories, rel = table
+            start = np.searchsorted(user_ids, user_id, side="left")
+            end = np.searchsorted(user_ids, user_id, side="right")
+            user_rel = pd.Series(rel[start:end], index=categories[start:end])
+            values = candidates[col].map(user_rel)
+            rel_values[rel_col] = values.where(
+                values.notna() | candidates[col].isna(), 0.0
+            ).astype(np.float32)
+        return candidates.assign(**rel_values)
+
+
+def build_serving_bundle(
+    X_train_full: pd.DataFrame, metadata_df: Optional[pd.DataFrame] = None
+) -> Dict[str, pd.DataFrame]:
+    """
+    Monta as tabelas de serving a partir das interações de treino.
+
+    As tabelas já saem na ordem usada no serving: `news` por data de
+    publicação (sem data primeiro, como no `CandidateStore`) e as tabelas de
+    afinidade por (userId, categoria). Assim a carga não precisa ordenar nem
+    juntar tabelas, e as colunas do cache Arrow são usadas sem cópia.
+
+    Args:
+        X_train_full (pd.DataFrame): Interações com features (uma linha por
+            par usuário-notícia).
+        metadata_df (pd.DataFrame, optional): Metadados das notícias (`METADATA_COLS`).
+
+    Returns:
+        Dict[str, pd.DataFrame]: Tabelas `news` (uma linha por pageId, com os
+        metadados), `clients` (uma linha por userId) e `affinity_<categoria>`.
+    """
+    item_cols = [col for col in NEWS_FEATURES_COLUMNS if not col.startswith("rel")]
+    extra_cols = [
+        col
+        for col in [CANDIDATE_TIME_COLUMN] + CANDIDATE_FILTER_COLUMNS
+        if col in X_train_full.columns
+    ]
+    news = X_train_full[["pageId"] + item_cols + extra_cols].drop_duplicates("pageId")
+    news = news.assign(pageId=normalize_ids(news["pageId"]))
+    if metadata_df is not None:
+        metadata = metadata_df[METADATA_COLS].assign(pageId=normalize_ids(metadata_df["pageId"]))
+        news = news.merge(metadata.drop_duplicates("pageId"), on="pageId", how="left")
+    if CANDIDATE_TIME_COLUMN in news.columns:
+        news = news.sort_values(CANDIDATE_TIME_COLUMN, kind="stable", na_position="first")
+    news = news.reset_index(drop=True)
+
+    clients = X_train_full[["userId"] + CLIENT_FEATURES_COLUMNS].drop_duplicates("userId")
+    bundle = {"news": news, "clients": clients.reset_index(drop=True)}
+
+    for col, rel_col in AFFINITY_COLUMNS.items():
+        if col in X_train_full.columns and rel_col in X_train_full.columns:
+            affinity = X_train_full[["userId", col, rel_col]].dropna(subset=[col])
+            bundle[f"affinity_{col}"] = (
+                affinity.drop_duplicates(["userId", col])
+                .sort_values(["userId", col], kind="stable")
+                .reset_index(drop=True)
+            )
+
+    logger.info("📦 [Serving] Bundle montado: %s", {name: len(df) for name, df in bundle.items()})
+    return bundle
+
+
+def save_serving_bundle(
+    bundle: Dict[str, pd.DataFrame],
+    storage: Any,
+    version: str,
+    serving_dir: str = SERVING_DIR,
+) -> str:
+    """
+    Salva o bundle em `<serving_dir>/<version>/` e aponta `latest.pkl` para ele.
+
+    O manifesto é gravado por último, marcando o bundle como completo.
+
+    Args:
+        bundle (Dict[str, pd.DataFrame]): Tabelas de `build_serving_bundle`.
+        storage: Instância de storage.
+        version (str): Versão do bundle (ex.: run_id do MLflow).
+        serving_dir (str): Diretório base dos bundles.
+
+    Returns:
+        str: Diretório do bundle salvo.
+    """
+    bundle_dir = os.path.join(serving_dir, version)
+    for name, df in bundle.items():
+        storage.write_parquet(df, os.path.join(bundle_dir, f"{name}.parquet"), index=False)
+    manifest = {
+        "version": version,
+        "created_at": pd.Timestamp.now().isoformat(),
+        "tables": {name: len(df) for name, df in bundle.items()},
+    }
+    storage.save_pickle(manifest, os.path.join(bundle_dir, MANIFEST_FILE))
+    storage.save_pickle({"version": version}, os.path.join(serving_dir, LATEST_FILE))
+    logger.info("💾 [Serving] Bundle %s salvo em: %s", version, bundle_dir)
+    return bundle_dir
+
+
+def load_serving_bundle(
+    storage: Optional[Any] = None,
+    version: Optional[str] = None,
+    serving_dir: str = SERVING_DIR,
+    cache_dir: Optional[str] = SERVING_CACHE_DIR,
+    cache_format: str = SERVING_CACHE_FORMAT,
+) -> Dict[str, Any]:
+    """
+    Carrega o bundle de serving, usando um cache local indexado pela versão.
+
+    Se `version` não existir no cache, as tabelas são lidas do storage e
+    copiadas para `<cache_dir>/<version>/`; reinícios seguintes leem apenas
+    do cache.
+
+    Com `cache_format="arrow"` o cache é gravado em Arrow IPC (Feather) sem
+    compressão, já com os tipos numéricos reduzidos, e aberto com memory
+    mapping: as colunas numéricas viram visões somente leitura das páginas do
+    arquivo, compartilhadas via page cache entre os workers do mesmo host.
+
+    Args:
+        storage: Instância de storage (usa Storage padrão se None).
+        version (str, optional): Versão desejada. Se None, usa `latest.pkl`.
+        serving_dir (str): Diretório base dos bundles no storage.
+        cache_dir (str, optional): Diretório local do cache (None desativa).
+        cache_format (str): Formato do cache gravado: "parquet" ou "arrow".
+
+    Returns:
+        Dict[str, Any]: `news_features` (com metadados), `clients_features`,
+        `affinity` (AffinityTables) e `bundle_version`.
+    """
+    local_dir = os.path.join(cache_dir, version) if cache_dir and version else None
+    if local_dir is None or not os.path.exists(os.path.join(local_dir, MANIFEST_FILE)):
+        if storage is None:
+            from src.storage.io import Storage as _Storage
+
+            storage = _Storage(use_s3=USE_S3)
+        if version is None:
+            version = storage.load_pickle(os.path.join(serving_dir, LATEST_FILE))["version"]
+            local_dir = os.path.join(cache_dir, version) if cache_dir else None
+
+    if local_dir is not None and os.path.exists(os.path.join(local_dir, MANIFEST_FILE)):
+        tables = _read_cache(local_dir)
+        logger.info(
+            "⚡ [Serving] Bundle %s carregado do cache (%s): %s",
+            version,
+            tables["manifest"].get("cache_format", "parquet"),
+            local_dir,
+        )
+    else:
+        bundle_dir = os.path.join(serving_dir, version)
+        logger.info("📂 [Serving] Carregando bundle %s de: %s", version, bundle_dir)
+        tables = _read_bundle_dir(bundle_dir, storage.read_parquet, storage.load_pickle)
+        if local_dir is not None:
+            _write_cache(tables, local_dir, cache_format)
+            if cache_format == "arrow":
+                # Reabre pelo cache para que este processo também use o mapeamento
+                tables = _read_cache(local_dir)
+
+    news = tables["news"]
+    if "metadata" in tables:
+        # Bundles antigos gravavam os metadados em uma tabela separada
+        news = news.merge(tables["metadata"], on="pageId", how="left")
+    affinity = AffinityTables(
+        {
+            col: tables[f"affinity_{col}"]
+            for col in AFFINITY_COLUMNS
+            if f"affinity_{col}" in tables
+        }
+    )
+    return {
+        "news_features": news,
+        "clients_features": tables["clients"],
+        "affinity": affinity,
+        "bundle_version": version,
+    }
+
+
+def load_model_bundle(
+    storage: Optional[Any] = None, run_id: Optional[str] = None, **kwargs: Any
+) -> Optional[Dict[str, Any]]:
+    """
+    Carrega o bundle da versão do modelo (`run_id`) ou, se indisponível, o
+    mais recente.
+
+    Args:
+        storage: Instância de storage (usa Storage padrão se None).
+        run_id (str, optional): run_id do modelo MLflow.
+        **kwargs: Repassados para `load_serving_bundle`.
+
+    Returns:
+        Dict[str, Any] | None: Retorno de `load_serving_bundle`, ou None se
+        nenhum bundle puder ser carregado.
+    """
+    for version in dict.fromkeys([run_id, None]):
+        try:
+            return load_serving_bundle(storage, version=version, **kwargs)
+        except Exception as exc:
+            logger.warning(
+                "⚠️ [Serving] Bundle %s indisponível: %s", version or "mais recente", exc
+            )
+    return None
+
+
+def _read_bundle_dir(bundle_dir: str, read_parquet, load_pickle) -> Dict[str, pd.DataFrame]:
+    """
+    Lê todas as tabelas listadas no manifesto de um bundle.
+    """
+    manifest = load_pickle(os.path.join(bundle_dir, MANIFEST_FILE))
+    tables = {
+        name: read_parquet(os.path.join(bundle_dir, f"{name}.parquet"))
+        for name in manifest["tables"]
+    }
+    tables["manifest"] = manifest
+    return tables
+
+
+def _read_cache(local_dir: str) -> Dict[str, Any]:
+    """
+    Lê o bundle do cache local no formato registrado no manifesto.
+    """
+    manifest = pd.read_pickle(os.path.join(local_dir, MANIFEST_FILE))
+    if manifest.get("cache_format", "parquet") != "arrow":
+        return _read_bundle_dir(local_dir, pd.read_parquet, pd.read_pickle)
+    tables = {
+        name: feather.read_table(
+            os.path.join(local_dir, f"{name}.arrow"), memory_map=True
+        ).to_pandas(split_blocks=True)
+        for name in manifest["tables"]
+    }
+    tables["manifest"] = manifest
+    return tables
+
+
+def _write_cache(tables: Dict[str, Any], local_dir: str, cache_format: str = "parquet") -> None:
+    """
+    Copia as tabelas para o cache local (manifesto por último).
+    """
+    if cache_format not in ("parquet", "arrow"):
+        raise ValueError(f"Formato de cache inválido: {cache_format}")
+    os.makedirs(local_dir, exist_ok=True)
+    manifest = {**tables["manifest"], "cache_format": cache_format}
+    for name in manifest["tables"]:
+        if cache_format == "arrow":
+            df = tables[name].copy()
+            downcast_numeric_columns({name: df})
+            feather.write_feather(
+                pa.Table.from_pandas(df, preserve_index=False),
+                os.path.join(local_dir, f"{name}.arrow"),
+                compression="uncompressed",
+            )
+        else:
+            tables[name].to_parquet(os.path.join(local_dir, f"{name}.parquet"), index=False)
+    pd.to_pickle(manifest, os.path.join(local_dir, MANIFEST_FILE))
+    logger.info("💾 [Serving] Bundle %s copiado para o cache: %s", manifest["version"], local_dir)
+
+
+def downcast_numeric_columns(data: Dict[str, pd.DataFrame]) -> None:
+    """
+    Converte colunas numéricas dos DataFrames para tipos mais compactos.
+
+    Colunas já reduzidas (ex.: lidas do cache Arrow) não são tocadas, então
+    as visões sobre o arquivo mapeado não são copiadas.
+
+    Args:
+        data (Dict[str, pd.DataFrame]): Tabelas (valores que não são
+            DataFrame são ignorados).
+    """
+    for df in data.values():
+        if not isinstance(df, pd.DataFrame):
+            continue
+        for col in df.columns:
+            if df[col].dtype == "float64":
+                # Downcasting de float64 para float32
+                df[col] = pd.to_numeric(df[col], downcast="float")
+            elif df[col].dtype == "int64":
+                # Downcasting de int64 para int32/int16
+                df[col] = pd.to_numeric(df[col], downcast="integer")
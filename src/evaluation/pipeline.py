@@ -2,11 +2,13 @@ import os
 import re
 import random
 import pandas as pd
+from pandas.api.types import is_integer_dtype
 from typing import Tuple, Dict, Any
 
 from src.config import DATA_PATH, USE_S3, configure_mlflow, logger
 from src.storage.io import Storage
 from src.data.data_loader import load_data_for_prediction
+from src.data.id_dictionary import load_id_dictionary
 from src.predict.pipeline import predict_for_userId
 from src.train.core import load_model_from_mlflow
 
@@ -88,6 +90,10 @@ def evaluate_model(
     pred_data = load_data_for_prediction(storage, include_metadata=False)
     news_features_df = pred_data["news_features"]
     clients_features_df = pred_data["clients_features"]
+    # Dados com IDs codificados: o ground truth continua com os IDs originais
+    id_dictionary = None
+    if is_integer_dtype(clients_features_df["userId"]):
+        id_dictionary = load_id_dictionary(storage)
 
     hits = 0
     total_users = 0
@@ -95,14 +101,19 @@ def evaluate_model(
 
     # Para cada usuário, gera recomendações e verifica se há acerto
     for user, true_page_ids in ground_truth.items():
+        user_key = user
+        if id_dictionary is not None:
+            user_key = id_dictionary.encode("userId", [user])[0]
         recs, is_cold_start = predict_for_userId(
-            user,
+            user_key,
             clients_features_df,
             news_features_df,
             model,
             n=n,
             score_threshold=score_threshold,
         )
+        if id_dictionary is not None:
+            recs = id_dictionary.decode_records(recs)
         rec_page_ids = {rec["pageId"] for rec in recs}
         hit = len(true_page_ids.intersection(rec_page_ids)) > 0
         if hit:
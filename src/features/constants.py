@@ -10,6 +10,14 @@ USERS_COLS_TO_EXPLODE = [
     "scrollPercentageHistory",
     "pageVisitsCountHistory",
 ]
+USERS_HISTORY_DTYPES = {
+    "history": "str",
+    "timestampHistory": "int64",
+    "numberOfClicksHistory": "int64",
+    "timeOnPageHistory": "int64",
+    "scrollPercentageHistory": "float64",
+    "pageVisitsCountHistory": "int64",
+}
 USERS_DTYPES = {
     "userId": "object",
     "userType": "category",
@@ -22,6 +30,22 @@ USERS_DTYPES = {
     "pageVisitsCountHistory": "int",
 }
 
+# Tipos fixos do pré-processamento em blocos (estáveis entre blocos)
+USERS_CHUNK_DTYPES = {
+    "historySize": "int32",
+    "numberOfClicksHistory": "int32",
+    "timeOnPageHistory": "int32",
+    "pageVisitsCountHistory": "int32",
+    "scrollPercentageHistory": "float32",
+    "minutesSinceLastVisit": "float32",
+    "timestampHistoryWeekday": "int16",
+    "timestampHistoryHour": "int16",
+}
+
+NEWS_RAW_COLUMNS = ["page", "url", "issued", "modified", "title"]
+NEWS_TEXT_COLUMNS = ["body", "caption"]
+NEWS_DATETIME_COLUMNS = ["issued", "modified"]
+
 NEWS_COLS_TO_DROP = [
     "local",
     "theme",
@@ -52,6 +76,15 @@ MIX_FEATS_COLS = [
     "isWeekend",
 ]
 
+MIX_FEATS_FILES = [
+    "mix_feats/mix_df.parquet",
+    "mix_feats/gap_feats.parquet",
+    "mix_feats/state_feats.parquet",
+    "mix_feats/region_feats.parquet",
+    "mix_feats/theme_main_feats.parquet",
+    "mix_feats/theme_sub_feats.parquet",
+]
+
 STATE_COLS = ["userId", "localState", "countLocalStateUser", "relLocalState"]
 REGION_COLS = ["userId", "localRegion", "countLocalRegionUser", "relLocalRegion"]
 THEME_MAIN_COLS = ["userId", "themeMain", "countThemeMainUser", "relThemeMain"]
@@ -0,0 +1,236 @@
+import hashlib
+import inspect
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from types import ModuleType
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.config import logger
+
+DAG_STATE_VERSION = 1
+
+
+class Stage:
+    """
+    Etapa do pipeline de features com entradas e saídas declaradas.
+
+    A chave de cache de uma etapa é o hash do código dos módulos declarados,
+    dos parâmetros de configuração, dos fingerprints das fontes brutas e das
+    chaves das etapas de entrada. Assim, uma mudança em qualquer ponto
+    invalida a etapa e tudo o que depende dela.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        run: Callable[[Dict[str, Any]], Any],
+        load: Callable[[], Any],
+        outputs: Sequence[str],
+        inputs: Sequence[str] = (),
+        sources: Sequence[str] = (),
+        params: Optional[Dict[str, Any]] = None,
+        modules: Sequence[ModuleType] = (),
+    ):
+        """
+        Args:
+            name (str): Nome único da etapa.
+            run (Callable): Executa a etapa (salvando as saídas) a partir dos
+                artefatos das entradas ({nome da etapa: valor}) e retorna o
+                próprio artefato.
+            load (Callable): Carrega o artefato já salvo, usado quando a etapa
+                é reaproveitada e alguma etapa seguinte precisa dele.
+            outputs (Sequence[str]): Caminhos gravados pela etapa.
+            inputs (Sequence[str]): Etapas das quais depende.
+            sources (Sequence[str]): Diretórios de CSVs brutos lidos pela etapa.
+            params (Dict[str, Any], optional): Configurações que afetam o resultado.
+            modules (Sequence[ModuleType]): Módulos cujo código define a etapa.
+        """
+        self.name = name
+        self.run = run
+        self.load = load
+        self.outputs = list(outputs)
+        self.inputs = list(inputs)
+        self.sources = list(sources)
+        self.params = dict(params or {})
+        self.modules = list(modules)
+
+    def key(self, input_keys: Dict[str, str], storage: Any) -> str:
+        """
+        Calcula a chave de cache da etapa.
+
+        Args:
+            input_keys (Dict[str, str]): Chaves já calculadas das entradas.
+            storage: Instância de storage (fingerprints das fontes brutas).
+
+        Returns:
+            str: Hash SHA-256 em hexadecimal.
+        """
+        digest = hashlib.sha256(f"{DAG_STATE_VERSION}:{self.name}".encode())
+        for module in self.modules:
+            digest.update(_module_digest(module).encode())
+        digest.update(repr(sorted(self.params.items())).encode())
+        for source in self.sources:
+            for path in sorted(storage.list_files(source, "*.csv")):
+                digest.update(f"{path}={storage.file_fingerprint(path)}".encode())
+        for name in self.inputs:
+            digest.update(f"{name}={input_keys[name]}".encode())
+        return digest.hexdigest()
+
+
+def run_stages(
+    stages: Sequence[Stage],
+    storage: Any,
+    state_path: str,
+    force: Optional[Iterable[str]] = None,
+    max_workers: int = 1,
+) -> Dict[str, str]:
+    """
+    Executa as etapas, pulando as que já estão atualizadas.
+
+    Uma etapa é reaproveitada quando a chave salva no estado é igual à atual
+    e todas as suas saídas existem. As demais são disparadas em threads
+    assim que todas as suas entradas terminam, até `max_workers` ao mesmo
+    tempo (com 1, a ordem é a da lista). O estado é gravado após cada etapa
+    concluída, então uma execução interrompida continua de onde parou. Os
+    artefatos de etapas reaproveitadas só são carregados se alguma etapa
+    executada precisar deles.
+
+    Args:
+        stages (Sequence[Stage]): Etapas em ordem topológica.
+        storage: Instância de storage.
+        state_path (str): Caminho do pickle com as chaves de cada etapa.
+        force (Iterable[str], optional): Etapas a executar mesmo atualizadas
+            (junto com as que dependem delas); "all" força todas.
+        max_workers (int): Etapas executadas em paralelo.
+
+    Returns:
+        Dict[str, str]: Situação de cada etapa ("executada" ou "reaproveitada").
+
+    Raises:
+        ValueError: Se uma etapa depender de outra desconhecida ou posterior,
+            ou se `force` citar uma etapa inexistente.
+    """
+    state = storage.load_pickle(state_path) if storage.exists(state_path) else {}
+    keys, status = _plan_stages(stages, state, _forced_stages(stages, set(force or ())), storage)
+    by_name = {stage.name: stage for stage in stages}
+    values = {}
+    locks = {name: threading.Lock() for name in by_name}
+
+    def artifact(name: str) -> Any:
+        with locks[name]:
+            if name not in values:
+                values[name] = by_name[name].load()
+        return values[name]
+
+    def execute(stage: Stage) -> Any:
+        start = time.time()
+        logger.info("▶️ [DAG] Executando %s...", stage.name)
+        value = stage.run({name: artifact(name) for name in stage.inputs})
+        logger.info("✅ [DAG] %s concluída em %.2fs", stage.name, time.time() - start)
+        return value
+
+    def finish(stage: Stage, value: Any) -> None:
+        with locks[stage.name]:
+            values[stage.name] = value
+        state[stage.name] = keys[stage.name]
+        storage.save_pickle(state, state_path)
+        status[stage.name] = "executada"
+
+    pending = [stage for stage in stages if stage.name not in status]
+    _schedule(pending, execute, finish, status, max(1, max_workers))
+    logger.info(
+        "📋 [DAG] %d executadas | %d reaproveitadas (%s)",
+        sum(value == "executada" for value in status.values()),
+        sum(value == "reaproveitada" for value in status.values()),
+        ", ".join(f"{name}: {status[name]}" for name in stage_names(stages)),
+    )
+    return status
+
+
+def _plan_stages(
+    stages: Sequence[Stage], state: Dict[str, str], forced: set, storage: Any
+) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    Calcula a chave de cada etapa e marca as que podem ser reaproveitadas.
+    """
+    keys, status = {}, {}
+    for stage in stages:
+        unknown = [name for name in stage.inputs if name not in keys]
+        if unknown:
+            raise ValueError(
+                f"Etapa '{stage.name}' depende de etapas ausentes ou posteriores: {unknown}"
+            )
+        keys[stage.name] = stage.key(keys, storage)
+        up_to_date = state.get(stage.name) == keys[stage.name] and all(
+            storage.exists(path) for path in stage.outputs
+        )
+        if up_to_date and stage.name not in forced:
+            status[stage.name] = "reaproveitada"
+            logger.info("♻️ [DAG] %s atualizada; reaproveitando saídas.", stage.name)
+    return keys, status
+
+
+def _schedule(
+    pending: List[Stage],
+    execute: Callable[[Stage], Any],
+    finish: Callable[[Stage, Any], None],
+    status: Dict[str, str],
+    max_workers: int,
+) -> None:
+    """
+    Dispara cada etapa pendente assim que suas entradas constam em `status`.
+
+    Após uma falha, nenhuma etapa nova é disparada; as que já estavam rodando
+    terminam (e são registradas) antes de a exceção ser relançada.
+    """
+    running, error = {}, None
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            ready = [stage for stage in pending if all(name in status for name in stage.inputs)]
+            for stage in ready[: max_workers - len(running)] if error is None else []:
+                pending.remove(stage)
+                running[pool.submit(execute, stage)] = stage
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                try:
+                    finish(stage, future.result())
+                except Exception as exc:
+                    error = error or exc
+    if error is not None:
+        raise error
+
+
+def _forced_stages(stages: Sequence[Stage], force: set) -> set:
+    """
+    Expande as etapas forçadas para incluir as que dependem delas.
+    """
+    names = set(stage_names(stages))
+    if "all" in force:
+        return names
+    unknown = force - names
+    if unknown:
+        raise ValueError(f"Etapas desconhecidas em force: {sorted(unknown)}")
+    forced = set(force)
+    for stage in stages:
+        if forced.intersection(stage.inputs):
+            forced.add(stage.name)
+    return forced
+
+
+def _module_digest(module: ModuleType) -> str:
+    """
+    Hash do código-fonte de um módulo (versão do código da etapa).
+    """
+    with open(inspect.getsourcefile(module), "rb") as source:
+        return hashlib.sha256(source.read()).hexdigest()
+
+
+def stage_names(stages: Sequence[Stage]) -> List[str]:
+    """
+    Nomes das etapas, na ordem de execução.
+    """
+    return [stage.name for stage in stages]
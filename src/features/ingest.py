@@ -0,0 +1,215 @@
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.config import (
+    CSV_READ_WORKERS,
+    DATA_PATH,
+    NEWS_DIRECTORY,
+    USERS_DIRECTORY,
+    get_config,
+    logger,
+)
+from src.features.constants import NEWS_DATETIME_COLUMNS, USERS_HISTORY_DTYPES
+from src.features.utils import get_default_storage, split_delimited_column
+
+RAW_PARQUET_DIR = os.path.join(DATA_PATH, get_config("RAW_PARQUET_DIRECTORY", "raw_parquet"))
+RAW_SOURCES = {"users": USERS_DIRECTORY, "news": NEWS_DIRECTORY}
+MANIFEST_FILE = "manifest.pkl"
+
+
+def ingest_raw_dataset(
+    storage: Optional[Any] = None,
+    raw_dir: str = RAW_PARQUET_DIR,
+    sources: Optional[Dict[str, str]] = None,
+    force: bool = False,
+) -> Dict[str, int]:
+    """
+    Converte os CSVs brutos do desafio em Parquet tipado, um arquivo por CSV.
+
+    Usuários são gravados com os históricos já separados em colunas de lista
+    tipadas (`USERS_HISTORY_DTYPES`) e notícias com `issued`/`modified` já
+    convertidos para datetime. Um CSV só é convertido novamente quando seu
+    fingerprint no storage (tamanho/data de modificação ou ETag) muda; CSVs
+    removidos saem do manifesto.
+
+    Args:
+        storage: Instância de storage (usa a compartilhada se None).
+        raw_dir (str): Diretório de destino dos Parquets e do manifesto.
+        sources (Dict[str, str], optional): Diretório dos CSVs por tipo
+            (padrão: `RAW_SOURCES`).
+        force (bool): Se True, converte todos os arquivos.
+
+    Returns:
+        Dict[str, int]: Quantidade de arquivos convertidos por tipo.
+    """
+    storage = storage or get_default_storage()
+    sources = sources or RAW_SOURCES
+    manifest = {} if force else load_raw_manifest(storage, raw_dir) or {}
+    converted = {}
+    for kind, source_dir in sources.items():
+        previous = manifest.get(kind, {})
+        current = {}
+        converted[kind] = 0
+        for csv_path in sorted(storage.list_files(source_dir, "*.csv")):
+            name = os.path.basename(csv_path)
+            fingerprint = storage.file_fingerprint(csv_path)
+            entry = previous.get(name)
+            if entry is None or entry["fingerprint"] != fingerprint:
+                entry = _convert_file(kind, csv_path, fingerprint, raw_dir, storage)
+                converted[kind] += 1
+            current[name] = entry
+        manifest[kind] = current
+        logger.info(
+            "🧱 [Ingest] %s: %d arquivos | %d convertidos | %d reaproveitados",
+            kind,
+            len(current),
+            converted[kind],
+            len(current) - converted[kind],
+        )
+    storage.save_pickle(manifest, os.path.join(raw_dir, MANIFEST_FILE))
+    return converted
+
+
+def load_raw_manifest(
+    storage: Optional[Any] = None, raw_dir: str = RAW_PARQUET_DIR
+) -> Optional[Dict[str, Dict[str, Any]]]:
+    """
+    Carrega o manifesto da ingestão, se existir.
+
+    Args:
+        storage: Instância de storage (usa a compartilhada se None).
+        raw_dir (str): Diretório dos Parquets brutos.
+
+    Returns:
+        Dict, optional: Arquivos por tipo (`fingerprint`, `partition`, `rows`)
+        ou None se a ingestão ainda não foi executada.
+    """
+    storage = storage or get_default_storage()
+    path = os.path.join(raw_dir, MANIFEST_FILE)
+    return storage.load_pickle(path) if storage.exists(path) else None
+
+
+def raw_partitions(
+    kind: str, storage: Optional[Any] = None, raw_dir: str = RAW_PARQUET_DIR
+) -> Optional[List[str]]:
+    """
+    Caminhos dos Parquets de um tipo, na ordem dos CSVs de origem.
+
+    Args:
+        kind (str): `users` ou `news`.
+        storage: Instância de storage (usa a compartilhada se None).
+        raw_dir (str): Diretório dos Parquets brutos.
+
+    Returns:
+        List[str], optional: Caminhos ou None se `kind` ainda não foi ingerido.
+    """
+    manifest = load_raw_manifest(storage, raw_dir)
+    if not manifest or not manifest.get(kind):
+        return None
+    files = manifest[kind]
+    return [os.path.join(raw_dir, files[name]["partition"]) for name in sorted(files)]
+
+
+def read_raw_parquet(
+    kind: str,
+    storage: Optional[Any] = None,
+    raw_dir: str = RAW_PARQUET_DIR,
+    columns: Optional[Sequence[str]] = None,
+    filters: Optional[List[Tuple[str, str, Any]]] = None,
+    max_workers: Optional[int] = None,
+) -> Optional[pd.DataFrame]:
+    """
+    Lê os Parquets gerados por `ingest_raw_dataset`, na ordem dos CSVs de origem.
+
+    Args:
+        kind (str): `users` ou `news`.
+        storage: Instância de storage (usa a compartilhada se None).
+        raw_dir (str): Diretório dos Parquets brutos.
+        columns (Sequence[str], optional): Colunas a ler (None lê todas).
+        filters (List[Tuple], optional): Predicados aplicados na leitura
+            (ex.: [("page", "in", ids)]).
+        max_workers (int, optional): Threads de leitura (padrão: `CSV_READ_WORKERS`).
+
+    Returns:
+        pd.DataFrame, optional: Dados concatenados ou None se `kind` ainda não
+        foi ingerido.
+    """
+    storage = storage or get_default_storage()
+    partitions = raw_partitions(kind, storage, raw_dir)
+    if not partitions:
+        return None
+    start = time.time()
+
+    def read_partition(partition: str) -> pd.DataFrame:
+        return storage.read_parquet_projected(partition, columns=columns, filters=filters)
+
+    workers = max(1, min(max_workers or CSV_READ_WORKERS, len(partitions)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        frames = list(pool.map(read_partition, partitions))
+    df = pd.concat(frames, ignore_index=True)
+    logger.info(
+        "📂 [Ingest] %s lidos do Parquet: %d arquivos | %d linhas em %.2fs",
+        kind,
+        len(partitions),
+        len(df),
+        time.time() - start,
+    )
+    return df
+
+
+def split_history_columns(users_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converte as colunas de histórico (texto separado por vírgulas) em listas
+    tipadas, sem explodir as linhas.
+
+    Args:
+        users_df (pd.DataFrame): Usuários brutos.
+
+    Returns:
+        pd.DataFrame: Cópia com as colunas de `USERS_HISTORY_DTYPES` como
+        arrays NumPy por linha.
+    """
+    users_df = users_df.copy()
+    for col, dtype in USERS_HISTORY_DTYPES.items():
+        values, lengths = split_delimited_column(users_df[col], dtype)
+        users_df[col] = np.split(values, np.cumsum(lengths)[:-1])
+    return users_df
+
+
+def _convert_file(
+    kind: str, csv_path: str, fingerprint: str, raw_dir: str, storage: Any
+) -> Dict[str, Any]:
+    """
+    Converte um CSV bruto em Parquet e retorna sua entrada no manifesto.
+    """
+    start = time.time()
+    df = storage.read_csv(csv_path)
+    if kind == "users":
+        df = split_history_columns(df)
+    else:
+        for col in NEWS_DATETIME_COLUMNS:
+            df[col] = pd.to_datetime(df[col])
+    partition = os.path.join(kind, os.path.splitext(os.path.basename(csv_path))[0] + ".parquet")
+    storage.write_parquet(df, os.path.join(raw_dir, partition), index=False)
+    logger.info(
+        "🧱 [Ingest] Convertido: %s | Linhas: %d | %.2fs",
+        os.path.basename(csv_path),
+        len(df),
+        time.time() - start,
+    )
+    return {"fingerprint": fingerprint, "partition": partition, "rows": len(df)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Converte os CSVs brutos do desafio em Parquet.")
+    parser.add_argument(
+        "--force", action="store_true", help="Converte todos os arquivos, mesmo sem mudanças."
+    )
+    args = parser.parse_args()
+    ingest_raw_dataset(force=args.force)
@@ -0,0 +1,348 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.config import logger, use_sync_logging
+from src.features.constants import MIX_FEATS_FILES
+from src.features.pp_mix import generate_suggested_feats, preprocess_mix_feats
+from src.features.pp_target import (
+    compute_log_scores,
+    merge_score_ranges,
+    scale_target,
+    score_range,
+)
+from src.features.utils import ParquetChunkWriter, ParquetTable
+from src.storage.io import Storage
+
+SUGGESTED_FILE = "suggested_feats.parquet"
+TARGET_FILE = "target.parquet"
+FINAL_FILE = "final_feats_with_target.parquet"
+PARTITIONED_FILES = MIX_FEATS_FILES + [SUGGESTED_FILE, TARGET_FILE, FINAL_FILE]
+# Usuários de cada partição, gravados antes de disparar os processos (removido ao final)
+USERS_PARTITIONS_DIR = "_users_partitions"
+USERS_BATCH_ROWS = 500_000
+
+
+def user_buckets(user_ids: pd.Series, partitions: int) -> np.ndarray:
+    """
+    Partição de cada linha pelo hash do `userId` (estável entre execuções).
+
+    Args:
+        user_ids (pd.Series): Ids dos usuários.
+        partitions (int): Quantidade de partições.
+
+    Returns:
+        np.ndarray: Partição (0 a `partitions - 1`) de cada linha.
+    """
+    hashes = pd.util.hash_pandas_object(user_ids.astype(str), index=False).to_numpy()
+    return (hashes % np.uint64(partitions)).astype(np.int64)
+
+
+def split_by_user(df: pd.DataFrame, partitions: int) -> List[pd.DataFrame]:
+    """
+    Separa as linhas em `partitions` blocos por hash do `userId`, mantendo
+    todas as linhas de um usuário no mesmo bloco e a ordem original em cada um.
+
+    Args:
+        df (pd.DataFrame): Dados com a coluna `userId`.
+        partitions (int): Quantidade de partições.
+
+    Returns:
+        List[pd.DataFrame]: Um DataFrame por partição (com índice reiniciado).
+    """
+    buckets = user_buckets(df["userId"], partitions)
+    order = np.argsort(buckets, kind="stable")
+    bounds = np.cumsum(np.bincount(buckets, minlength=partitions))[:-1]
+    return [df.take(rows).reset_index(drop=True) for rows in np.split(order, bounds)]
+
+
+def bucket_path(dataset_path: str, bucket: int) -> str:
+    """
+    Caminho do arquivo de uma partição dentro do dataset.
+
+    Args:
+        dataset_path (str): Diretório do dataset (ex.: `.../target.parquet`).
+        bucket (int): Partição.
+
+    Returns:
+        str: Caminho `bucket-NNN.parquet` dentro do dataset.
+    """
+    return os.path.join(dataset_path, f"bucket-{bucket:03d}.parquet")
+
+
+def partitioned_outputs(features_dir: str, partitions: int) -> List[str]:
+    """
+    Arquivos gravados por `run_user_partitions`.
+
+    Args:
+        features_dir (str): Diretório de features.
+        partitions (int): Quantidade de partições.
+
+    Returns:
+        List[str]: Um arquivo por dataset e partição.
+    """
+    return [
+        bucket_path(os.path.join(features_dir, rel_file), bucket)
+        for rel_file in PARTITIONED_FILES
+        for bucket in range(partitions)
+    ]
+
+
+def run_user_partitions(
+    users: ParquetTable,
+    news_df: pd.DataFrame,
+    features_dir: str,
+    partitions: int,
+    max_workers: int,
+    use_s3: Optional[bool] = None,
+    batch_size: int = USERS_BATCH_ROWS,
+) -> Dict[str, int]:
+    """
+    Executa mix, suggested, target e final por partição de usuários, em
+    processos separados.
+
+    Os usuários são lidos de `users` em blocos de `batch_size` linhas e cada
+    bloco é distribuído entre arquivos temporários por partição, de modo que
+    nem o processo principal nem os workers carregam a tabela inteira: cada
+    worker lê apenas a sua partição. Os workers são criados com `spawn` (e
+    não `fork`, que copiaria locks e a fila de logs do processo principal) e
+    escrevem os logs de forma síncrona.
+
+    Cada partição grava um arquivo em cada dataset (`mix_feats/*.parquet`,
+    `suggested_feats.parquet`, `target.parquet` e
+    `final_feats_with_target.parquet` viram diretórios com `bucket-NNN.parquet`,
+    lidos normalmente com `read_parquet`). A única etapa global, a escala
+    min/max do target, usa os (mínimo, máximo) parciais de cada partição,
+    combinados antes de uma segunda passada que escala o target e monta o
+    conjunto final.
+
+    Args:
+        users (ParquetTable): Usuários pré-processados (`users_feats.parquet`).
+        news_df (pd.DataFrame): Notícias pré-processadas.
+        features_dir (str): Diretório de features.
+        partitions (int): Quantidade de partições.
+        max_workers (int): Processos simultâneos.
+        use_s3 (bool, optional): Backend do storage usado nos processos.
+        batch_size (int): Linhas de usuários lidas por bloco.
+
+    Returns:
+        Dict[str, int]: Linhas gravadas por dataset.
+    """
+    start = time.time()
+    storage = Storage(use_s3=use_s3)
+    for rel_file in PARTITIONED_FILES:
+        # Descarta saídas anteriores (arquivo único ou outra quantidade de partições)
+        storage.remove(os.path.join(features_dir, rel_file))
+    users_dir = os.path.join(features_dir, USERS_PARTITIONS_DIR)
+    rows_per_part, pages_per_part = write_user_partitions(
+        users, users_dir, partitions, storage, batch_size
+    )
+    logger.info(
+        "🧩 [Partitions] %d partições | %d processos | linhas de usuários por partição: %s",
+        partitions,
+        max_workers,
+        rows_per_part,
+    )
+    try:
+        first, second = _run_partition_pool(
+            users_dir, news_df, pages_per_part, features_dir, max_workers, use_s3
+        )
+    finally:
+        storage.remove(users_dir)
+    rows = {
+        rel_file: sum(result[rel_file] for result in first + second if rel_file in result)
+        for rel_file in PARTITIONED_FILES
+    }
+    logger.info(
+        "🧩 [Partitions] Concluído em %.2fs | final: %d linhas",
+        time.time() - start,
+        rows[FINAL_FILE],
+    )
+    return rows
+
+
+def write_user_partitions(
+    users: ParquetTable,
+    output_dir: str,
+    partitions: int,
+    storage: Storage,
+    batch_size: int = USERS_BATCH_ROWS,
+) -> Tuple[List[int], List[np.ndarray]]:
+    """
+    Distribui os usuários em `output_dir/bucket-NNN.parquet` por hash do
+    `userId`, lendo a tabela em blocos (ver `split_by_user`). Partições sem
+    usuários recebem um arquivo vazio com o mesmo schema.
+
+    Args:
+        users (ParquetTable): Usuários pré-processados.
+        output_dir (str): Diretório dos arquivos por partição.
+        partitions (int): Quantidade de partições.
+        storage (Storage): Instância de storage.
+        batch_size (int): Linhas lidas por bloco.
+
+    Returns:
+        Tuple[List[int], List[np.ndarray]]: Linhas e pageIds distintos de
+        cada partição.
+    """
+    writers = [ParquetChunkWriter(bucket_path(output_dir, b), storage) for b in range(partitions)]
+    try:
+        pages = _split_batches(users, writers, batch_size)
+    except BaseException:
+        for writer in writers:
+            writer.discard()
+        raise
+    for writer in writers:
+        writer.close()
+    return [writer.rows for writer in writers], pages
+
+
+def _split_batches(
+    users: ParquetTable, writers: List[ParquetChunkWriter], batch_size: int
+) -> List[np.ndarray]:
+    """
+    Grava cada bloco de usuários nos writers das partições e devolve os
+    pageIds distintos de cada uma.
+    """
+    pages: List[List[np.ndarray]] = [[] for _ in writers]
+    empty = None
+    for batch in users.iter_batches(batch_size):
+        empty = batch.iloc[:0] if empty is None else empty
+        for writer, part_pages, part in zip(writers, pages, split_by_user(batch, len(writers))):
+            if len(part):
+                writer.write(part)
+                part_pages.append(pd.unique(part["pageId"].to_numpy()))
+    if empty is None:
+        empty = users.read().iloc[:0]
+    for writer in writers:
+        if writer.rows == 0:
+            writer.write(empty)
+    return [
+        pd.unique(np.concatenate(part_pages)) if part_pages else np.array([])
+        for part_pages in pages
+    ]
+
+
+def _run_partition_pool(
+    users_dir: str,
+    news_df: pd.DataFrame,
+    pages_per_part: List[np.ndarray],
+    features_dir: str,
+    max_workers: int,
+    use_s3: Optional[bool],
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, int]]]:
+    """
+    Executa as duas passadas das partições em um pool de processos `spawn`.
+    """
+    partitions = len(pages_per_part)
+    with ProcessPoolExecutor(
+        max_workers=max(1, max_workers),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=use_sync_logging,
+    ) as pool:
+        futures = [
+            pool.submit(
+                _build_partition,
+                bucket,
+                users_dir,
+                news_df[news_df["pageId"].isin(page_ids)],
+                features_dir,
+                use_s3,
+            )
+            for bucket, page_ids in enumerate(pages_per_part)
+        ]
+        first = [future.result() for future in futures]
+        min_val, max_val = merge_score_ranges(result.pop("scoreRange") for result in first)
+        second = list(
+            pool.map(
+                _finalize_partition,
+                range(partitions),
+                [features_dir] * partitions,
+                [use_s3] * partitions,
+                [min_val] * partitions,
+                [max_val] * partitions,
+            )
+        )
+    return first, second
+
+
+def _build_partition(
+    bucket: int,
+    users_dir: str,
+    news_df: pd.DataFrame,
+    features_dir: str,
+    use_s3: Optional[bool],
+) -> Dict[str, Any]:
+    """
+    Primeira passada de uma partição: mix, suggested e scores sem escala.
+    """
+    storage = Storage(use_s3=use_s3)
+    users_df = storage.read_parquet(bucket_path(users_dir, bucket))
+    frames = preprocess_mix_feats(news_df, users_df)
+    mix_df, gap_df, state_df, region_df, tm_df, ts_df = frames
+    suggested = generate_suggested_feats(mix_df, state_df, region_df, tm_df, ts_df)
+    scores = compute_log_scores(users_df, gap_df)
+    outputs = dict(zip(MIX_FEATS_FILES, frames))
+    outputs[SUGGESTED_FILE] = suggested
+    # Scores sem escala; a segunda passada sobrescreve com o TARGET final
+    outputs[TARGET_FILE] = scores
+    for rel_file, df in outputs.items():
+        _write_bucket(df, bucket_path(os.path.join(features_dir, rel_file), bucket), storage)
+    rows = {rel_file: len(df) for rel_file, df in outputs.items() if rel_file != TARGET_FILE}
+    rows["scoreRange"] = score_range(scores)
+    return rows
+
+
+def _finalize_partition(
+    bucket: int,
+    features_dir: str,
+    use_s3: Optional[bool],
+    min_val: float,
+    max_val: float,
+) -> Dict[str, int]:
+    """
+    Segunda passada de uma partição: escala o target com o min/max global e
+    monta o conjunto final.
+    """
+    storage = Storage(use_s3=use_s3)
+    target_path = bucket_path(os.path.join(features_dir, TARGET_FILE), bucket)
+    target_df = scale_target(storage.read_parquet(target_path), min_val, max_val)
+    _write_bucket(target_df, target_path, storage)
+    suggested = storage.read_parquet(
+        bucket_path(os.path.join(features_dir, SUGGESTED_FILE), bucket)
+    )
+    final_feats = suggested.merge(target_df, on=["userId", "pageId"])
+    _write_bucket(
+        final_feats, bucket_path(os.path.join(features_dir, FINAL_FILE), bucket), storage
+    )
+    return {TARGET_FILE: len(target_df), FINAL_FILE: len(final_feats)}
+
+
+def _write_bucket(df: pd.DataFrame, path: str, storage: Storage) -> None:
+    """
+    Grava uma partição com tipos que não dependem dos dados da partição.
+
+    Colunas de texto só com nulos (tipo `null` no Arrow) viram `string` e
+    categorias de texto usam sempre índices int32, para que as partições de
+    um dataset tenham o mesmo schema e possam ser lidas juntas.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    fields = []
+    for field in table.schema:
+        kind = field.type
+        if pa.types.is_null(kind):
+            field = field.with_type(pa.string())
+        elif pa.types.is_dictionary(kind) and (
+            pa.types.is_string(kind.value_type) or pa.types.is_null(kind.value_type)
+        ):
+            field = field.with_type(pa.dictionary(pa.int32(), pa.string()))
+        fields.append(field)
+    table = table.cast(pa.schema(fields, metadata=table.schema.metadata))
+    with storage.open_write(path) as sink:
+        pq.write_table(table, sink)
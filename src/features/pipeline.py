@@ -1,27 +1,90 @@
+import argparse
 import os
-from src.config import logger, USE_S3, DATA_PATH
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from types import ModuleType
+from typing import Iterable, List, Optional
+
+from src.config import (
+    logger,
+    USE_S3,
+    DATA_PATH,
+    NEWS_DIRECTORY,
+    USERS_DIRECTORY,
+    SAMPLE_RATE,
+    COLD_START_THRESHOLD,
+    SCALING_RANGE,
+    NEWS_TEXT_FEATURES,
+    COVISIT_WINDOW_HOURS,
+    COVISIT_TOP_N,
+    COVISIT_CHUNK_SIZE,
+    COVISIT_HALF_LIFE_DAYS,
+    ENCODE_IDS,
+    FEATURE_MAX_WORKERS,
+    FEATURE_PARTITIONS,
+    RAW_PARQUET_INGESTION,
+    USERS_CHUNKED,
+)
+from src.data import history_index, id_dictionary
+from src.data.history_index import UserHistoryIndex, build_history_index
+from src.data.id_dictionary import IdDictionary, load_id_dictionary
+from src.features import (
+    constants,
+    ingest,
+    partitioned,
+    pp_covisit,
+    pp_mix,
+    pp_news,
+    pp_target,
+    pp_users,
+    utils,
+)
+from src.features.constants import MIX_FEATS_FILES
+from src.features.dag import Stage, run_stages, stage_names
+from src.features.ingest import ingest_raw_dataset
+from src.features.partitioned import partitioned_outputs, run_user_partitions
+from src.features.pp_covisit import CoVisitationMatrix, compute_covisitation
 from src.features.pp_mix import preprocess_mix_feats, generate_suggested_feats
 from src.features.pp_news import preprocess_news
 from src.features.pp_target import preprocess_target
-from src.features.pp_users import preprocess_users
+from src.features.pp_users import iter_preprocessed_users, preprocess_users
+from src.features.utils import ParquetChunkWriter, ParquetTable
 from src.storage.io import Storage
 
+PIPELINE_STATE_PATH = os.path.join(DATA_PATH, "features", "pipeline_state.pkl")
+# Colunas de users_feats lidas pela co-visitação
+COVISIT_COLUMNS = ["userId", "pageId", "timestampHistoryDate", "timestampHistoryTime"]
+
 
 def _save_df_parquet(df, file_path: str, storage: Storage) -> None:
     """
     Salva um DataFrame como Parquet e loga um resumo do salvamento.
     """
+    # Descarta um dataset particionado de execuções com FEATURE_PARTITIONS > 1
+    storage.remove(file_path)
     storage.write_parquet(df, file_path)
     rel_path = os.path.relpath(file_path)
     logger.info("💾 Arquivo salvo: %s | Linhas: %d", rel_path, len(df))
 
 
-def _preprocess_and_save_news(data_path: str, selected_pageIds: list, storage: Storage):
+def _load_id_dictionary(storage: Storage):
+    """
+    Carrega o dicionário de IDs existente (ou cria um vazio) se `ENCODE_IDS`
+    estiver ativo.
+    """
+    if not ENCODE_IDS:
+        return None
+    return load_id_dictionary(storage) or IdDictionary()
+
+
+def _preprocess_and_save_news(data_path: str, selected_pageIds: list, storage: Storage, ids=None):
     """
     Pré-processa notícias e salva o resultado.
     """
     logger.info("📰 [News] Iniciando pré-processamento das notícias...")
     news_df = preprocess_news(selected_pageIds)
+    if ids is not None:
+        news_df = ids.encode_frame(news_df, extend=True)
     news_path = os.path.join(data_path, "features", "news_feats.parquet")
     _save_df_parquet(news_df, news_path, storage)
     logger.info(
@@ -32,13 +95,26 @@ def _preprocess_and_save_news(data_path: str, selected_pageIds: list, storage: S
     return news_df
 
 
-def _preprocess_and_save_users(data_path: str, storage: Storage):
+def _preprocess_and_save_users(data_path: str, storage: Storage, ids=None) -> ParquetTable:
     """
-    Pré-processa usuários e salva os dados.
+    Pré-processa usuários e salva os dados (com IDs codificados, se `ids`
+    for informado).
+
+    Returns:
+        ParquetTable: Referência ao Parquet salvo; as etapas seguintes leem
+        apenas as colunas ou blocos de que precisam.
     """
     logger.info("👥 [Users] Iniciando pré-processamento dos usuários...")
-    users_df = preprocess_users()
     users_path = os.path.join(data_path, "features", "users_feats.parquet")
+    if USERS_CHUNKED:
+        rows = _preprocess_and_save_users_chunked(users_path, storage, ids)
+        logger.info("👥 [Users] Concluído: %d linhas", rows)
+        return ParquetTable(users_path, storage)
+
+    users_df = preprocess_users()
+    if ids is not None:
+        users_df = ids.encode_frame(users_df, extend=True)
+        logger.info("🔢 [Users] userId/pageId convertidos para códigos int32.")
     _save_df_parquet(users_df, users_path, storage)
     logger.info(
         "👥 [Users] Concluído: %d linhas, %d páginas, %d usuários",
@@ -46,7 +122,48 @@ def _preprocess_and_save_users(data_path: str, storage: Storage):
         users_df["pageId"].nunique(),
         users_df["userId"].nunique(),
     )
-    return users_df
+    return ParquetTable(users_path, storage)
+
+
+def _preprocess_and_save_users_chunked(users_path: str, storage: Storage, ids=None) -> int:
+    """
+    Pré-processa usuários em blocos, gravando cada bloco (já codificado) no
+    Parquet de saída assim que fica pronto.
+
+    Returns:
+        int: Linhas gravadas.
+    """
+    with ParquetChunkWriter(users_path, storage) as writer:
+        for users_chunk in iter_preprocessed_users():
+            if ids is not None:
+                users_chunk = ids.encode_frame(users_chunk, extend=True)
+            writer.write(users_chunk)
+    if writer.rows == 0:
+        raise ValueError(
+            "Nenhum usuário pré-processado; verifique os dados brutos e SAMPLE_RATE."
+        )
+    return writer.rows
+
+
+def _preprocess_and_save_covisit(data_path: str, users: ParquetTable, storage: Storage):
+    """
+    Calcula a matriz de co-visitação entre notícias e salva em formato CSR.
+    """
+    logger.info("🔗 [CoVisit] Calculando co-visitação a partir dos históricos...")
+    covisit = compute_covisitation(
+        users.read(COVISIT_COLUMNS),
+        window_hours=COVISIT_WINDOW_HOURS,
+        top_n=COVISIT_TOP_N,
+        chunk_size=COVISIT_CHUNK_SIZE,
+        half_life_days=COVISIT_HALF_LIFE_DAYS,
+    )
+    covisit.save(os.path.join(data_path, "features", "covisit"), storage)
+    logger.info(
+        "🔗 [CoVisit] Concluído: %d notícias | %d pares",
+        len(covisit),
+        covisit.matrix.nnz,
+    )
+    return covisit
 
 
 def _preprocess_and_save_mix_feats(data_path: str, news_df, users_df, storage: Storage):
@@ -57,17 +174,11 @@ def _preprocess_and_save_mix_feats(data_path: str, news_df, users_df, storage: S
     mix_df, gap_df, state_df, region_df, tm_df, ts_df = preprocess_mix_feats(news_df, users_df)
 
     logger.info("🔀 [Mix] Salvando subconjuntos de mix_feats...")
-    files = {
-        "mix_feats/mix_df.parquet": mix_df,
-        "mix_feats/gap_feats.parquet": gap_df,
-        "mix_feats/state_feats.parquet": state_df,
-        "mix_feats/region_feats.parquet": region_df,
-        "mix_feats/theme_main_feats.parquet": tm_df,
-        "mix_feats/theme_sub_feats.parquet": ts_df,
-    }
-    for rel_file, df in files.items():
-        file_path = os.path.join(data_path, "features", rel_file)
-        _save_df_parquet(df, file_path, storage)
+    frames = [mix_df, gap_df, state_df, region_df, tm_df, ts_df]
+    paths = [os.path.join(data_path, "features", rel_file) for rel_file in MIX_FEATS_FILES]
+    # Gravações independentes; o pyarrow libera o GIL durante a escrita
+    with ThreadPoolExecutor(max_workers=max(1, FEATURE_MAX_WORKERS)) as pool:
+        list(pool.map(lambda args: _save_df_parquet(*args, storage), zip(frames, paths)))
 
     logger.info("🔢 [Mix] mix_df: %d linhas", mix_df.shape[0])
     logger.info(
@@ -148,30 +259,233 @@ def _assemble_and_save_final_feats(data_path: str, suggested, target_df, storage
         final_feats["userId"].nunique() if "userId" in final_feats.columns else 0,
         final_feats["pageId"].nunique() if "pageId" in final_feats.columns else 0,
     )
+    return final_feats
 
 
-def pre_process_data() -> None:
+def build_feature_stages(
+    storage: Storage, data_path: str = DATA_PATH, partitions: int = FEATURE_PARTITIONS
+) -> List[Stage]:
+    """
+    Declara o pipeline de features como um DAG de etapas.
+
+    Cada etapa declara as etapas de entrada, os arquivos que grava, os
+    diretórios brutos que lê, as configurações e os módulos que afetam o
+    resultado (usados na chave de cache de `run_stages`); este módulo, que
+    contém as funções de execução e gravação, entra em todas. Com `partitions`
+    maior que 1, mix, suggested, target e final viram uma única etapa
+    `user_features`, executada por partição de usuários em processos
+    separados (ver `run_user_partitions`).
+
+    Args:
+        storage (Storage): Instância de storage.
+        data_path (str): Diretório base dos dados.
+        partitions (int): Partições de usuários (1 desativa o modo particionado).
+
+    Returns:
+        List[Stage]: Etapas em ordem de execução.
+    """
+    features_dir = os.path.join(data_path, "features")
+    pipeline = sys.modules[__name__]
+
+    def path(rel_file: str) -> str:
+        return os.path.join(features_dir, rel_file)
+
+    def read(rel_file: str):
+        return lambda: storage.read_parquet(path(rel_file))
+
+    def run_mix(inputs):
+        users_df = inputs["users"].read()
+        return _preprocess_and_save_mix_feats(data_path, inputs["news"], users_df, storage)
+
+    def run_suggested(inputs):
+        mix_df, _, state_df, region_df, tm_df, ts_df = inputs["mix"]
+        return _assemble_and_save_suggested_feats(
+            data_path, mix_df, state_df, region_df, tm_df, ts_df, storage
+        )
+
+    covisit_dir = path("covisit")
+    stages = [
+        Stage(
+            "users",
+            lambda inputs: _run_users_stage(data_path, storage),
+            lambda: ParquetTable(path("users_feats.parquet"), storage),
+            outputs=[path("users_feats.parquet")] + UserHistoryIndex.files(path("history_index")),
+            sources=[USERS_DIRECTORY],
+            params={
+                "SAMPLE_RATE": SAMPLE_RATE,
+                "COLD_START_THRESHOLD": COLD_START_THRESHOLD,
+                "USERS_CHUNKED": USERS_CHUNKED,
+                "ENCODE_IDS": ENCODE_IDS,
+            },
+            modules=[pipeline, pp_users, ingest, utils, constants, id_dictionary, history_index],
+        ),
+        Stage(
+            "covisit",
+            lambda inputs: _preprocess_and_save_covisit(data_path, inputs["users"], storage),
+            lambda: CoVisitationMatrix.load(covisit_dir, storage),
+            outputs=CoVisitationMatrix.files(covisit_dir),
+            inputs=["users"],
+            params={
+                "COVISIT_WINDOW_HOURS": COVISIT_WINDOW_HOURS,
+                "COVISIT_TOP_N": COVISIT_TOP_N,
+                "COVISIT_HALF_LIFE_DAYS": COVISIT_HALF_LIFE_DAYS,
+            },
+            modules=[pipeline, pp_covisit],
+        ),
+        Stage(
+            "news",
+            lambda inputs: _run_news_stage(data_path, inputs["users"], storage),
+            read("news_feats.parquet"),
+            outputs=[path("news_feats.parquet")],
+            inputs=["users"],
+            sources=[NEWS_DIRECTORY],
+            params={"NEWS_TEXT_FEATURES": NEWS_TEXT_FEATURES, "ENCODE_IDS": ENCODE_IDS},
+            modules=[pipeline, pp_news, ingest, utils, constants, id_dictionary],
+        ),
+    ]
+    if partitions > 1:
+        return stages + [_user_features_stage(storage, features_dir, partitions, pipeline)]
+    return stages + [
+        Stage(
+            "mix",
+            run_mix,
+            lambda: tuple(storage.read_parquet(path(rel_file)) for rel_file in MIX_FEATS_FILES),
+            outputs=[path(rel_file) for rel_file in MIX_FEATS_FILES],
+            inputs=["news", "users"],
+            modules=[pipeline, pp_mix, constants],
+        ),
+        Stage(
+            "suggested",
+            run_suggested,
+            read("suggested_feats.parquet"),
+            outputs=[path("suggested_feats.parquet")],
+            inputs=["mix"],
+            modules=[pipeline, pp_mix, constants],
+        ),
+        Stage(
+            "target",
+            lambda inputs: _preprocess_and_save_target(
+                data_path, inputs["users"].read(), inputs["mix"][1], storage
+            ),
+            read("target.parquet"),
+            outputs=[path("target.parquet")],
+            inputs=["users", "mix"],
+            params={"SCALING_RANGE": SCALING_RANGE},
+            modules=[pipeline, pp_target, constants],
+        ),
+        Stage(
+            "final",
+            lambda inputs: _assemble_and_save_final_feats(
+                data_path, inputs["suggested"], inputs["target"], storage
+            ),
+            read("final_feats_with_target.parquet"),
+            outputs=[path("final_feats_with_target.parquet")],
+            inputs=["suggested", "target"],
+            modules=[pipeline],
+        ),
+    ]
+
+
+def _run_users_stage(data_path: str, storage: Storage) -> ParquetTable:
+    """
+    Etapa `users`: pré-processa os usuários e salva o dicionário de IDs.
+    """
+    ids = _load_id_dictionary(storage)
+    users = _preprocess_and_save_users(data_path, storage, ids)
+    if ids is not None:
+        ids.save(storage)
+    _save_history_index(data_path, storage)
+    return users
+
+
+def _save_history_index(data_path: str, storage: Storage) -> None:
+    """
+    Salva o índice de notícias lidas por usuário, aberto com memory map pela
+    API e pela predição em lote.
+    """
+    users_path = os.path.join(data_path, "features", "users_feats.parquet")
+    pairs = storage.read_parquet(users_path, columns=["userId", "pageId"])
+    build_history_index(pairs).save(os.path.join(data_path, "features", "history_index"), storage)
+
+
+def _run_news_stage(data_path: str, users: ParquetTable, storage: Storage):
+    """
+    Etapa `news`: pré-processa as notícias consumidas pelos usuários.
+    """
+    ids = _load_id_dictionary(storage)
+    selected_pageIds = list(users.unique("pageId"))
+    if ids is not None:
+        # O filtro das notícias brutas usa os pageIds originais
+        selected_pageIds = list(ids.decode("pageId", selected_pageIds))
+    news_df = _preprocess_and_save_news(data_path, selected_pageIds, storage, ids)
+    if ids is not None:
+        ids.save(storage)
+    return news_df
+
+
+def _user_features_stage(
+    storage: Storage, features_dir: str, partitions: int, pipeline: ModuleType
+) -> Stage:
+    """
+    Etapa única que substitui mix, suggested, target e final no modo particionado.
+    """
+    return Stage(
+        "user_features",
+        lambda inputs: run_user_partitions(
+            inputs["users"],
+            inputs["news"],
+            features_dir,
+            partitions,
+            FEATURE_MAX_WORKERS,
+            storage.use_s3,
+        ),
+        lambda: None,
+        outputs=partitioned_outputs(features_dir, partitions),
+        inputs=["news", "users"],
+        params={"SCALING_RANGE": SCALING_RANGE, "FEATURE_PARTITIONS": partitions},
+        modules=[pipeline, partitioned, pp_mix, pp_target, constants],
+    )
+
+
+def pre_process_data(force: Optional[Iterable[str]] = None) -> None:
     """
     Executa o pipeline de feature engineering.
+
+    Etapas cujas entradas, código e configurações não mudaram desde a última
+    execução são puladas (ver `build_feature_stages`); etapas independentes
+    (ex.: `covisit` e `news`, `suggested` e `target`) rodam em paralelo, até
+    `FEATURE_MAX_WORKERS` ao mesmo tempo.
+
+    Args:
+        force (Iterable[str], optional): Etapas a recalcular mesmo atualizadas
+            (e as que dependem delas); "all" recalcula tudo.
     """
     logger.info("=== 🚀 Iniciando Pipeline de Feature Engineering ===")
     logger.info("📂 Diretório base: %s", DATA_PATH)
     storage = Storage(use_s3=USE_S3)
+    if RAW_PARQUET_INGESTION:
+        # Só converte os CSVs novos ou alterados desde a última execução
+        ingest_raw_dataset(storage)
 
-    users_df = _preprocess_and_save_users(DATA_PATH, storage)
-    selected_pageIds = list(users_df["pageId"].unique())
-    news_df = _preprocess_and_save_news(DATA_PATH, selected_pageIds, storage)
-    mix_df, gap_df, state_df, region_df, tm_df, ts_df = _preprocess_and_save_mix_feats(
-        DATA_PATH, news_df, users_df, storage
-    )
-    suggested = _assemble_and_save_suggested_feats(
-        DATA_PATH, mix_df, state_df, region_df, tm_df, ts_df, storage
+    run_stages(
+        build_feature_stages(storage),
+        storage,
+        PIPELINE_STATE_PATH,
+        force=force,
+        max_workers=FEATURE_MAX_WORKERS,
     )
-    target_df = _preprocess_and_save_target(DATA_PATH, users_df, gap_df, storage)
-    _assemble_and_save_final_feats(DATA_PATH, suggested, target_df, storage)
 
     logger.info("=== ✅ Pipeline de Feature Engineering Finalizado com Sucesso! ===")
 
 
 if __name__ == "__main__":
-    pre_process_data()
+    parser = argparse.ArgumentParser(description="Pipeline de feature engineering.")
+    parser.add_argument(
+        "--force",
+        nargs="+",
+        metavar="ETAPA",
+        choices=stage_names(build_feature_stages(None)) + ["all"],
+        help="Etapas a recalcular mesmo sem mudanças (e as que dependem delas).",
+    )
+    args = parser.parse_args()
+    pre_process_data(force=args.force)
@@ -0,0 +1,253 @@
+import os
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from src.config import logger
+
+CSR_ARRAYS = ("indptr", "indices", "data")
+PAGE_IDS_FILE = "page_ids.parquet"
+
+
+class CoVisitationMatrix:
+    """
+    Matriz esparsa pageId x pageId com os top-N vizinhos de cada notícia.
+
+    A linha `i` guarda os vizinhos da notícia `page_ids[i]` (colunas) e os
+    respectivos pesos de co-visitação, em formato CSR.
+    """
+
+    def __init__(self, page_ids: np.ndarray, matrix: sparse.csr_matrix):
+        self.page_ids = np.asarray(page_ids, dtype=object)
+        self.matrix = matrix
+        self._page_index = pd.Index(self.page_ids)
+
+    def __len__(self) -> int:
+        return len(self.page_ids)
+
+    def neighbors(self, page_id: str, k: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        Retorna os vizinhos de uma notícia ordenados por peso decrescente.
+
+        Args:
+            page_id (str): Notícia de referência.
+            k (int, optional): Quantidade máxima de vizinhos.
+
+        Returns:
+            List[Tuple[str, float]]: Pares (pageId, peso). Vazio se a notícia não existir.
+        """
+        pos = self._page_index.get_indexer([page_id])[0]
+        if pos < 0:
+            return []
+        start, end = self.matrix.indptr[pos], self.matrix.indptr[pos + 1]
+        cols = self.matrix.indices[start:end]
+        weights = self.matrix.data[start:end]
+        order = np.argsort(-weights, kind="stable")
+        if k is not None:
+            order = order[:k]
+        return [(self.page_ids[c], float(w)) for c, w in zip(cols[order], weights[order])]
+
+    def save(self, directory: str, storage: Any) -> None:
+        """
+        Salva a matriz em formato CSR colunar: `indptr.npy`, `indices.npy` e
+        `data.npy`, mais o vocabulário em `page_ids.parquet`.
+
+        Args:
+            directory (str): Diretório de destino.
+            storage: Instância de storage.
+        """
+        for name in CSR_ARRAYS:
+            storage.save_numpy(getattr(self.matrix, name), os.path.join(directory, f"{name}.npy"))
+        storage.write_parquet(
+            pd.DataFrame({"pageId": self.page_ids}),
+            os.path.join(directory, PAGE_IDS_FILE),
+            index=False,
+        )
+
+    @classmethod
+    def load(
+        cls, directory: str, storage: Any, mmap_mode: Optional[str] = "r"
+    ) -> "CoVisitationMatrix":
+        """
+        Carrega uma matriz salva por `save`. No storage local, os arrays CSR
+        são abertos com memory map (visões somente leitura do arquivo).
+
+        Args:
+            directory (str): Diretório da matriz.
+            storage: Instância de storage.
+            mmap_mode (str, optional): Modo de memory map dos `.npy` (None lê tudo).
+
+        Returns:
+            CoVisitationMatrix: Matriz carregada.
+        """
+        indptr, indices, data = (
+            storage.load_numpy(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in CSR_ARRAYS
+        )
+        page_ids = storage.read_parquet(os.path.join(directory, PAGE_IDS_FILE))["pageId"]
+        n_pages = len(page_ids)
+        matrix = sparse.csr_matrix((data, indices, indptr), shape=(n_pages, n_pages))
+        return cls(page_ids.to_numpy(), matrix)
+
+    @staticmethod
+    def files(directory: str) -> List[str]:
+        """
+        Arquivos gravados por `save` em `directory`.
+        """
+        return [os.path.join(directory, f"{name}.npy") for name in CSR_ARRAYS] + [
+            os.path.join(directory, PAGE_IDS_FILE)
+        ]
+
+
+def compute_covisitation(
+    users_df: pd.DataFrame,
+    window_hours: float = 24,
+    top_n: int = 50,
+    chunk_size: int = 2048,
+    half_life_days: Optional[float] = 7,
+) -> CoVisitationMatrix:
+    """
+    Calcula a matriz de co-visitação entre notícias a partir dos históricos.
+
+    Duas notícias co-ocorrem quando o mesmo usuário as visita dentro da mesma
+    janela de `window_hours`. Cada janela recebe um peso de recência
+    (meia-vida de `half_life_days`, relativa ao evento mais recente). O produto
+    esparso é feito em blocos de `chunk_size` notícias, mantendo apenas os
+    `top_n` vizinhos de cada uma, o que limita a memória ao tamanho do bloco.
+
+    Args:
+        users_df (pd.DataFrame): Histórico explodido com `userId`, `pageId`,
+            `timestampHistoryDate` e `timestampHistoryTime`.
+        window_hours (float): Largura da janela de co-visitação.
+        top_n (int): Vizinhos mantidos por notícia.
+        chunk_size (int): Notícias processadas por bloco.
+        half_life_days (float, optional): Meia-vida do decaimento. None desativa.
+
+    Returns:
+        CoVisitationMatrix: Vizinhos de cada notícia em formato CSR.
+    """
+    logger.info("🔗 [CoVisit] Iniciando cálculo da matriz de co-visitação...")
+    event_time = _build_event_time(users_df)
+    valid = event_time.notna().to_numpy() & users_df["pageId"].notna().to_numpy()
+    page_codes, page_ids = pd.factorize(users_df["pageId"].to_numpy()[valid])
+    user_codes, _ = pd.factorize(users_df["userId"].to_numpy()[valid])
+    event_ns = event_time.to_numpy()[valid].astype("datetime64[ns]").astype(np.int64)
+
+    window_ns = int(window_hours * 3600 * 1e9)
+    buckets = event_ns // window_ns
+    if len(buckets):
+        buckets = buckets - buckets.min()
+    session_key = user_codes.astype(np.int64) * (int(buckets.max(initial=0)) + 1) + buckets
+    session_codes, session_keys = pd.factorize(session_key)
+    n_sessions, n_pages = len(session_keys), len(page_ids)
+    logger.info(
+        "🔗 [CoVisit] %d eventos | %d sessões | %d notícias", len(page_codes), n_sessions, n_pages
+    )
+
+    weights = _session_weights(session_codes, event_ns, n_sessions, half_life_days)
+    sessions = sparse.csr_matrix(
+        (np.ones(len(page_codes), dtype=np.float32), (session_codes, page_codes)),
+        shape=(n_sessions, n_pages),
+    )
+    # Visitas repetidas à mesma notícia na mesma sessão contam uma única vez
+    sessions.data[:] = 1.0
+    weighted = sparse.diags(weights).dot(sessions).tocsr()
+    pages_by_session = sessions.T.tocsr()
+
+    rows, cols, data = [], [], []
+    for start in range(0, n_pages, chunk_size):
+        end = min(start + chunk_size, n_pages)
+        block = pages_by_session[start:end].dot(weighted).tocoo()
+        block_rows, block_cols, block_data = _top_n_per_row(
+            block.row + start, block.col, block.data, top_n
+        )
+        rows.append(block_rows)
+        cols.append(block_cols)
+        data.append(block_data)
+        logger.debug("🔗 [CoVisit] Bloco %d-%d processado.", start, end)
+
+    matrix = sparse.csr_matrix(
+        (
+            np.concatenate(data).astype(np.float32) if data else np.empty(0, np.float32),
+            (
+                np.concatenate(rows) if rows else np.empty(0, np.int64),
+                np.concatenate(cols) if cols else np.empty(0, np.int64),
+            ),
+        ),
+        shape=(n_pages, n_pages),
+    )
+    matrix.indices = matrix.indices.astype(np.int32)
+    matrix.indptr = matrix.indptr.astype(np.int32)
+    logger.info("🔗 [CoVisit] Matriz calculada: %d pares mantidos.", matrix.nnz)
+    return CoVisitationMatrix(page_ids, matrix)
+
+
+def _build_event_time(users_df: pd.DataFrame) -> pd.Series:
+    """
+    Monta o instante de cada visita a partir das colunas de data e hora.
+
+    Args:
+        users_df (pd.DataFrame): Dados dos usuários.
+
+    Returns:
+        pd.Series: Datetimes das visitas (NaT quando inválidos).
+    """
+    dates = pd.to_datetime(users_df["timestampHistoryDate"], errors="coerce")
+    times = pd.to_timedelta(users_df["timestampHistoryTime"].astype(str), errors="coerce")
+    return dates + times.fillna(pd.Timedelta(0))
+
+
+def _session_weights(
+    session_codes: np.ndarray,
+    event_ns: np.ndarray,
+    n_sessions: int,
+    half_life_days: Optional[float],
+) -> np.ndarray:
+    """
+    Calcula o peso de recência de cada sessão.
+
+    Args:
+        session_codes (np.ndarray): Sessão de cada evento.
+        event_ns (np.ndarray): Instante de cada evento em nanossegundos.
+        n_sessions (int): Número de sessões.
+        half_life_days (float, optional): Meia-vida do decaimento. None desativa.
+
+    Returns:
+        np.ndarray: Peso por sessão.
+    """
+    if half_life_days is None or n_sessions == 0:
+        return np.ones(n_sessions, dtype=np.float32)
+    session_ns = np.zeros(n_sessions, dtype=np.int64)
+    np.maximum.at(session_ns, session_codes, event_ns)
+    age_days = (event_ns.max() - session_ns) / (86400 * 1e9)
+    return np.power(0.5, age_days / half_life_days).astype(np.float32)
+
+
+def _top_n_per_row(
+    rows: np.ndarray, cols: np.ndarray, data: np.ndarray, top_n: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Mantém as `top_n` maiores entradas de cada linha, ignorando a diagonal.
+
+    Args:
+        rows (np.ndarray): Linhas das entradas.
+        cols (np.ndarray): Colunas das entradas.
+        data (np.ndarray): Pesos das entradas.
+        top_n (int): Entradas mantidas por linha.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Entradas filtradas.
+    """
+    off_diagonal = rows != cols
+    rows, cols, data = rows[off_diagonal], cols[off_diagonal], data[off_diagonal]
+    order = np.lexsort((-data, rows))
+    rows, cols, data = rows[order], cols[order], data[order]
+    if len(rows) == 0:
+        return rows, cols, data
+    row_start = np.r_[0, np.flatnonzero(np.diff(rows)) + 1]
+    run_lengths = np.diff(np.r_[row_start, len(rows)])
+    rank = np.arange(len(rows)) - np.repeat(row_start, run_lengths)
+    keep = rank < top_n
+    return rows[keep], cols[keep], data[keep]
@@ -1,3 +1,6 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
 import pandas as pd
 from features.constants import (
     MIX_FEATS_COLS,
@@ -8,7 +11,10 @@ from features.constants import (
     GAP_COLS,
     FINAL_MIX_FEAT_COLS,
 )
-from src.config import logger
+from src.config import MIX_JOIN_CHUNK_ROWS, logger
+
+# Limite de chaves por linha para contar com `np.bincount` sem fatorar as chaves
+MAX_DENSE_KEYS_PER_ROW = 4
 
 
 def generate_suggested_feats(
@@ -21,6 +27,11 @@ def generate_suggested_feats(
     """
     Gera a tabela final agregando informações de várias dimensões.
 
+    Em vez de um `merge` por dimensão, o `userId` de `df_mix` é fatorado uma
+    vez e cada tabela de afinidade é localizada por (código do usuário,
+    código da categoria), trazendo só a coluna `rel*` com um `take`. Pares
+    sem afinidade ficam com NaN, como no left join.
+
     Args:
         df_mix (pd.DataFrame): Base com features principais.
         state_df (pd.DataFrame): Dados de estado.
@@ -32,14 +43,68 @@ def generate_suggested_feats(
         pd.DataFrame: Tabela final agregada.
     """
     logger.info("📐 [Mix] Gerando suggested_feats...")
-    suggested = df_mix[FINAL_MIX_FEAT_COLS]
-    suggested = suggested.merge(state_df, on=["userId", "localState"], how="left")
-    suggested = suggested.merge(region_df, on=["userId", "localRegion"], how="left")
-    suggested = suggested.merge(tm_df, on=["userId", "themeMain"], how="left")
-    suggested = suggested.merge(ts_df, on=["userId", "themeSub"], how="left")
-    cols = [col for col in suggested.columns if col.startswith("count")]
-    logger.info("📐 [Mix] Removendo colunas de contagem...")
-    return suggested.drop(columns=cols)
+    suggested = df_mix[FINAL_MIX_FEAT_COLS].reset_index(drop=True)
+    user_codes, users = pd.factorize(suggested["userId"])
+    for table, cols in zip(
+        [state_df, region_df, tm_df, ts_df],
+        [STATE_COLS, REGION_COLS, THEME_MAIN_COLS, THEME_SUB_COLS],
+    ):
+        _, col, _, rel_col = cols
+        positions = _affinity_positions(user_codes, users, suggested[col], table, col)
+        suggested[rel_col] = pd.api.extensions.take(
+            table[rel_col].to_numpy(), positions, allow_fill=True
+        )
+    logger.info("📐 [Mix] suggested_feats gerado.")
+    return suggested
+
+
+def _affinity_positions(
+    user_codes: np.ndarray,
+    users: pd.Index,
+    values: pd.Series,
+    table: pd.DataFrame,
+    col: str,
+) -> np.ndarray:
+    """
+    Posição em `table` do par (usuário, categoria) de cada linha (-1 se ausente).
+
+    Pares repetidos na tabela usam a primeira ocorrência.
+    """
+    table_cats, cats = pd.factorize(table[col])
+    cats = pd.Index(np.asarray(cats))
+    n_cats = max(len(cats), 1)
+    table_keys = _pair_keys(users.get_indexer(table["userId"]), table_cats, n_cats)
+    keys = _pair_keys(user_codes, _codes_in(cats, values), n_cats)
+    rows = np.flatnonzero((table_keys >= 0) & ~pd.Series(table_keys).duplicated().to_numpy())
+    key_space = len(users) * n_cats
+    if key_space > MAX_DENSE_KEYS_PER_ROW * max(len(keys), 1):
+        positions = pd.Index(table_keys[rows]).get_indexer(keys)
+        return np.where((keys >= 0) & (positions >= 0), rows[positions], -1)
+    lookup = np.full(key_space + 1, -1, dtype=np.int64)
+    lookup[table_keys[rows]] = rows
+    return lookup[keys]
+
+
+def _pair_keys(user_codes: np.ndarray, cat_codes: np.ndarray, n_cats: int) -> np.ndarray:
+    """
+    Chave int64 do par (usuário, categoria); -1 se algum dos códigos for -1.
+    """
+    user_codes = np.asarray(user_codes, dtype=np.int64)
+    cat_codes = np.asarray(cat_codes, dtype=np.int64)
+    return np.where((user_codes >= 0) & (cat_codes >= 0), user_codes * n_cats + cat_codes, -1)
+
+
+def _codes_in(index: pd.Index, values: pd.Series) -> np.ndarray:
+    """
+    Posição de cada valor em `index` (-1 se ausente ou nulo).
+
+    Colunas `category` são resolvidas pelas categorias, sem percorrer as linhas
+    com hash.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        mapping = np.append(index.get_indexer(values.cat.categories), -1)
+        return mapping[values.cat.codes.to_numpy()]
+    return index.get_indexer(values)
 
 
 def preprocess_mix_feats(df_news: pd.DataFrame, df_users: pd.DataFrame):
@@ -55,17 +120,71 @@ def preprocess_mix_feats(df_news: pd.DataFrame, df_users: pd.DataFrame):
     """
     logger.info("🔀 [Mix] Iniciando pré-processamento do mix_feats...")
     df_news, df_users = _process_datetime(df_news, df_users)
-    df_mix = pd.merge(df_users, df_news, on="pageId", how="inner")[MIX_FEATS_COLS]
+    df_mix = _broadcast_join(df_users, df_news, MIX_FEATS_COLS)
     df_mix = _compute_time_gap(df_mix)
     df_mix = _compute_category_counts(df_mix)
     logger.info("🔀 [Mix] Finalizando pré-processamento do mix_feats...")
     return _split_dataframes(df_mix)
 
 
+def _broadcast_join(
+    df_users: pd.DataFrame,
+    df_news: pd.DataFrame,
+    columns: List[str],
+    chunk_rows: Optional[int] = MIX_JOIN_CHUNK_ROWS,
+) -> pd.DataFrame:
+    """
+    Junção interna por `pageId` tratando as notícias como tabela pequena.
+
+    Um índice de `pageId` das notícias é montado uma vez e consultado em
+    blocos de `chunk_rows` interações, guardando apenas as posições que
+    casaram. Depois, cada coluna de `columns` é copiada uma única vez com
+    `take` do lado de origem, sem materializar o merge com todas as colunas.
+    O resultado equivale a `pd.merge(..., on="pageId", how="inner")[columns]`.
+
+    Args:
+        df_users (pd.DataFrame): Interações (tabela grande).
+        df_news (pd.DataFrame): Notícias (uma linha por `pageId`).
+        columns (List[str]): Colunas do resultado.
+        chunk_rows (int, optional): Interações por bloco (None = todas).
+
+    Returns:
+        pd.DataFrame: Interações com as colunas das notícias.
+    """
+    news_index = pd.Index(df_news["pageId"])
+    if not news_index.is_unique:
+        logger.warning("⚠️ [Mix] pageId repetido nas notícias; usando merge.")
+        return pd.merge(df_users, df_news, on="pageId", how="inner")[columns]
+    page_ids = df_users["pageId"]
+    step = chunk_rows or max(len(page_ids), 1)
+    user_rows, news_rows = [], []
+    for start in range(0, len(page_ids), step):
+        positions = news_index.get_indexer(page_ids.iloc[start : start + step])
+        matched = np.flatnonzero(positions >= 0)
+        user_rows.append(matched + start)
+        news_rows.append(positions[matched])
+    user_rows = np.concatenate(user_rows) if user_rows else np.empty(0, dtype=np.int64)
+    news_rows = np.concatenate(news_rows) if news_rows else np.empty(0, dtype=np.int64)
+    return pd.DataFrame(
+        {
+            col: (
+                df_users[col].array.take(user_rows)
+                if col in df_users.columns
+                else df_news[col].array.take(news_rows)
+            )
+            for col in columns
+        }
+    )
+
+
 def _process_datetime(df_news: pd.DataFrame, df_users: pd.DataFrame):
     """
     Converte datas e horários para datetime e cria timestamps.
 
+    Os DataFrames recebidos não são alterados: as colunas convertidas e as
+    novas vão para cópias rasas (os artefatos `users` e `news` são lidos ao
+    mesmo tempo por outras etapas do pipeline).
+
     Args:
         df_news (pd.DataFrame): Dados das notícias.
         df_users (pd.DataFrame): Dados dos usuários.
@@ -74,36 +193,42 @@ def _process_datetime(df_news: pd.DataFrame, df_users: pd.DataFrame):
         tuple: (df_news, df_users) com novas colunas.
     """
     logger.info("🕒 [Mix] Processando datas e horários...")
+    df_news, df_users = df_news.copy(deep=False), df_users.copy(deep=False)
     df_news["issuedDate"] = pd.to_datetime(df_news["issuedDate"], format="%Y-%m-%d")
     df_users["timestampHistoryDate"] = pd.to_datetime(
         df_users["timestampHistoryDate"], format="%Y-%m-%d"
     )
-    df_news["issuedTime"] = pd.to_datetime(
-        df_news["issuedTime"], format="%H:%M:%S", errors="coerce"
-    ).dt.time
-    df_users["timestampHistoryTime"] = pd.to_datetime(
-        df_users["timestampHistoryTime"], format="%H:%M:%S", errors="coerce"
-    ).dt.time
-    df_news["issuedDatetime"] = df_news["issuedDate"] + df_news["issuedTime"].apply(
-        lambda t: (
-            pd.Timedelta(hours=t.hour, minutes=t.minute, seconds=t.second)
-            if pd.notnull(t)
-            else pd.Timedelta(0)
-        )
+    df_news["issuedTime"], df_news["issuedDatetime"] = _combine_date_time(
+        df_news["issuedDate"], df_news["issuedTime"]
     )
-    df_users["timestampHistoryDatetime"] = df_users["timestampHistoryDate"] + df_users[
-        "timestampHistoryTime"
-    ].apply(
-        lambda t: (
-            pd.Timedelta(hours=t.hour, minutes=t.minute, seconds=t.second)
-            if pd.notnull(t)
-            else pd.Timedelta(0)
-        )
+    df_users["timestampHistoryTime"], df_users["timestampHistoryDatetime"] = _combine_date_time(
+        df_users["timestampHistoryDate"], df_users["timestampHistoryTime"]
     )
     logger.info("🕒 [Mix] Datas e horários processados.")
     return df_news, df_users
 
 
+def _combine_date_time(dates: pd.Series, times: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    """
+    Soma a hora do dia (HH:MM:SS) às datas com aritmética vetorizada de
+    timedelta64, sem criar um `pd.Timedelta` por linha.
+
+    Horários inválidos ou nulos contam como meia-noite; frações de segundo
+    são descartadas.
+
+    Args:
+        dates (pd.Series): Datas (datetime64).
+        times (pd.Series): Horários em texto ou `datetime.time`.
+
+    Returns:
+        Tuple[pd.Series, pd.Series]: Horários como `datetime.time` (NaT se
+        inválidos) e os datetimes combinados.
+    """
+    parsed = pd.to_datetime(times, format="%H:%M:%S", errors="coerce")
+    time_of_day = (parsed - parsed.dt.normalize()).dt.floor("s").fillna(pd.Timedelta(0))
+    return parsed.dt.time, dates + time_of_day
+
+
 def _compute_time_gap(df_mix: pd.DataFrame) -> pd.DataFrame:
     """
     Calcula a diferença de tempo entre publicação e consumo.
@@ -128,6 +253,11 @@ def _compute_category_counts(df_mix: pd.DataFrame, category_columns=None) -> pd.
     """
     Conta notícias por categoria e cria colunas com proporção.
 
+    Todas as contagens saem de uma única passada sobre códigos inteiros: o
+    `userId` é fatorado uma vez e combinado com os códigos de cada categoria
+    em uma chave int64, contada com `np.bincount`. Linhas com categoria (ou
+    usuário) nula ficam com contagem e proporção NaN, como no `groupby`.
+
     Args:
         df_mix (pd.DataFrame): Dados combinados.
         category_columns (list, optional): Colunas de categoria.
@@ -138,24 +268,78 @@ def _compute_category_counts(df_mix: pd.DataFrame, category_columns=None) -> pd.
     logger.info("📊 [Mix] Calculando contagens por categoria...")
     if category_columns is None:
         category_columns = ["localState", "localRegion", "themeMain", "themeSub"]
+    user_codes, users = pd.factorize(df_mix["userId"])
+    user_codes = user_codes.astype(np.int64)
+    has_page = df_mix["pageId"].notna().to_numpy()
+    counts = {}
     for col in category_columns:
         title = col[0].upper() + col[1:]
-        count_col = f"count{title}User"
-        df_mix[count_col] = df_mix.groupby(["userId", col])["pageId"].transform("count")
-    df_mix["totalUserNews"] = df_mix.groupby("userId")["pageId"].transform("count")
-    for col in category_columns:
-        title = col[0].upper() + col[1:]
-        count_col = f"count{title}User"
-        rel_col = f"rel{title}"
-        df_mix[rel_col] = df_mix[count_col] / df_mix["totalUserNews"]
+        cat_codes, categories = _category_codes(df_mix[col])
+        key_space = len(users) * max(len(categories), 1)
+        keys = user_codes * max(len(categories), 1) + cat_codes
+        valid = (user_codes >= 0) & (cat_codes >= 0)
+        counts[title] = _segment_counts(keys, valid, has_page, key_space)
+    total = _segment_counts(user_codes, user_codes >= 0, has_page, len(users))
+    for title, count in counts.items():
+        df_mix[f"count{title}User"] = _as_count_column(count, df_mix.index)
+    df_mix["totalUserNews"] = _as_count_column(total, df_mix.index)
+    for title, count in counts.items():
+        df_mix[f"rel{title}"] = pd.Series(count / total, index=df_mix.index)
     logger.info("📊 [Mix] Contagens por categoria calculadas.")
     return df_mix
 
 
+def _category_codes(values: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+    """
+    Códigos inteiros (-1 para nulos) e categorias de uma coluna.
+
+    Colunas `category` reaproveitam os códigos existentes; as demais são
+    fatoradas.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy().astype(np.int64), values.cat.categories
+    codes, uniques = pd.factorize(values)
+    return codes.astype(np.int64), uniques
+
+
+def _segment_counts(
+    keys: np.ndarray, valid: np.ndarray, weights: np.ndarray, key_space: int
+) -> np.ndarray:
+    """
+    Conta, para cada linha, as linhas válidas com a mesma chave.
+
+    Quando o espaço de chaves (`key_space`) é pequeno perto do número de
+    linhas, as chaves indexam o `bincount` direto; caso contrário, são
+    fatoradas antes (hash, sem ordenação). Linhas inválidas recebem NaN.
+    """
+    result = np.full(len(keys), np.nan)
+    if not valid.any():
+        return result
+    keys, weights = keys[valid], weights[valid]
+    if key_space > MAX_DENSE_KEYS_PER_ROW * len(keys):
+        keys, uniques = pd.factorize(keys)
+        key_space = len(uniques)
+    result[valid] = np.bincount(keys, weights=weights, minlength=key_space)[keys]
+    return result
+
+
+def _as_count_column(count: np.ndarray, index: pd.Index) -> pd.Series:
+    """
+    Contagem como int64 quando não há NaN, float64 caso contrário.
+    """
+    if np.isnan(count).any():
+        return pd.Series(count, index=index)
+    return pd.Series(count.astype(np.int64), index=index)
+
+
 def _split_dataframes(df_mix: pd.DataFrame):
     """
     Separa o dataframe em subconjuntos por dimensão.
 
+    As tabelas de afinidade já saem agregadas (uma linha por usuário e
+    categoria com contagem positiva): as linhas são escolhidas pelas chaves
+    inteiras (usuário, categoria) e só as colunas da tabela são copiadas.
+
     Args:
         df_mix (pd.DataFrame): Dados enriquecidos.
 
@@ -163,19 +347,32 @@ def _split_dataframes(df_mix: pd.DataFrame):
         tuple: (df_mix, gap_df, state_df, region_df, tm_df, ts_df)
     """
     logger.info("🔀 [Mix] Separando subconjuntos...")
-    gap_df = df_mix[GAP_COLS].copy()
-    gap_df = gap_df[gap_df["timeGapDays"] >= 0].reset_index(drop=True)
-    state_df = df_mix[STATE_COLS].copy()
-    state_df = state_df[state_df["countLocalStateUser"] > 0].reset_index(drop=True)
-    region_df = df_mix[REGION_COLS].copy()
-    region_df = region_df[region_df["countLocalRegionUser"] > 0].reset_index(drop=True)
-    tm_df = df_mix[THEME_MAIN_COLS].copy()
-    tm_df = tm_df[tm_df["countThemeMainUser"] > 0].reset_index(drop=True)
-    ts_df = df_mix[THEME_SUB_COLS].copy()
-    ts_df = ts_df[ts_df["countThemeSubUser"] > 0].reset_index(drop=True)
-    state_df = state_df.drop_duplicates(subset=["userId", "localState"])
-    region_df = region_df.drop_duplicates(subset=["userId", "localRegion"])
-    tm_df = tm_df.drop_duplicates(subset=["userId", "themeMain"])
-    ts_df = ts_df.drop_duplicates(subset=["userId", "themeSub"])
+    gap_df = _take_rows(df_mix, GAP_COLS, np.flatnonzero(df_mix["timeGapDays"].to_numpy() >= 0))
+    user_codes, _ = pd.factorize(df_mix["userId"], use_na_sentinel=False)
+    state_df, region_df, tm_df, ts_df = [
+        _affinity_table(df_mix, user_codes, cols)
+        for cols in [STATE_COLS, REGION_COLS, THEME_MAIN_COLS, THEME_SUB_COLS]
+    ]
     logger.info("🔀 [Mix] Subconjuntos separados.")
     return df_mix, gap_df, state_df, region_df, tm_df, ts_df
+
+
+def _affinity_table(df_mix: pd.DataFrame, user_codes: np.ndarray, cols: list) -> pd.DataFrame:
+    """
+    Primeira linha de cada par (usuário, categoria) com contagem positiva.
+
+    Valores nulos contam como uma categoria própria, como no `drop_duplicates`.
+    """
+    _, col, count_col, _ = cols
+    cat_codes, cats = pd.factorize(df_mix[col], use_na_sentinel=False)
+    keys = user_codes.astype(np.int64) * max(len(cats), 1) + cat_codes
+    rows = np.flatnonzero(df_mix[count_col].to_numpy() > 0)
+    rows = rows[~pd.Series(keys[rows]).duplicated().to_numpy()]
+    return _take_rows(df_mix, cols, rows)
+
+
+def _take_rows(df_mix: pd.DataFrame, cols: list, rows: np.ndarray) -> pd.DataFrame:
+    """
+    Copia apenas `cols` nas posições `rows`, com índice reiniciado.
+    """
+    return pd.DataFrame({col: df_mix[col].take(rows).reset_index(drop=True) for col in cols})
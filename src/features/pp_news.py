@@ -1,22 +1,45 @@
 import re
 import unicodedata
 import nltk
+import numpy as np
 import pandas as pd
 from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
+from .ingest import read_raw_parquet
 from .utils import concatenate_csv_files
-from .constants import NEWS_COLS_TO_DROP
-from src.config import logger, NEWS_DIRECTORY
-
-
-def preprocess_news(selected_pageIds: pd.Series) -> pd.DataFrame:
+from .constants import NEWS_COLS_TO_DROP, NEWS_RAW_COLUMNS, NEWS_TEXT_COLUMNS
+from src.config import (
+    logger,
+    NEWS_DIRECTORY,
+    NEWS_READ_CHUNK_SIZE,
+    NEWS_TEXT_FEATURES,
+    RAW_PARQUET_INGESTION,
+)
+
+URL_PART_COLUMNS = ["localState", "localRegion", "themeMain", "themeSub"]
+URL_MID_PATTERN = re.compile(r"(?<=g1\.globo\.com\/)(.*?)(?=\/noticia)")
+# Localidade opcional no início (com ela, as barras seguintes saem do tema);
+# `themeSub` inclui a barra inicial para distinguir vazio de ausente
+URL_PARTS_PATTERN = re.compile(
+    r"^(?:(?P<localState>[a-z]{2})/(?P<localRegion>[a-z-]+)/*)?"
+    r"(?P<themeMain>[^/]*)(?P<themeSub>/[^/]*)?"
+)
+
+
+def preprocess_news(
+    selected_pageIds: pd.Series, include_text: bool = NEWS_TEXT_FEATURES
+) -> pd.DataFrame:
     """
     Pré-processa dados de notícias.
 
-    Filtrando por pageIds e extraindo informações relevantes da URL.
+    Filtrando por pageIds e extraindo informações relevantes da URL. Apenas as
+    colunas necessárias são lidas e o filtro de pageIds é aplicado a cada
+    arquivo durante a leitura, então o texto das notícias (`body`, `caption`)
+    só é carregado quando `include_text` está ativo.
 
     Args:
         selected_pageIds (pd.Series): Lista de pageIds a serem processados.
+        include_text (bool): Se True, lê também as colunas de texto.
 
     Returns:
         pd.DataFrame: Notícias processadas.
@@ -28,28 +51,112 @@ def preprocess_news(selected_pageIds: pd.Series) -> pd.DataFrame:
     _download_resource("wordnet", ["corpora/wordnet", "corpora/wordnet.zip"])
     _download_resource("omw-1.4", ["corpora/omw-1.4", "corpora/omw-1.4.zip"])
 
-    news_df = concatenate_csv_files(NEWS_DIRECTORY)
-    logger.info("📰 [News] Arquivos CSV concatenados. Total de linhas: %d", len(news_df))
+    columns = NEWS_RAW_COLUMNS + (NEWS_TEXT_COLUMNS if include_text else [])
+    news_df = None
+    if RAW_PARQUET_INGESTION:
+        news_df = read_raw_parquet(
+            "news", columns=columns, filters=[("page", "in", list(selected_pageIds))]
+        )
+    if news_df is None:
+        news_df = concatenate_csv_files(
+            NEWS_DIRECTORY,
+            usecols=columns,
+            row_filters={"page": selected_pageIds},
+            chunksize=NEWS_READ_CHUNK_SIZE,
+        )
+    logger.info(
+        "📰 [News] Notícias carregadas e filtradas por pageIds. Linhas: %d | Colunas: %s",
+        len(news_df),
+        list(news_df.columns),
+    )
 
     news_df = news_df.rename(columns={"page": "pageId"})
-    news_df = news_df[news_df["pageId"].isin(selected_pageIds)]
-    logger.info("📰 [News] Filtrado por pageIds. Linhas após filtro: %d", len(news_df))
 
+    news_df = extract_news_features(news_df)
+    logger.info("📰 [News] Pré-processamento concluído. Linhas processadas: %d", news_df.shape[0])
+    return news_df
+
+
+def extract_news_features(news_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Extrai data/hora de publicação e as categorias da URL (`localState`,
+    `localRegion`, `themeMain`, `themeSub`) de notícias brutas.
+
+    Usada tanto no pipeline completo quanto na ingestão incremental de
+    notícias novas.
+
+    Args:
+        news_df (pd.DataFrame): Notícias brutas (com `pageId`, `url`,
+            `issued` e `modified`).
+
+    Returns:
+        pd.DataFrame: Notícias processadas, sem as colunas de `NEWS_COLS_TO_DROP`.
+    """
+    news_df = news_df.copy()
     for col in ["issued", "modified"]:
         news_df[col] = pd.to_datetime(news_df[col])
         news_df[f"{col}Date"] = news_df[col].dt.date
         news_df[f"{col}Time"] = news_df[col].dt.time
 
-    news_df["urlExtracted"] = news_df["url"].apply(_extract_url_mid_section)
-    news_df["local"] = news_df["urlExtracted"].apply(_extract_location)
-    news_df["localState"] = news_df["local"].str.split("/").str[0]
-    news_df["localRegion"] = news_df["local"].str.split("/").str[1]
-    news_df["theme"] = news_df["urlExtracted"].apply(_extract_theme)
-    news_df["themeMain"] = news_df["theme"].str.split("/").str[0]
-    news_df["themeSub"] = news_df["theme"].str.split("/").str[1]
+    url_parts = extract_url_parts(news_df["url"])
+    for col in URL_PART_COLUMNS:
+        news_df[col] = url_parts[col]
+    return news_df.drop(columns=NEWS_COLS_TO_DROP, errors="ignore")
 
-    logger.info("📰 [News] Pré-processamento concluído. Linhas processadas: %d", news_df.shape[0])
-    return news_df.drop(columns=NEWS_COLS_TO_DROP)
+
+def extract_url_parts(urls: pd.Series) -> pd.DataFrame:
+    """
+    Extrai `localState`, `localRegion`, `themeMain` e `themeSub` das URLs com
+    `str.extract` e padrões compilados uma vez.
+
+    O miolo da URL (entre o domínio e `/noticia`) é extraído de todas as
+    linhas; as partes são extraídas apenas dos miolos distintos (poucos, pois
+    se repetem entre notícias da mesma editoria) e expandidas pelos códigos
+    do `factorize`, já como `category`.
+
+    Equivale a aplicar `_extract_url_mid_section`, `_extract_location` e
+    `_extract_theme` linha a linha e separar os resultados por "/".
+
+    Args:
+        urls (pd.Series): URLs das notícias.
+
+    Returns:
+        pd.DataFrame: Uma coluna `category` por parte (NaN quando ausente),
+        com o mesmo índice de `urls`.
+    """
+    mid = urls.str.extract(URL_MID_PATTERN, expand=False)
+    codes, uniques = pd.factorize(mid)
+    uniques = pd.Series(uniques, dtype=object)
+    parts = uniques.str.extract(URL_PARTS_PATTERN)
+    parts["themeSub"] = parts["themeSub"].str.slice(start=1)
+    # Tema vazio (miolo vazio ou só a localidade) vira nulo
+    empty_theme = parts["themeMain"].eq("") & parts["themeSub"].isna()
+    parts.loc[empty_theme, "themeMain"] = np.nan
+
+    # `_extract_theme` remove todas as ocorrências da localidade do miolo;
+    # os raros miolos em que ela se repete seguem o caminho original
+    local = parts["localState"] + "/" + parts["localRegion"]
+    repeated = [
+        isinstance(loc, str) and loc in rest[len("xx/") :] for loc, rest in zip(local, uniques)
+    ]
+    if any(repeated):
+        theme = uniques[repeated].apply(_extract_theme).str.split("/")
+        parts.loc[repeated, "themeMain"] = theme.str[0]
+        parts.loc[repeated, "themeSub"] = theme.str[1]
+
+    columns = {}
+    for col in URL_PART_COLUMNS:
+        categories = parts[col].astype("category")
+        part_codes = categories.cat.codes.to_numpy()
+        columns[col] = pd.Categorical.from_codes(
+            (
+                np.where(codes >= 0, part_codes[np.maximum(codes, 0)], -1)
+                if len(part_codes)
+                else np.full(len(codes), -1)
+            ),
+            categories=categories.cat.categories,
+        )
+    return pd.DataFrame(columns, index=urls.index)
 
 
 def _download_resource(resource_name: str, resource_paths: list) -> None:
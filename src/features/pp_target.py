@@ -1,3 +1,5 @@
+from typing import Iterable, Tuple
+
 import pandas as pd
 import numpy as np
 from .constants import TARGET_INIT_COLS, TARGET_FINAL_COLS, DEFAULT_TARGET_VALUES
@@ -18,6 +20,27 @@ def preprocess_target(df_users: pd.DataFrame, gap_df: pd.DataFrame) -> pd.DataFr
     Returns:
         pd.DataFrame: DataFrame contendo as colunas ["userId", "pageId", "TARGET"].
     """
+    scores = compute_log_scores(df_users, gap_df)
+    min_val, max_val = score_range(scores)
+    target_df = scale_target(scores, min_val, max_val)
+    logger.info("🎯 [Target] Pré-processamento finalizado. Shape final: %s", target_df.shape)
+    return target_df
+
+
+def compute_log_scores(df_users: pd.DataFrame, gap_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calcula o score de engajamento (log1p) de cada interação, antes da escala.
+
+    O cálculo é linha a linha; só a escala min/max depende da base inteira,
+    o que permite calcular os scores por partição de usuários.
+
+    Args:
+        df_users (pd.DataFrame): Dados dos usuários.
+        gap_df (pd.DataFrame): Dados do gap temporal.
+
+    Returns:
+        pd.DataFrame: Colunas ["userId", "pageId", "logScore"].
+    """
     logger.info("🎯 [Target] Iniciando pré-processamento do target...")
     logger.info(
         "🎯 [Target] Merge: df_users (%d linhas) + gap_df (%d linhas).",
@@ -48,8 +71,53 @@ def preprocess_target(df_users: pd.DataFrame, gap_df: pd.DataFrame) -> pd.DataFr
     raw_score = np.maximum(raw_score, 0)
 
     logger.info("🎯 [Target] Aplicando log1p ao score...")
-    log_score = np.log1p(raw_score)
-    min_val, max_val = log_score.min(), log_score.max()
+    target_df["logScore"] = np.log1p(raw_score)
+    return target_df[["userId", "pageId", "logScore"]]
+
+
+def score_range(scores: pd.DataFrame) -> Tuple[float, float]:
+    """
+    Mínimo e máximo de `logScore` (agregado parcial, combinável entre partições
+    com `merge_score_ranges`).
+
+    Args:
+        scores (pd.DataFrame): Saída de `compute_log_scores`.
+
+    Returns:
+        Tuple[float, float]: (mínimo, máximo); NaN se não houver linhas.
+    """
+    return float(scores["logScore"].min()), float(scores["logScore"].max())
+
+
+def merge_score_ranges(ranges: Iterable[Tuple[float, float]]) -> Tuple[float, float]:
+    """
+    Combina os (mínimo, máximo) de várias partições, ignorando as vazias.
+
+    Args:
+        ranges (Iterable[Tuple[float, float]]): Saídas de `score_range`.
+
+    Returns:
+        Tuple[float, float]: (mínimo, máximo) globais.
+    """
+    ranges = [(low, high) for low, high in ranges if not np.isnan(low)]
+    if not ranges:
+        return np.nan, np.nan
+    return min(low for low, _ in ranges), max(high for _, high in ranges)
+
+
+def scale_target(scores: pd.DataFrame, min_val: float, max_val: float) -> pd.DataFrame:
+    """
+    Escala `logScore` para inteiros em [0, SCALING_RANGE] com o min/max informado.
+
+    Args:
+        scores (pd.DataFrame): Saída de `compute_log_scores`.
+        min_val (float): Mínimo global de `logScore`.
+        max_val (float): Máximo global de `logScore`.
+
+    Returns:
+        pd.DataFrame: DataFrame contendo as colunas ["userId", "pageId", "TARGET"].
+    """
+    log_score = scores["logScore"]
     logger.info("🎯 [Target] Score: min=%.4f, max=%.4f", min_val, max_val)
 
     if max_val == min_val:
@@ -59,9 +127,6 @@ def preprocess_target(df_users: pd.DataFrame, gap_df: pd.DataFrame) -> pd.DataFr
         scaled = (log_score - min_val) / (max_val - min_val)
 
     scaled *= SCALING_RANGE
-    final_score = scaled.round().astype(int)
-    target_df["TARGET"] = final_score
-
-    target_df = target_df[TARGET_FINAL_COLS]
-    logger.info("🎯 [Target] Pré-processamento finalizado. Shape final: %s", target_df.shape)
-    return target_df
+    target_df = scores[["userId", "pageId"]].copy()
+    target_df["TARGET"] = scaled.round().astype(int)
+    return target_df[TARGET_FINAL_COLS]
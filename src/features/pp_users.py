@@ -1,7 +1,30 @@
+import os
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
 import pandas as pd
-from .constants import USERS_COLS_TO_EXPLODE, USERS_DTYPES
-from src.config import SAMPLE_RATE, COLD_START_THRESHOLD, USERS_DIRECTORY, logger
-from .utils import concatenate_csv_files
+from .constants import (
+    USERS_CHUNK_DTYPES,
+    USERS_COLS_TO_EXPLODE,
+    USERS_DTYPES,
+    USERS_HISTORY_DTYPES,
+)
+from src.config import (
+    SAMPLE_RATE,
+    COLD_START_THRESHOLD,
+    RAW_PARQUET_INGESTION,
+    USERS_CHUNK_MEMORY_FRACTION,
+    USERS_CHUNK_ROWS,
+    USERS_DIRECTORY,
+    logger,
+)
+from .ingest import raw_partitions, read_raw_parquet
+from .utils import concatenate_csv_files, get_default_storage, split_delimited_column
+
+USERS_PROBE_ROWS = 2000
+USERS_MIN_CHUNK_ROWS = 1000
+# Pico aproximado de memória por linha processada (cópias intermediárias)
+USERS_PEAK_FACTOR = 3
 
 
 def preprocess_users() -> pd.DataFrame:
@@ -12,8 +35,15 @@ def preprocess_users() -> pd.DataFrame:
         pd.DataFrame: Dados dos usuários processados.
     """
     logger.info("👥 [Users] Iniciando pré-processamento dos usuários...")
-    users_df = concatenate_csv_files(USERS_DIRECTORY)
-    logger.info("👥 [Users] Dados carregados: %d linhas (antes da amostragem).", len(users_df))
+    users_df = read_raw_parquet("users") if RAW_PARQUET_INGESTION else None
+    from_parquet = users_df is not None
+    if not from_parquet:
+        users_df = concatenate_csv_files(USERS_DIRECTORY)
+    logger.info(
+        "👥 [Users] Dados carregados (%s): %d linhas (antes da amostragem).",
+        "parquet" if from_parquet else "csv",
+        len(users_df),
+    )
 
     users_df = users_df.sample(frac=SAMPLE_RATE, random_state=42)
     logger.info(
@@ -22,50 +52,237 @@ def preprocess_users() -> pd.DataFrame:
         len(users_df),
     )
 
-    users_df = _process_history_columns(users_df)
-    logger.info("👥 [Users] Histórico processado.")
+    users_df = _process_users_frame(users_df, split=not from_parquet)
+    logger.info("👥 [Users] Pré-processamento dos usuários concluído: %d linhas.", len(users_df))
+
+    return users_df
+
+
+def iter_preprocessed_users(
+    sample_rate: float = SAMPLE_RATE, chunk_rows: Optional[int] = USERS_CHUNK_ROWS
+) -> Iterator[pd.DataFrame]:
+    """
+    Pré-processa os usuários em blocos, com memória limitada pelo tamanho do bloco.
+
+    A amostragem é feita na leitura, por hash do `userId` (`hash_sample_users`),
+    então o resultado não depende da divisão em blocos e é estável entre
+    execuções. Explode, conversões e tipos são aplicados a cada bloco; os tipos
+    numéricos são fixos (`USERS_CHUNK_DTYPES`) para que os blocos possam ser
+    gravados em um mesmo Parquet.
+
+    Args:
+        sample_rate (float): Fração de usuários mantida.
+        chunk_rows (int, optional): Linhas brutas por bloco. Se None, é
+            estimado a partir da memória disponível (`estimate_user_chunk_rows`).
+
+    Yields:
+        pd.DataFrame: Blocos processados (mesmas colunas de `preprocess_users`).
+    """
+    chunk_rows = chunk_rows or estimate_user_chunk_rows(sample_rate)
+    raw_rows = kept_rows = 0
+    for raw_df, split in _iter_raw_user_chunks(chunk_rows):
+        raw_rows += len(raw_df)
+        users_df = hash_sample_users(raw_df, sample_rate)
+        del raw_df
+        if users_df.empty:
+            continue
+        kept_rows += len(users_df)
+        yield _process_users_frame(users_df, split=split, chunked=True)
+    logger.info(
+        "👥 [Users] Pré-processamento em blocos concluído: %d de %d usuários amostrados "
+        "(taxa: %.2f, %d linhas por bloco).",
+        kept_rows,
+        raw_rows,
+        sample_rate,
+        chunk_rows,
+    )
+
+
+def hash_sample_users(users_df: pd.DataFrame, sample_rate: float) -> pd.DataFrame:
+    """
+    Amostra determinística por usuário: mantém os `userId` cujo hash cai na
+    fração `sample_rate` do espaço de hashes.
+
+    Args:
+        users_df (pd.DataFrame): Usuários brutos (com `userId`).
+        sample_rate (float): Fração de usuários mantida.
+
+    Returns:
+        pd.DataFrame: Linhas dos usuários amostrados.
+    """
+    if sample_rate >= 1:
+        return users_df
+    hashes = pd.util.hash_pandas_object(users_df["userId"].astype(str), index=False)
+    threshold = np.uint64(int(sample_rate * 2.0**64))
+    return users_df.take(np.flatnonzero(hashes.to_numpy() < threshold))
+
+
+def estimate_user_chunk_rows(
+    sample_rate: float = SAMPLE_RATE,
+    memory_fraction: float = USERS_CHUNK_MEMORY_FRACTION,
+    available_bytes: Optional[int] = None,
+) -> int:
+    """
+    Estima quantas linhas brutas cabem em um bloco dentro de uma fração da
+    memória disponível.
+
+    Um bloco pequeno (`USERS_PROBE_ROWS`) é processado sem amostragem para
+    medir a memória por linha bruta depois do explode; o custo de cada linha
+    do bloco é o tamanho bruto mais `sample_rate` vezes o processado, com
+    folga de `USERS_PEAK_FACTOR` para as cópias intermediárias.
+
+    Args:
+        sample_rate (float): Fração de usuários mantida.
+        memory_fraction (float): Fração da memória disponível por bloco.
+        available_bytes (int, optional): Memória disponível (lida do sistema se None).
+
+    Returns:
+        int: Linhas brutas por bloco (mínimo `USERS_MIN_CHUNK_ROWS`).
+    """
+    available_bytes = available_bytes or _available_memory_bytes()
+    chunks = _iter_raw_user_chunks(USERS_PROBE_ROWS)
+    probe = next(chunks, None)
+    chunks.close()
+    if probe is None or available_bytes is None:
+        return USERS_PROBE_ROWS * 50
+    raw_df, split = probe
+    raw_bytes = raw_df.memory_usage(deep=True).sum()
+    processed_bytes = (
+        _process_users_frame(raw_df.copy(), split=split, chunked=True)
+        .memory_usage(deep=True)
+        .sum()
+    )
+    row_bytes = USERS_PEAK_FACTOR * (raw_bytes + sample_rate * processed_bytes) / len(raw_df)
+    chunk_rows = max(USERS_MIN_CHUNK_ROWS, int(available_bytes * memory_fraction / row_bytes))
+    logger.info(
+        "📏 [Users] Bloco estimado: %d linhas (%.0f bytes/linha, %.1f GB disponíveis).",
+        chunk_rows,
+        row_bytes,
+        available_bytes / 1024**3,
+    )
+    return chunk_rows
+
+
+def _iter_raw_user_chunks(chunk_rows: int) -> Iterator[Tuple[pd.DataFrame, bool]]:
+    """
+    Lê os usuários brutos em blocos, do Parquet da ingestão (se existir) ou
+    dos CSVs. O booleano indica se as colunas de histórico ainda são texto.
+    """
+    storage = get_default_storage()
+    partitions = raw_partitions("users", storage) if RAW_PARQUET_INGESTION else None
+    if partitions:
+        for partition in partitions:
+            for users_df in storage.iter_parquet_batches(partition, chunk_rows):
+                yield users_df, False
+        return
+    for csv_path in sorted(storage.list_files(USERS_DIRECTORY, "*.csv")):
+        with storage.read_csv(csv_path, chunksize=chunk_rows) as reader:
+            for users_df in reader:
+                yield users_df, True
+
+
+def _available_memory_bytes() -> Optional[int]:
+    """
+    Memória disponível no sistema (`MemAvailable` do Linux), ou None.
+    """
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def _process_users_frame(
+    users_df: pd.DataFrame, split: bool = True, chunked: bool = False
+) -> pd.DataFrame:
+    """
+    Aplica as etapas de pré-processamento a usuários já amostrados.
+
+    Args:
+        users_df (pd.DataFrame): Usuários brutos.
+        split (bool): Se as colunas de histórico ainda são texto (CSV).
+        chunked (bool): Modo em blocos: as etapas são registradas em nível
+            debug e os tipos numéricos são fixos (`USERS_CHUNK_DTYPES`) em vez
+            de reduzidos conforme os dados.
+
+    Returns:
+        pd.DataFrame: Usuários processados.
+    """
+    log = logger.debug if chunked else logger.info
+
+    users_df = _process_history_columns(users_df, split=split)
+    log("👥 [Users] Histórico processado.")
 
     users_df = users_df.astype(USERS_DTYPES)
-    logger.info("👥 [Users] Conversão de tipos realizada.")
+    log("👥 [Users] Conversão de tipos realizada.")
 
     users_df = _process_timestamp(users_df)
-    logger.info("👥 [Users] Timestamps processados.")
+    log("👥 [Users] Timestamps processados.")
 
     users_df = _extract_time_features(users_df)
-    logger.info("👥 [Users] Novas features temporais extraídas.")
+    log("👥 [Users] Novas features temporais extraídas.")
 
     users_df["coldStart"] = users_df["historySize"] < COLD_START_THRESHOLD
-    logger.info("👥 [Users] Flag 'coldStart' definida (threshold: %d).", COLD_START_THRESHOLD)
+    log("👥 [Users] Flag 'coldStart' definida (threshold: %d).", COLD_START_THRESHOLD)
 
     users_df.rename(columns={"history": "pageId"}, inplace=True)
     users_df.drop(columns=["timestampHistory", "timestampHistory_new"], inplace=True)
-    logger.info("👥 [Users] Renomeação e remoção de colunas concluídas.")
-
-    users_df = _downcast_columns(users_df)
-    logger.info("👥 [Users] Downcast realizado nos dados numéricos.")
-    logger.info("👥 [Users] Pré-processamento dos usuários concluído: %d linhas.", len(users_df))
+    log("👥 [Users] Renomeação e remoção de colunas concluídas.")
 
+    if chunked:
+        users_df = users_df.astype(USERS_CHUNK_DTYPES)
+    else:
+        users_df = _downcast_columns(users_df)
+    log("👥 [Users] Downcast realizado nos dados numéricos.")
     return users_df
 
 
-def _process_history_columns(users_df: pd.DataFrame) -> pd.DataFrame:
+def _process_history_columns(users_df: pd.DataFrame, split: bool = True) -> pd.DataFrame:
     """
-    Converte colunas de histórico em listas e remove espaços.
+    Explode as colunas de histórico: uma linha por notícia lida.
+
+    As seis colunas paralelas viram arrays planos tipados
+    (`USERS_HISTORY_DTYPES`) mais a quantidade de elementos por usuário; as
+    colunas do usuário são repetidas com `np.repeat` sobre as posições, sem
+    listas Python intermediárias. O resultado tem as mesmas linhas (e índice)
+    de `str.split` + `explode` + `str.strip`.
 
     Args:
         users_df (pd.DataFrame): Dados dos usuários.
+        split (bool): Se False, as colunas já são listas tipadas (Parquet da
+            ingestão) e apenas são explodidas.
 
     Returns:
         pd.DataFrame: Dados com histórico processado.
+
+    Raises:
+        ValueError: Se as colunas de um usuário tiverem tamanhos diferentes.
     """
-    users_df[USERS_COLS_TO_EXPLODE] = users_df[USERS_COLS_TO_EXPLODE].apply(
-        lambda col: col.str.split(",")
-    )
-    users_df = users_df.explode(USERS_COLS_TO_EXPLODE)
-    users_df[USERS_COLS_TO_EXPLODE] = users_df[USERS_COLS_TO_EXPLODE].apply(
-        lambda col: col.str.strip()
-    )
-    return users_df
+    flat, lengths = {}, None
+    for col in USERS_COLS_TO_EXPLODE:
+        if split:
+            flat[col], col_lengths = split_delimited_column(
+                users_df[col], USERS_HISTORY_DTYPES[col]
+            )
+        else:
+            col_lengths = users_df[col].map(len).to_numpy(dtype=np.int64)
+            if not col_lengths.all():
+                # Listas vazias viram uma linha nula no explode
+                return users_df.explode(USERS_COLS_TO_EXPLODE)
+            flat[col] = np.concatenate(users_df[col].to_list()) if len(users_df) else []
+        if lengths is not None and not np.array_equal(lengths, col_lengths):
+            raise ValueError("As colunas de histórico têm quantidades diferentes de elementos.")
+        lengths = col_lengths
+
+    rows = np.repeat(np.arange(len(users_df)), lengths)
+    exploded = users_df.drop(columns=USERS_COLS_TO_EXPLODE).iloc[rows]
+    return exploded.assign(**flat)[users_df.columns]
 
 
 def _process_timestamp(users_df: pd.DataFrame) -> pd.DataFrame:
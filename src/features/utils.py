@@ -1,52 +1,304 @@
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import pandas as pd
-from typing import Optional
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence, Tuple
 from src.storage.io import Storage
-from src.config import USE_S3, DATA_PATH, logger
+from src.config import USE_S3, DATA_PATH, CSV_ENGINE, CSV_READ_WORKERS, logger
 
 
-def concatenate_csv_files(directory_path: str) -> pd.DataFrame:
+@lru_cache(maxsize=1)
+def get_default_storage() -> Storage:
     """
-    Concatena todos os arquivos CSV de um diretório.
+    Retorna uma instância de Storage compartilhada pelo processo, evitando
+    recriar o cliente (e o `head_bucket` no S3) a cada leitura.
+
+    Returns:
+        Storage: Instância configurada com `USE_S3`.
+    """
+    return Storage(use_s3=USE_S3)
+
+
+def concatenate_csv_files(
+    directory_path: str,
+    storage: Optional[Storage] = None,
+    max_workers: Optional[int] = None,
+    engine: Optional[str] = None,
+    row_filters: Optional[Dict[str, Iterable[Any]]] = None,
+    **read_kwargs,
+) -> pd.DataFrame:
+    """
+    Lê todos os arquivos CSV de um diretório em paralelo e concatena uma única vez.
+
+    Os arquivos são listados uma vez e lidos por um pool de threads (a leitura
+    de CSV libera o GIL); o resultado segue a ordem alfabética dos arquivos.
+
+    Projeção (`usecols`) e filtros (`row_filters`) são aplicados a cada arquivo
+    logo após a leitura (ou a cada bloco, com `chunksize`), então colunas e
+    linhas descartadas nunca chegam à concatenação.
 
     Args:
         directory_path (str): Caminho dos CSVs.
+        storage (Storage, optional): Instância para I/O (usa a compartilhada se None).
+        max_workers (int, optional): Threads de leitura (padrão: `CSV_READ_WORKERS`).
+        engine (str, optional): Engine do `pd.read_csv` (ex.: "pyarrow"; padrão:
+            `CSV_ENGINE`). Ignorada com `chunksize`, que o pyarrow não suporta.
+        row_filters (Dict[str, Iterable], optional): Mantém apenas as linhas cujo
+            valor em cada coluna pertence aos valores informados.
+        **read_kwargs: Argumentos extras repassados ao `read_csv` (ex.: `usecols`,
+            `chunksize`).
 
     Returns:
         pd.DataFrame: Dados concatenados.
     """
-    storage = Storage(use_s3=USE_S3)
-    df_concat = pd.DataFrame()
-    files_processed = 0
+    storage = storage or get_default_storage()
+    max_workers = max_workers or CSV_READ_WORKERS
+    engine = engine or CSV_ENGINE
+    if engine and not read_kwargs.get("chunksize"):
+        read_kwargs["engine"] = engine
+    # Valores únicos indexados uma vez, reutilizados em todos os arquivos
+    row_filters = {
+        col: pd.Index(pd.unique(pd.Series(list(values), dtype=object)))
+        for col, values in (row_filters or {}).items()
+    }
+    start = time.time()
     try:
-        csv_files = storage.list_files(directory_path, "*.csv")
+        csv_files = sorted(storage.list_files(directory_path, "*.csv"))
         logger.info(
             "📂 [Utils] Encontrados %d arquivos CSV em: %s", len(csv_files), directory_path
         )
-        for file_path in csv_files:
-            try:
-                df = storage.read_csv(file_path)
-                logger.info(
-                    "📄 [Utils] Processado: %s | Linhas: %d | Colunas: %d",
-                    os.path.basename(file_path),
-                    len(df),
-                    len(df.columns),
-                )
-                df_concat = pd.concat([df_concat, df], ignore_index=True)
-                files_processed += 1
-            except Exception as e:
-                logger.error("🚨 [Utils] Erro ao processar %s: %s", file_path, e)
     except Exception as e:
         logger.error("🚨 [Utils] Erro ao listar arquivos em %s: %s", directory_path, e)
+        csv_files = []
 
-    if files_processed == 0:
+    def read_file(file_path: str) -> Optional[pd.DataFrame]:
+        file_start = time.time()
+        try:
+            df = _read_filtered_csv(storage, file_path, row_filters, read_kwargs)
+        except Exception as e:
+            logger.error("🚨 [Utils] Erro ao processar %s: %s", file_path, e)
+            return None
+        logger.info(
+            "📄 [Utils] Processado: %s | Linhas: %d | Colunas: %d | %.2fs",
+            os.path.basename(file_path),
+            len(df),
+            len(df.columns),
+            time.time() - file_start,
+        )
+        return df
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(csv_files) or 1))) as pool:
+        frames = [df for df in pool.map(read_file, csv_files) if df is not None]
+
+    if not frames:
         logger.warning("⚠️ [Utils] Nenhum CSV encontrado em: %s", directory_path)
+        return pd.DataFrame()
 
-    result_df = df_concat.reset_index(drop=True)
-    logger.info("🔗 [Utils] Linhas após concatenação: %d", len(result_df))
+    result_df = pd.concat(frames, ignore_index=True)
+    logger.info(
+        "🔗 [Utils] Linhas após concatenação: %d | %d arquivos em %.2fs",
+        len(result_df),
+        len(frames),
+        time.time() - start,
+    )
     return result_df
 
 
+def _read_filtered_csv(
+    storage: Storage,
+    file_path: str,
+    row_filters: Dict[str, pd.Index],
+    read_kwargs: Dict[str, Any],
+) -> pd.DataFrame:
+    """
+    Lê um CSV (inteiro ou em blocos) aplicando `row_filters` a cada parte.
+    """
+
+    def apply_filters(df: pd.DataFrame) -> pd.DataFrame:
+        for col, values in row_filters.items():
+            df = df[df[col].isin(values)]
+        return df
+
+    if not read_kwargs.get("chunksize"):
+        return apply_filters(storage.read_csv(file_path, **read_kwargs))
+    with storage.read_csv(file_path, **read_kwargs) as reader:
+        chunks = [apply_filters(chunk) for chunk in reader]
+    return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+
+
+def split_delimited_column(
+    values: pd.Series, dtype: str = "str", sep: str = ","
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Separa uma coluna de listas em texto ("a, b, c") em um array plano tipado
+    e a quantidade de elementos por linha, sem criar listas Python por célula.
+
+    Reproduz `str.split` + `explode` + `str.strip`: células nulas geram um
+    único elemento nulo.
+
+    Args:
+        values (pd.Series): Coluna com os valores separados por `sep`.
+        dtype (str): Tipo dos elementos ("str" ou tipo NumPy, ex.: "int64").
+        sep (str): Separador.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Elementos (na ordem das linhas) e
+        quantidade de elementos por linha (int64).
+    """
+    if not pd.api.types.is_object_dtype(values) and not pd.api.types.is_string_dtype(values):
+        values = values.astype("string")
+    arr = pa.array(values, type=pa.string(), from_pandas=True)
+    lists = pc.split_pattern(arr.fill_null(""), sep)
+    lengths = pc.list_value_length(lists).to_numpy().astype(np.int64)
+    flat = pc.utf8_trim_whitespace(pc.list_flatten(lists))
+    if arr.null_count:
+        # A célula nula vira um elemento nulo, como no explode do pandas
+        is_null = np.zeros(len(flat), dtype=bool)
+        missing = arr.is_null().to_numpy(zero_copy_only=False)
+        is_null[(np.cumsum(lengths) - lengths)[missing]] = True
+        flat = pc.if_else(pa.array(is_null), pa.nulls(len(flat), pa.string()), flat)
+    if dtype != "str":
+        flat = pc.cast(flat, pa.from_numpy_dtype(np.dtype(dtype)))
+    return flat.to_numpy(zero_copy_only=False), lengths
+
+
+class ParquetChunkWriter:
+    """
+    Grava DataFrames em sequência como row groups de um único arquivo Parquet,
+    sem manter os blocos anteriores em memória.
+
+    O schema é definido pelo primeiro bloco; os seguintes são convertidos para
+    ele (os tipos devem ser estáveis entre blocos). Usado como context
+    manager, uma exceção no meio da gravação descarta os blocos e mantém o
+    arquivo anterior.
+    """
+
+    def __init__(self, path: str, storage: Optional[Storage] = None):
+        self.path = path
+        self.storage = storage or get_default_storage()
+        self.rows = 0
+        self._sink = None
+        self._writer: Optional[pq.ParquetWriter] = None
+
+    def write(self, df: pd.DataFrame) -> None:
+        """
+        Acrescenta um bloco ao arquivo.
+
+        Args:
+            df (pd.DataFrame): Bloco com as mesmas colunas dos anteriores.
+        """
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._writer is None:
+            self._sink = self.storage.open_write(self.path)
+            self._writer = pq.ParquetWriter(self._sink, table.schema)
+        elif not table.schema.equals(self._writer.schema):
+            table = table.cast(self._writer.schema)
+        self._writer.write_table(table)
+        self.rows += len(df)
+
+    def close(self) -> None:
+        """
+        Finaliza o arquivo, que só então substitui o anterior (no S3, dispara
+        o upload). Sem nenhum bloco gravado, remove o arquivo anterior, para
+        que ele não seja lido como resultado desta execução.
+        """
+        if self._writer is None:
+            self.storage.remove(self.path)
+            logger.warning("⚠️ [Utils] Nenhum bloco gravado em %s.", self.path)
+            return
+        self._writer.close()
+        self._sink.close()
+        self._writer = self._sink = None
+        logger.info("💾 [Utils] Parquet gravado em blocos: %s | Linhas: %d", self.path, self.rows)
+
+    def discard(self) -> None:
+        """
+        Descarta os blocos gravados, mantendo o arquivo anterior intacto.
+        """
+        if self._writer is not None:
+            try:
+                self._writer.close()
+            finally:
+                self._sink.discard()
+                self._writer = self._sink = None
+            logger.warning("⚠️ [Utils] Gravação em blocos descartada: %s", self.path)
+
+    def __enter__(self) -> "ParquetChunkWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+class ParquetTable:
+    """
+    Referência a um Parquet gravado por uma etapa do pipeline.
+
+    Etapas que produzem tabelas grandes retornam esta referência em vez do
+    DataFrame; quem consome lê só as colunas de que precisa (`read`) ou
+    percorre o arquivo em blocos (`iter_batches`).
+    """
+
+    def __init__(self, path: str, storage: Optional[Storage] = None):
+        self.path = path
+        self.storage = storage or get_default_storage()
+
+    def read(self, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Lê a tabela (ou apenas `columns`).
+
+        Args:
+            columns (Sequence[str], optional): Colunas a ler (None lê todas).
+
+        Returns:
+            pd.DataFrame: Dados lidos.
+        """
+        if columns is None:
+            return self.storage.read_parquet(self.path)
+        return self.storage.read_parquet(self.path, columns=list(columns))
+
+    def iter_batches(
+        self, batch_size: int, columns: Optional[Sequence[str]] = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Percorre a tabela em blocos de até `batch_size` linhas.
+
+        Args:
+            batch_size (int): Máximo de linhas por bloco.
+            columns (Sequence[str], optional): Colunas a ler (None lê todas).
+
+        Yields:
+            pd.DataFrame: Blocos na ordem do arquivo.
+        """
+        return self.storage.iter_parquet_batches(self.path, batch_size, columns)
+
+    def unique(self, column: str, batch_size: int = 1_000_000) -> np.ndarray:
+        """
+        Valores distintos de uma coluna, na ordem de aparição, lendo o
+        arquivo em blocos.
+
+        Args:
+            column (str): Coluna.
+            batch_size (int): Máximo de linhas por bloco.
+
+        Returns:
+            np.ndarray: Valores distintos.
+        """
+        uniques = [
+            pd.unique(batch[column].to_numpy())
+            for batch in self.iter_batches(batch_size, [column])
+        ]
+        return pd.unique(np.concatenate(uniques)) if uniques else np.array([])
+
+
 def ensure_directory(path: str) -> str:
     """
     Garante que o diretório do caminho fornecido exista.
@@ -86,8 +338,7 @@ def save_dataframe(df: pd.DataFrame, path: str, storage: Optional[Storage] = Non
         path (str): Caminho relativo para salvar.
         storage (Storage, optional): Instância para I/O.
     """
-    if storage is None:
-        storage = Storage(use_s3=USE_S3)
+    storage = storage or get_default_storage()
     full_path = get_full_path(path)
     storage.write_parquet(df, full_path)
     logger.info("💾 [Utils] DataFrame salvo em: %s | Linhas: %d", full_path, len(df))
@@ -104,8 +355,7 @@ def load_dataframe(path: str, storage: Optional[Storage] = None) -> pd.DataFrame
     Returns:
         pd.DataFrame: Dados carregados.
     """
-    if storage is None:
-        storage = Storage(use_s3=USE_S3)
+    storage = storage or get_default_storage()
     full_path = get_full_path(path)
     df = storage.read_parquet(full_path)
     logger.info("📂 [Utils] DataFrame carregado de: %s | Linhas: %d", full_path, len(df))
@@ -0,0 +1,548 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_integer_dtype
+
+from src.config import DATA_PATH, USE_S3, configure_mlflow, logger
+from src.data.candidate_store import CandidateStore
+from src.data.data_loader import load_data_for_prediction
+from src.data.history_index import UserHistoryIndex, load_history_index
+from src.data.id_dictionary import (
+    UNKNOWN_CODE,
+    IdDictionary,
+    load_id_dictionary,
+    normalize_ids,
+)
+from src.data.serving_bundle import AffinityTables, load_model_bundle
+from src.predict.constants import (
+    AFFINITY_COLUMNS,
+    CANDIDATE_TIME_COLUMN,
+    CLIENT_FEATURES_COLUMNS,
+    NEWS_FEATURES_COLUMNS,
+)
+from src.train.core import load_model_from_mlflow
+
+BATCH_OUTPUT_DIR = os.path.join("data", "predictions", "batch")
+VALIDATION_CSV = "challenge-webmedia-e-globo-2023/val_data/validacao.csv"
+# Prefixo "_" faz o arquivo ser ignorado por `read_parquet(output_dir)`
+MANIFEST_FILE = "_manifest.json"
+FEATURE_COLUMNS = CLIENT_FEATURES_COLUMNS + NEWS_FEATURES_COLUMNS
+# Posição de cada coluna `rel*` em FEATURE_COLUMNS (preenchidas por usuário)
+REL_POSITIONS = [FEATURE_COLUMNS.index(rel_col) for rel_col in AFFINITY_COLUMNS.values()]
+
+# Estado de cada processo worker (preenchido por `_init_worker`)
+_WORKER: Dict[str, Any] = {}
+
+
+class SharedArray:
+    """
+    Array NumPy em `multiprocessing.shared_memory`, compartilhado sem cópia
+    entre o processo principal e os workers.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, shape: Tuple[int, ...], dtype: str):
+        self.shm = shm
+        self.array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+    @classmethod
+    def create(cls, array: np.ndarray) -> "SharedArray":
+        """
+        Copia `array` para um novo bloco de memória compartilhada.
+
+        Args:
+            array (np.ndarray): Dados a compartilhar.
+
+        Returns:
+            SharedArray: Bloco criado (o processo principal deve chamar `unlink`).
+        """
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        shared = cls(shm, array.shape, array.dtype.str)
+        shared.array[...] = array
+        return shared
+
+    @classmethod
+    def attach(cls, spec: Tuple[str, Tuple[int, ...], str]) -> "SharedArray":
+        """
+        Abre, em um worker, um bloco criado por `create`.
+
+        Args:
+            spec (Tuple): Retorno de `spec` (nome, shape, dtype).
+
+        Returns:
+            SharedArray: Visão somente leitura sobre o bloco.
+        """
+        name, shape, dtype = spec
+        shared = cls(shared_memory.SharedMemory(name=name), shape, dtype)
+        shared.array.flags.writeable = False
+        return shared
+
+    @property
+    def spec(self) -> Tuple[str, Tuple[int, ...], str]:
+        return self.shm.name, self.array.shape, self.array.dtype.str
+
+    def close(self) -> None:
+        self.array = None
+        self.shm.close()
+
+    def unlink(self) -> None:
+        self.close()
+        self.shm.unlink()
+
+
+def shard_users(user_ids: Sequence[str], shard_size: int) -> List[np.ndarray]:
+    """
+    Divide os usuários (ordenados e sem duplicatas) em shards de tamanho fixo.
+
+    A ordenação garante que o mesmo conjunto de usuários gere sempre os mesmos
+    shards, o que permite retomar uma execução interrompida.
+
+    Args:
+        user_ids (Sequence[str]): Usuários a pontuar.
+        shard_size (int): Usuários por shard.
+
+    Returns:
+        List[np.ndarray]: Lista de shards.
+    """
+    users = np.unique(normalize_ids(pd.Series(user_ids)).to_numpy())
+    return [users[start : start + shard_size] for start in range(0, len(users), shard_size)]
+
+
+def part_path(output_dir: str, shard_id: int) -> str:
+    """Caminho do arquivo Parquet de um shard."""
+    return os.path.join(output_dir, f"part-{shard_id:05d}.parquet")
+
+
+def _tmp_part_path(output_dir: str, shard_id: int) -> str:
+    """
+    Caminho temporário de um shard em gravação. O prefixo "." faz o arquivo
+    ser ignorado por `read_parquet(output_dir)` caso um worker morra no meio.
+    """
+    return os.path.join(output_dir, f".part-{shard_id:05d}.parquet.tmp-{os.getpid()}")
+
+
+def _run_manifest(
+    shards: List[np.ndarray], page_ids: np.ndarray, model_version: Optional[str], **params: Any
+) -> Dict[str, Any]:
+    """
+    Identifica o que gerou os shards: usuários, candidatos, modelo e parâmetros.
+    """
+    digests = {}
+    for name, values in (("users", np.concatenate(shards or [[]])), ("pages", page_ids)):
+        hashes = pd.util.hash_pandas_object(pd.Series(values, dtype=object), index=False)
+        digests[name] = hashlib.sha256(hashes.to_numpy().tobytes()).hexdigest()
+    return {**digests, "model_version": model_version, **params}
+
+
+def _prepare_output_dir(output_dir: str, manifest: Dict[str, Any]) -> None:
+    """
+    Prepara `output_dir` para a execução descrita por `manifest`.
+
+    Arquivos temporários de workers interrompidos são apagados. Os shards já
+    gravados só são mantidos (e retomados) se o manifesto salvo for igual ao
+    atual; caso contrário, são descartados antes de pontuar novamente.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    for tmp_path in glob.glob(os.path.join(output_dir, ".part-*.parquet.tmp-*")):
+        os.remove(tmp_path)
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    previous = None
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            previous = json.load(f)
+    if previous != manifest:
+        stale = glob.glob(os.path.join(output_dir, "part-*.parquet"))
+        if stale:
+            logger.info(
+                "🧹 [Batch] Execução anterior diferente; descartando %d shards.", len(stale)
+            )
+        for path in stale:
+            os.remove(path)
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f, sort_keys=True)
+
+
+def _init_worker(
+    candidates_spec: Tuple[str, Tuple[int, ...], str],
+    page_ids: np.ndarray,
+    page_codes: Optional[np.ndarray],
+    clients_df: pd.DataFrame,
+    model: Any,
+    history_index: Optional[UserHistoryIndex],
+    fallback: List[str],
+    n: int,
+    score_threshold: float,
+    affinity: Optional[AffinityTables] = None,
+    categories: Optional[pd.DataFrame] = None,
+) -> None:
+    """
+    Inicializa o estado do worker: anexa a matriz de candidatos compartilhada
+    e indexa as features dos clientes por userId. Com `affinity`, guarda as
+    colunas de categoria dos candidatos (alinhadas com `page_ids`) para
+    calcular as colunas `rel*` de cada usuário.
+    """
+    clients = clients_df.drop_duplicates("userId")
+    _WORKER.update(
+        candidates=SharedArray.attach(candidates_spec),
+        page_ids=page_ids,
+        page_codes=page_codes,
+        client_index=pd.Index(normalize_ids(clients["userId"])),
+        client_matrix=clients[CLIENT_FEATURES_COLUMNS].to_numpy(dtype=np.float32),
+        model=model,
+        history_index=history_index,
+        fallback=fallback,
+        n=n,
+        score_threshold=score_threshold,
+        affinity=affinity,
+        categories=categories,
+    )
+
+
+def _score_user(user_id: str, client_pos: int) -> Tuple[List[str], List[float], bool]:
+    """
+    Pontua todos os candidatos não lidos por um usuário e retorna o top-N.
+
+    Returns:
+        Tuple: pageIds recomendados, scores e flag de cold start.
+    """
+    if client_pos < 0:
+        fallback = _WORKER["fallback"]
+        return fallback, [np.nan] * len(fallback), True
+
+    candidates = _WORKER["candidates"].array
+    keep = np.arange(len(candidates))
+    history_index = _WORKER["history_index"]
+    if history_index is not None:
+        keep = np.flatnonzero(~history_index.seen_mask(user_id, _WORKER["page_codes"]))
+
+    n_clients = len(CLIENT_FEATURES_COLUMNS)
+    X = np.empty((len(keep), len(FEATURE_COLUMNS)), dtype=np.float32)
+    X[:, :n_clients] = _WORKER["client_matrix"][client_pos]
+    X[:, n_clients:] = candidates[keep]
+    affinity = _WORKER["affinity"]
+    if affinity is not None:
+        rel = affinity.user_features(user_id, _WORKER["categories"].iloc[keep])
+        X[:, REL_POSITIONS] = rel[list(AFFINITY_COLUMNS.values())].to_numpy(dtype=np.float32)
+    scores = np.asarray(_WORKER["model"].predict(pd.DataFrame(X, columns=FEATURE_COLUMNS)))
+
+    selected = np.flatnonzero(scores >= _WORKER["score_threshold"])
+    top = selected[np.argsort(-scores[selected], kind="stable")[: _WORKER["n"]]]
+    return list(_WORKER["page_ids"][keep[top]]), scores[top].tolist(), False
+
+
+def _score_shard(shard_id: int, user_ids: np.ndarray, output_dir: str) -> Tuple[int, int, float]:
+    """
+    Pontua um shard de usuários e grava `part-<shard>.parquet` atomicamente
+    (arquivo temporário + rename), para que um shard incompleto nunca seja
+    confundido com um shard concluído ao retomar.
+
+    Returns:
+        Tuple[int, int, float]: Shard, usuários processados e tempo (s).
+    """
+    start = time.time()
+    rows = []
+    client_positions = _WORKER["client_index"].get_indexer(user_ids)
+    for user_id, client_pos in zip(user_ids, client_positions):
+        page_ids, scores, cold_start = _score_user(user_id, client_pos)
+        for rank, (page_id, score) in enumerate(zip(page_ids, scores), start=1):
+            rows.append((user_id, rank, page_id, score, cold_start))
+        if not page_ids:
+            rows.append((user_id, 0, None, np.nan, cold_start))
+
+    part = pd.DataFrame(rows, columns=["userId", "rank", "pageId", "score", "coldStart"])
+    tmp_path = _tmp_part_path(output_dir, shard_id)
+    part.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, part_path(output_dir, shard_id))
+    return shard_id, len(user_ids), time.time() - start
+
+
+def _cold_start_fallback(news_df: pd.DataFrame, n: int) -> List[str]:
+    """
+    Recomendações para usuários sem features: as notícias mais recentes.
+    """
+    if CANDIDATE_TIME_COLUMN in news_df.columns:
+        news_df = news_df.sort_values(CANDIDATE_TIME_COLUMN, ascending=False, kind="stable")
+    return normalize_ids(news_df["pageId"].head(n)).tolist()
+
+
+def score_users(
+    user_ids: Sequence[str],
+    clients_features_df: pd.DataFrame,
+    news_features_df: pd.DataFrame,
+    model: Any,
+    output_dir: str = BATCH_OUTPUT_DIR,
+    history_index: Optional[UserHistoryIndex] = None,
+    n: int = 5,
+    score_threshold: float = 15,
+    shard_size: int = 1000,
+    max_workers: int = 1,
+    max_age_hours: Optional[float] = None,
+    model_version: Optional[str] = None,
+    affinity: Optional[AffinityTables] = None,
+) -> Dict[str, float]:
+    """
+    Gera recomendações offline para uma lista de usuários.
+
+    Os usuários são divididos em shards e distribuídos em um pool de processos.
+    A matriz de features dos candidatos é copiada uma única vez para memória
+    compartilhada e lida pelos workers sem cópia. Cada shard concluído vira um
+    arquivo `part-<shard>.parquet` em `output_dir` (colunas userId, rank,
+    pageId, score, coldStart). Um manifesto (`_manifest.json`) registra os
+    usuários, os candidatos, a versão do modelo e os parâmetros da execução:
+    se forem os mesmos, shards já gravados são pulados, de modo que
+    reexecutar o comando retoma uma execução interrompida; se mudarem, os
+    shards antigos são descartados.
+
+    Com `affinity` (serving bundle), as colunas `rel*` de cada candidato são
+    calculadas para cada usuário, como em `predict_for_userId`; sem ele, são
+    usados os valores de `news_features_df`.
+
+    Args:
+        user_ids (Sequence[str]): Usuários a pontuar.
+        clients_features_df (pd.DataFrame): Features por userId.
+        news_features_df (pd.DataFrame): Features das notícias candidatas.
+        model: Modelo com `predict(DataFrame)`.
+        output_dir (str): Diretório do dataset Parquet de saída.
+        history_index (UserHistoryIndex, optional): Exclui notícias já lidas.
+        n (int): Recomendações por usuário.
+        score_threshold (float): Score mínimo.
+        shard_size (int): Usuários por shard.
+        max_workers (int): Processos do pool (1 executa no processo atual).
+        max_age_hours (float, optional): Janela de frescor dos candidatos.
+        model_version (str, optional): Versão do modelo no manifesto (padrão:
+            `run_id` dos metadados do modelo MLflow, se houver).
+        affinity (AffinityTables, optional): Afinidade usuário-categoria.
+
+    Returns:
+        Dict[str, float]: Shards e usuários processados/pulados, tempo e usuários/s.
+    """
+    start = time.time()
+    shards = shard_users(user_ids, shard_size)
+
+    # Um candidato por pageId, na janela de frescor
+    news = news_features_df.drop_duplicates("pageId").reset_index(drop=True)
+    news["pageId"] = normalize_ids(news["pageId"])
+    if max_age_hours is not None and CANDIDATE_TIME_COLUMN in news.columns:
+        store = CandidateStore(news, time_column=CANDIDATE_TIME_COLUMN)
+        news = store.news_df.iloc[store.select(max_age_hours)].reset_index(drop=True)
+    page_ids = news["pageId"].to_numpy()
+    page_codes = history_index.encode_pages(page_ids) if history_index is not None else None
+
+    if model_version is None:
+        model_version = getattr(getattr(model, "metadata", None), "run_id", None)
+    manifest = _run_manifest(
+        shards,
+        page_ids,
+        model_version,
+        shard_size=shard_size,
+        n=n,
+        score_threshold=score_threshold,
+        max_age_hours=max_age_hours,
+        affinity=affinity is not None,
+    )
+    _prepare_output_dir(output_dir, manifest)
+    pending = [i for i in range(len(shards)) if not os.path.exists(part_path(output_dir, i))]
+    skipped_users = sum(len(shard) for shard in shards) - sum(len(shards[i]) for i in pending)
+    logger.info(
+        "📦 [Batch] %d usuários em %d shards | %d shards pendentes",
+        sum(len(shard) for shard in shards),
+        len(shards),
+        len(pending),
+    )
+
+    # Sem `rel*` no catálogo (bundle), as colunas ficam NaN até o cálculo por usuário
+    candidate_matrix = news.reindex(columns=NEWS_FEATURES_COLUMNS).to_numpy(dtype=np.float32)
+    candidates = SharedArray.create(candidate_matrix)
+    categories = None
+    if affinity is not None:
+        categories = news[[col for col in AFFINITY_COLUMNS if col in news.columns]]
+    init_args = (
+        candidates.spec,
+        page_ids,
+        page_codes,
+        clients_features_df[["userId"] + CLIENT_FEATURES_COLUMNS],
+        model,
+        history_index,
+        _cold_start_fallback(news, n),
+        n,
+        score_threshold,
+        affinity,
+        categories,
+    )
+    done_users = 0
+    try:
+        if max_workers <= 1:
+            _init_worker(*init_args)
+            results = (_score_shard(i, shards[i], output_dir) for i in pending)
+            done_users = _log_progress(results, len(pending), start)
+        else:
+            with ProcessPoolExecutor(
+                max_workers=max_workers, initializer=_init_worker, initargs=init_args
+            ) as pool:
+                futures = [pool.submit(_score_shard, i, shards[i], output_dir) for i in pending]
+                done_users = _log_progress(
+                    (future.result() for future in as_completed(futures)), len(pending), start
+                )
+    finally:
+        if "candidates" in _WORKER:
+            _WORKER.pop("candidates").close()
+        candidates.unlink()
+
+    elapsed = time.time() - start
+    stats = {
+        "shards": len(shards),
+        "scored_users": done_users,
+        "skipped_users": skipped_users,
+        "elapsed_s": elapsed,
+        "users_per_s": done_users / elapsed if elapsed > 0 else 0.0,
+    }
+    logger.info("✅ [Batch] Concluído: %s", stats)
+    return stats
+
+
+def _log_progress(results, total_shards: int, start: float) -> int:
+    """
+    Consome os resultados dos shards registrando a vazão em usuários/s.
+
+    Returns:
+        int: Total de usuários processados.
+    """
+    done_users = 0
+    for done, (shard_id, n_users, shard_time) in enumerate(results, start=1):
+        done_users += n_users
+        elapsed = time.time() - start
+        logger.info(
+            "⏱️ [Batch] Shard %d (%d usuários, %.2fs) | %d/%d shards | %.1f usuários/s",
+            shard_id,
+            n_users,
+            shard_time,
+            done,
+            total_shards,
+            done_users / elapsed if elapsed > 0 else 0.0,
+        )
+    return done_users
+
+
+def write_submission(
+    output_dir: str, csv_path: str, id_dictionary: Optional[IdDictionary] = None
+) -> pd.DataFrame:
+    """
+    Gera o CSV no formato de submissão do Kaggle (userId, acessos_futuros) a
+    partir dos shards gravados por `score_users`.
+
+    Args:
+        output_dir (str): Diretório com os arquivos `part-*.parquet`.
+        csv_path (str): Caminho do CSV de saída.
+        id_dictionary (IdDictionary, optional): Decodifica shards gravados com
+            códigos int32 de userId/pageId.
+
+    Returns:
+        pd.DataFrame: Submissão gerada.
+    """
+    parts = pd.read_parquet(output_dir, columns=["userId", "rank", "pageId"])
+    if id_dictionary is not None:
+        # Linhas sem recomendação têm pageId nulo, que é decodificado como None
+        page_codes = parts["pageId"].fillna(UNKNOWN_CODE).astype(np.int64)
+        parts["pageId"] = id_dictionary.decode("pageId", page_codes)
+        parts["userId"] = id_dictionary.decode("userId", parts["userId"])
+    parts = parts.sort_values(["userId", "rank"], kind="stable")
+    submission = (
+        parts.dropna(subset=["pageId"])
+        .groupby("userId", sort=True)["pageId"]
+        .agg(list)
+        .reindex(parts["userId"].unique(), fill_value=[])
+        .rename("acessos_futuros")
+        .reset_index()
+    )
+    submission["acessos_futuros"] = submission["acessos_futuros"].map(str)
+    os.makedirs(os.path.dirname(csv_path) or ".", exist_ok=True)
+    submission.to_csv(csv_path, index=False)
+    logger.info("📝 [Batch] Submissão salva em %s: %d usuários", csv_path, len(submission))
+    return submission
+
+
+def load_user_ids(source: str, clients_features_df: pd.DataFrame, storage=None) -> np.ndarray:
+    """
+    Lista os usuários a pontuar.
+
+    Args:
+        source (str): "all" (todos os usuários com features) ou "validation"
+            (usuários do CSV de validação).
+        clients_features_df (pd.DataFrame): Features por userId.
+        storage: Instância de storage (usada em "validation").
+
+    Returns:
+        np.ndarray: userIds.
+    """
+    if source == "all":
+        return normalize_ids(clients_features_df["userId"]).unique()
+    if source == "validation":
+        if storage is None:
+            from src.storage.io import Storage as _Storage
+
+            storage = _Storage(use_s3=USE_S3)
+        val_df = storage.read_csv(os.path.join(DATA_PATH, VALIDATION_CSV), usecols=["userId"])
+        return val_df["userId"].astype(str).unique()
+    raise ValueError(f"Fonte de usuários inválida: {source}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Geração de recomendações em lote.")
+    parser.add_argument("--users", choices=["all", "validation"], default="all")
+    parser.add_argument("--output-dir", default=BATCH_OUTPUT_DIR)
+    parser.add_argument("--submission", default=None, help="CSV de submissão (opcional).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--shard-size", type=int, default=1000)
+    parser.add_argument("--n", type=int, default=5)
+    parser.add_argument("--score-threshold", type=float, default=15)
+    parser.add_argument("--max-age-hours", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    logger.info("=== 🚀 [Batch] Iniciando Predição em Lote ===")
+    configure_mlflow()
+    model = load_model_from_mlflow()
+    run_id = getattr(getattr(model, "metadata", None), "run_id", None)
+    data = load_model_bundle(run_id=run_id)
+    if data is None:
+        logger.warning("⚠️ [Batch] Sem serving bundle; usando as features rel* do treino.")
+        data = load_data_for_prediction()
+    clients_features_df = data["clients_features"]
+    history_index = load_history_index()
+    user_ids = load_user_ids(args.users, clients_features_df)
+    id_dictionary = None
+    if is_integer_dtype(clients_features_df["userId"]):
+        id_dictionary = load_id_dictionary()
+        if not is_integer_dtype(user_ids):
+            # Só IDs em texto (ex.: validação) são codificados; usuários fora do
+            # dicionário recebem códigos novos (só em memória)
+            user_ids = id_dictionary.encode("userId", user_ids, extend=True)
+
+    score_users(
+        user_ids,
+        clients_features_df,
+        data["news_features"],
+        model,
+        output_dir=args.output_dir,
+        history_index=history_index,
+        n=args.n,
+        score_threshold=args.score_threshold,
+        shard_size=args.shard_size,
+        max_workers=args.workers,
+        max_age_hours=args.max_age_hours,
+        affinity=data.get("affinity"),
+    )
+    if args.submission:
+        write_submission(args.output_dir, args.submission, id_dictionary)
+    logger.info("=== ✅ [Batch] Predição em Lote Finalizada ===")
+
+
+if __name__ == "__main__":
+    main()
@@ -37,3 +37,15 @@ METADATA_COLS = [
     "issuedDate", 
     "issuedTime"
 ]
+
+CANDIDATE_TIME_COLUMN = "issuedDatetime"
+
+CANDIDATE_FILTER_COLUMNS = ["themeMain", "themeSub", "localState", "localRegion"]
+
+# Colunas de categoria -> feature de afinidade do usuário (tabelas do serving bundle)
+AFFINITY_COLUMNS = {
+    "localState": "relLocalState",
+    "localRegion": "relLocalRegion",
+    "themeMain": "relThemeMain",
+    "themeSub": "relThemeSub",
+}
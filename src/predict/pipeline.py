@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import datetime
 import time
@@ -5,10 +6,16 @@ from typing import Tuple, List, Dict, Any, Optional
 from functools import lru_cache
 
 from src.data.data_loader import load_data_for_prediction, get_client_features, get_predicted_news
-from src.config import logger, configure_mlflow
+from src.data.candidate_store import CandidateStore
+from src.data.history_index import UserHistoryIndex, load_history_index
+from src.data.serving_bundle import AffinityTables
+from src.config import configure_logger, configure_mlflow, logger
 from src.train.core import load_model_from_mlflow
 from src.predict.constants import CLIENT_FEATURES_COLUMNS, NEWS_FEATURES_COLUMNS
 
+# Logs emitidos a cada requisição (amostrados via LOG_SAMPLE_RATES)
+request_logger = configure_logger("predict.request")
+
 
 def validate_features(df: pd.DataFrame, required_cols: List[str], source: str) -> None:
     """Valida as colunas necessárias no DataFrame"""
@@ -20,11 +27,24 @@ def validate_features(df: pd.DataFrame, required_cols: List[str], source: str) -
 
 
 def build_model_input(
-    userId: str, clients_features_df: pd.DataFrame, news_features_df: pd.DataFrame
+    userId: str,
+    clients_features_df: pd.DataFrame,
+    news_features_df: pd.DataFrame,
+    history_index: Optional[UserHistoryIndex] = None,
+    candidate_positions: Optional[np.ndarray] = None,
+    affinity: Optional[AffinityTables] = None,
+    page_codes: Optional[np.ndarray] = None,
 ) -> Tuple[pd.DataFrame, pd.DataFrame]:
     """
     Constrói o input final para o modelo baseado no usuário.
     Versão otimizada para melhorar performance.
+
+    Se `candidate_positions` for informado, apenas essas linhas de
+    `news_features_df` são consideradas (ex.: janela de frescor). Se
+    `history_index` for informado, as notícias já lidas pelo usuário são
+    removidas dos candidatos por meio de uma máscara vetorizada. Se `affinity`
+    for informado (serving bundle), as colunas `rel*` são calculadas para o
+    usuário a partir das tabelas de afinidade.
     """
     start_time = time.time()
 
@@ -35,19 +55,34 @@ def build_model_input(
         return pd.DataFrame(), pd.DataFrame()
 
     client_get_time = time.time() - start_time
-    logger.debug(f"Tempo para obter features do cliente: {client_get_time:.3f}s")
+    request_logger.debug("Tempo para obter features do cliente: %.3fs", client_get_time)
 
     # Cria o DataFrame do cliente uma única vez com apenas as colunas necessárias
     client_df = pd.DataFrame([{col: client_feat[col] for col in CLIENT_FEATURES_COLUMNS}])
 
-    # Supondo que todas as notícias estão disponíveis para recomendação
-    non_viewed = news_features_df.copy()
+    if candidate_positions is not None:
+        candidates = news_features_df.iloc[candidate_positions]
+        page_codes = page_codes[candidate_positions] if page_codes is not None else None
+    else:
+        candidates = news_features_df
+
+    if history_index is not None:
+        if page_codes is None:
+            page_codes = history_index.encode_pages(candidates["pageId"])
+        seen = history_index.seen_mask(userId, page_codes)
+        non_viewed = candidates[~seen]
+    else:
+        # Sem índice de histórico, todos os candidatos estão disponíveis para recomendação
+        non_viewed = candidates.copy()
     if non_viewed.empty:
         logger.warning("⚠️ [Predict] Nenhuma notícia disponível para o usuário %s.", userId)
         return pd.DataFrame(), non_viewed
 
     prep_time = time.time()
 
+    if affinity is not None:
+        non_viewed = affinity.user_features(userId, non_viewed)
+
     # Extrai apenas as colunas necessárias das notícias (evita cópia desnecessária de dados)
     news_features = non_viewed[NEWS_FEATURES_COLUMNS].reset_index(drop=True)
 
@@ -64,7 +99,7 @@ def build_model_input(
     # Agora criamos um DataFrame diretamente com essas colunas sem usar concat
     client_features_repeated = pd.DataFrame(client_cols)
 
-    logger.debug(f"Tempo para preparar dataframes: {time.time() - prep_time:.3f}s")
+    request_logger.debug("Tempo para preparar dataframes: %.3fs", time.time() - prep_time)
 
     merge_time = time.time()
 
@@ -80,10 +115,10 @@ def build_model_input(
     for col in NEWS_FEATURES_COLUMNS:
         final_input[col] = news_features[col]
 
-    logger.debug(f"Tempo para merge: {time.time() - merge_time:.3f}s")
+    request_logger.debug("Tempo para merge: %.3fs", time.time() - merge_time)
 
     total_time = time.time() - start_time
-    logger.info(
+    request_logger.info(
         "✅ [Predict] Input final preparado em %.3fs: %d registros", total_time, len(final_input)
     )
 
@@ -179,7 +214,9 @@ def _generate_cold_start_recommendations(
             }
         )
 
-    logger.debug(f"Cold start recommendations generated in: {time.time() - start_time:.3f}s")
+    request_logger.debug(
+        "Cold start recommendations generated in: %.3fs", time.time() - start_time
+    )
     return recommendations
 
 
@@ -236,7 +273,7 @@ def _generate_normal_recommendations(
             }
         )
 
-    logger.debug(f"Normal recommendations generated in: {time.time() - start_time:.3f}s")
+    request_logger.debug("Normal recommendations generated in: %.3fs", time.time() - start_time)
     return recommendations
 
 
@@ -247,32 +284,73 @@ def predict_for_userId(
     model,
     n: int = 5,
     score_threshold: float = 15,
+    history_index: Optional[UserHistoryIndex] = None,
+    candidate_store: Optional[CandidateStore] = None,
+    max_age_hours: Optional[float] = None,
+    filters: Optional[Dict[str, List[str]]] = None,
+    affinity: Optional[AffinityTables] = None,
+    page_codes: Optional[np.ndarray] = None,
 ) -> Tuple[List[Dict[str, Any]], bool]:
     """
     Versão otimizada para realizar a predição e gerar recomendações para o usuário.
+    Se `history_index` for informado, notícias já lidas não são recomendadas.
+    Se `candidate_store` for informado, o catálogo do store substitui
+    `news_features_df` e apenas notícias publicadas há no
+    máximo `max_age_hours` e que atendem a `filters` (ex.: {"themeMain":
+    ["esportes"]}) são pontuadas.
+    Se `affinity` for informado, as features `rel*` são calculadas por usuário.
+    `page_codes` são os códigos dos pageIds de `news_features_df` no
+    `history_index` (com `candidate_store`, são usados os do store).
     """
     start_total = time.time()
 
+    candidate_positions = None
+    if candidate_store is not None:
+        # Catálogo, posições e códigos lidos juntos (o store pode receber notícias novas)
+        with candidate_store.lock:
+            news_features_df, candidate_positions = candidate_store.select_candidates(
+                max_age_hours, filters=filters
+            )
+            page_codes = candidate_store.page_codes
+    elif filters and any(filters.values()):
+        logger.error("🚨 [Predict] Filtros por atributo exigem um CandidateStore.")
+        raise ValueError("Filtros por atributo exigem um CandidateStore.")
+
     # Tenta obter as features do cliente
     client_feat = get_client_features(userId, clients_features_df)
 
-    # Se não encontrar e o userId tiver tamanho indicativo de hash, assume cold start
-    if client_feat is None and len(userId) >= 64:
-        logger.info(
+    # Se não encontrar e o userId tiver tamanho indicativo de hash (ou for um
+    # código do dicionário de IDs), assume cold start
+    is_valid_id = not isinstance(userId, str) or len(userId) >= 64
+    if client_feat is None and is_valid_id:
+        request_logger.info(
             "❄️ [Predict] Usuário %s não encontrado (hash válido). Assumindo cold start.", userId
         )
-        recommendations = _generate_cold_start_recommendations(news_features_df, n)
+        cold_start_news = (
+            news_features_df
+            if candidate_positions is None
+            else news_features_df.iloc[candidate_positions]
+        )
+        recommendations = _generate_cold_start_recommendations(cold_start_news, n)
         total_time = time.time() - start_total
-        logger.info(f"Predição cold start concluída em {total_time:.3f}s")
+        request_logger.info("Predição cold start concluída em %.3fs", total_time)
         return recommendations, True
 
     # Fluxo normal de predição
     start_input = time.time()
-    final_input, non_viewed = build_model_input(userId, clients_features_df, news_features_df)
+    final_input, non_viewed = build_model_input(
+        userId,
+        clients_features_df,
+        news_features_df,
+        history_index=history_index,
+        candidate_positions=candidate_positions,
+        affinity=affinity,
+        page_codes=page_codes,
+    )
     input_time = time.time() - start_input
 
     if final_input.empty:
-        logger.info("🙁 [Predict] Nenhum input construído para o usuário %s.", userId)
+        request_logger.info("🙁 [Predict] Nenhum input construído para o usuário %s.", userId)
         return [], False
 
     # Medição do tempo de predição do modelo
@@ -280,7 +358,7 @@ def predict_for_userId(
     scores = model.predict(final_input)
     predict_time = time.time() - start_predict
 
-    logger.info(
+    request_logger.info(
         "🔮 [Predict] Predição realizada para o usuário %s com %d scores em %.3fs.",
         userId,
         len(scores),
@@ -295,7 +373,7 @@ def predict_for_userId(
     rec_time = time.time() - start_rec
 
     total_time = time.time() - start_total
-    logger.info(
+    request_logger.info(
         "⏱️ [Predict] Tempos: input=%.3fs, predição=%.3fs, recomendações=%.3fs, total=%.3fs",
         input_time,
         predict_time,
@@ -313,6 +391,8 @@ def main():
     news_features_df = data["news_features"]
     clients_features_df = data["clients_features"]
 
+    history_index = load_history_index()
+
     configure_mlflow()
     model = load_model_from_mlflow()
 
@@ -321,7 +401,7 @@ def main():
 
     start_time = time.time()
     recommendations, is_cold_start = predict_for_userId(
-        userId, clients_features_df, news_features_df, model
+        userId, clients_features_df, news_features_df, model, history_index=history_index
     )
     elapsed = time.time() - start_time
 
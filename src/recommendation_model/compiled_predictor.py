@@ -0,0 +1,210 @@
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+ZERO_THRESHOLD = 1e-35
+
+
+class CompiledTreePredictor:
+    """
+    Avalia um ensemble de árvores do LightGBM com arrays NumPy achatados.
+
+    Os nós de todas as árvores (internos e folhas) são concatenados em arrays
+    únicos: feature, threshold, filhos e valor da folha. As folhas apontam para
+    si mesmas, então a travessia avança todas as árvores de todas as linhas ao
+    mesmo tempo por `max_depth` níveis, sem desvios por linha.
+
+    A semântica de valores ausentes segue o LightGBM: em nós `missing_type=None`
+    NaN vira 0.0; em `Zero`, zeros (e NaN) seguem o lado padrão; em `NaN`, só
+    NaN segue o lado padrão.
+    """
+
+    def __init__(
+        self,
+        roots: np.ndarray,
+        split_feature: np.ndarray,
+        threshold: np.ndarray,
+        left_child: np.ndarray,
+        right_child: np.ndarray,
+        nan_left: np.ndarray,
+        zero_default: np.ndarray,
+        default_left: np.ndarray,
+        leaf_value: np.ndarray,
+        max_depth: int,
+        num_features: int,
+        average_output: bool = False,
+    ):
+        self.roots = roots
+        self.split_feature = split_feature
+        self.threshold = threshold
+        self.left_child = left_child
+        self.right_child = right_child
+        self.nan_left = nan_left
+        self.zero_default = zero_default
+        self.default_left = default_left
+        self.leaf_value = leaf_value
+        self.max_depth = max_depth
+        self.num_features = num_features
+        self.average_output = average_output
+
+    @classmethod
+    def from_booster(cls, booster: Any) -> "CompiledTreePredictor":
+        """
+        Exporta um `lightgbm.Booster` treinado para arrays achatados.
+
+        Args:
+            booster: Booster do LightGBM.
+
+        Returns:
+            CompiledTreePredictor: Preditor equivalente ao booster.
+        """
+        return cls.from_dump(booster.dump_model())
+
+    @classmethod
+    def from_ranker(cls, ranker: Any) -> "CompiledTreePredictor":
+        """
+        Exporta o booster de um `LightGBMRanker` treinado.
+
+        Args:
+            ranker: Instância de `LightGBMRanker`.
+
+        Returns:
+            CompiledTreePredictor: Preditor equivalente ao ranker.
+        """
+        if ranker.model is None:
+            raise ValueError("Modelo não treinado. Execute train() primeiro.")
+        return cls.from_booster(ranker.model)
+
+    @classmethod
+    def from_dump(cls, dump: Dict[str, Any]) -> "CompiledTreePredictor":
+        """
+        Constrói o preditor a partir de `Booster.dump_model()`.
+
+        Args:
+            dump (Dict[str, Any]): Modelo exportado em JSON pelo LightGBM.
+
+        Returns:
+            CompiledTreePredictor: Preditor com os arrays achatados.
+
+        Raises:
+            ValueError: Para modelos multiclasse ou com splits categóricos.
+        """
+        if dump.get("num_tree_per_iteration", 1) != 1:
+            raise ValueError("Apenas modelos com uma árvore por iteração são suportados.")
+
+        columns = (
+            "split_feature",
+            "threshold",
+            "left_child",
+            "right_child",
+            "nan_left",
+            "zero_default",
+            "default_left",
+            "leaf_value",
+        )
+        nodes: Dict[str, List[Any]] = {col: [] for col in columns}
+
+        def add_node(**values: Any) -> int:
+            node_id = len(nodes["split_feature"])
+            for col in columns:
+                nodes[col].append(values.get(col, 0))
+            return node_id
+
+        def visit(node: Dict[str, Any], depth: int) -> tuple:
+            if "leaf_value" in node:
+                node_id = add_node(leaf_value=node["leaf_value"])
+                nodes["left_child"][node_id] = nodes["right_child"][node_id] = node_id
+                return node_id, depth
+            if node["decision_type"] != "<=":
+                raise ValueError("Splits categóricos não são suportados pelo preditor compilado.")
+            missing_type = node["missing_type"]
+            threshold = node["threshold"]
+            node_id = add_node(
+                split_feature=node["split_feature"],
+                threshold=threshold,
+                # NaN segue o lado padrão, exceto em `None`, onde vira 0.0
+                nan_left=node["default_left"] if missing_type != "None" else 0.0 <= threshold,
+                zero_default=missing_type == "Zero",
+                default_left=node["default_left"],
+            )
+            left, left_depth = visit(node["left_child"], depth + 1)
+            right, right_depth = visit(node["right_child"], depth + 1)
+            nodes["left_child"][node_id] = left
+            nodes["right_child"][node_id] = right
+            return node_id, max(left_depth, right_depth)
+
+        visited = [visit(tree["tree_structure"], 0) for tree in dump["tree_info"]]
+        return cls(
+            roots=np.asarray([root for root, _ in visited], dtype=np.int32),
+            split_feature=np.asarray(nodes["split_feature"], dtype=np.int32),
+            threshold=np.asarray(nodes["threshold"], dtype=np.float64),
+            left_child=np.asarray(nodes["left_child"], dtype=np.int32),
+            right_child=np.asarray(nodes["right_child"], dtype=np.int32),
+            nan_left=np.asarray(nodes["nan_left"], dtype=bool),
+            zero_default=np.asarray(nodes["zero_default"], dtype=bool),
+            default_left=np.asarray(nodes["default_left"], dtype=bool),
+            leaf_value=np.asarray(nodes["leaf_value"], dtype=np.float64),
+            max_depth=max((depth for _, depth in visited), default=0),
+            num_features=dump["max_feature_idx"] + 1,
+            average_output=bool(dump.get("average_output", False)),
+        )
+
+    def predict(self, model_input: Any) -> np.ndarray:
+        """
+        Calcula os scores no mesmo formato de `LightGBMRanker.predict`.
+
+        Args:
+            model_input: DataFrame/array com as features finais, ou dict com
+                'client_features' e 'news_features'.
+
+        Returns:
+            np.ndarray: Scores preditos (float64).
+        """
+        if isinstance(model_input, dict):
+            client_features = model_input.get("client_features")
+            news_features = model_input.get("news_features")
+            if client_features is None or news_features is None:
+                raise ValueError("Input deve ter 'client_features' e 'news_features'.")
+            model_input = np.concatenate([client_features, news_features], axis=1)
+        if isinstance(model_input, pd.DataFrame):
+            model_input = model_input.to_numpy(dtype=np.float32)
+        return self.predict_matrix(np.asarray(model_input, dtype=np.float32))
+
+    def predict_matrix(self, X: np.ndarray) -> np.ndarray:
+        """
+        Percorre todas as árvores para todas as linhas de uma matriz float32.
+
+        Args:
+            X (np.ndarray): Matriz (n_linhas, n_features).
+
+        Returns:
+            np.ndarray: Scores preditos (float64).
+        """
+        if X.ndim != 2 or X.shape[1] != self.num_features:
+            raise ValueError(f"Esperadas {self.num_features} features, recebido shape {X.shape}.")
+        X = np.ascontiguousarray(X)
+        flat_X = X.ravel()
+        row_offset = (np.arange(X.shape[0], dtype=np.int64) * X.shape[1])[:, None]
+        check_zero = bool(self.zero_default.any())
+
+        node = np.tile(self.roots, (X.shape[0], 1))
+        for _ in range(self.max_depth):
+            values = flat_X[row_offset + self.split_feature[node]]
+            go_left = values <= self.threshold[node]
+            is_nan = np.isnan(values)
+            if is_nan.any():
+                go_left = np.where(is_nan, self.nan_left[node], go_left)
+            if check_zero:
+                is_zero = self.zero_default[node] & (np.abs(values) <= ZERO_THRESHOLD)
+                go_left = np.where(is_zero, self.default_left[node], go_left)
+            node = np.where(go_left, self.left_child[node], self.right_child[node])
+
+        leaves = self.leaf_value[node]
+        scores = np.zeros(X.shape[0], dtype=np.float64)
+        # Soma na ordem das árvores, como o LightGBM
+        for tree in range(leaves.shape[1]):
+            scores += leaves[:, tree]
+        if self.average_output and leaves.shape[1]:
+            scores /= leaves.shape[1]
+        return scores
@@ -1,6 +1,11 @@
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Optional, List
+from typing import Any, BinaryIO, Iterator, Optional, List, Sequence, Tuple
+import numpy as np
 import pandas as pd
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from src.config import logger
 
 
 class BaseStorage(ABC):
@@ -97,6 +102,32 @@ class BaseStorage(ABC):
         """
         pass
 
+    @abstractmethod
+    def save_numpy(self, array: np.ndarray, path: str) -> None:
+        """
+        Salva um array NumPy em `.npy`.
+
+        Args:
+            array (np.ndarray): Array a salvar.
+            path (str): Caminho para salvar.
+        """
+        pass
+
+    @abstractmethod
+    def load_numpy(self, path: str, mmap_mode: Optional[str] = "r") -> np.ndarray:
+        """
+        Carrega um array `.npy` (localmente, com memory map se `mmap_mode`
+        for informado; no S3, o arquivo é baixado e lido em memória).
+
+        Args:
+            path (str): Caminho do arquivo.
+            mmap_mode (str, optional): Modo de memory map (None lê tudo).
+
+        Returns:
+            np.ndarray: Array carregado.
+        """
+        pass
+
     @abstractmethod
     def list_files(self, path: str, pattern: Optional[str] = None) -> List[str]:
         """
@@ -110,3 +141,141 @@ class BaseStorage(ABC):
             List[str]: Lista de arquivos.
         """
         pass
+
+    @abstractmethod
+    def open_write(self, path: str) -> BinaryIO:
+        """
+        Abre um arquivo binário para escrita incremental. O conteúdo só
+        substitui `path` ao fechar (localmente, via arquivo temporário e
+        rename; no S3, pelo upload); `discard()`, ou uma exceção dentro de um
+        bloco `with`, descarta a gravação e mantém o arquivo anterior.
+
+        Args:
+            path (str): Caminho do arquivo.
+
+        Returns:
+            BinaryIO: Arquivo aberto para escrita.
+        """
+        pass
+
+    @abstractmethod
+    def file_fingerprint(self, path: str) -> str:
+        """
+        Identificador da versão de um arquivo, usado para detectar mudanças.
+
+        Args:
+            path (str): Caminho do arquivo.
+
+        Returns:
+            str: Tamanho e data de modificação (local) ou ETag (S3).
+        """
+        pass
+
+    @abstractmethod
+    def remove(self, path: str) -> None:
+        """
+        Remove um arquivo ou diretório (no S3, a chave e tudo sob `path/`),
+        se existir.
+
+        Args:
+            path (str): Caminho do arquivo ou diretório.
+        """
+        pass
+
+    def _dataset_source(self, path: str) -> str:
+        """
+        Caminho/URI do arquivo no formato aceito por `pyarrow.dataset`.
+
+        Args:
+            path (str): Caminho do arquivo.
+
+        Returns:
+            str: Caminho local ou URI.
+        """
+        return path
+
+    def iter_parquet_batches(
+        self, path: str, batch_size: int, columns: Optional[Sequence[str]] = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Lê um Parquet em blocos de até `batch_size` linhas, sem carregar o
+        arquivo inteiro.
+
+        Args:
+            path (str): Caminho do arquivo (ou diretório de um dataset).
+            batch_size (int): Máximo de linhas por bloco.
+            columns (Sequence[str], optional): Colunas a ler (None lê todas).
+
+        Yields:
+            pd.DataFrame: Blocos na ordem do arquivo.
+        """
+        dataset = ds.dataset(self._dataset_source(path), format="parquet")
+        for batch in dataset.to_batches(columns=columns, batch_size=batch_size):
+            if batch.num_rows:
+                yield batch.to_pandas()
+
+    def read_parquet_projected(
+        self,
+        path: str,
+        columns: Optional[Sequence[str]] = None,
+        optional_columns: Sequence[str] = (),
+        filters: Optional[List[Tuple[str, str, Any]]] = None,
+    ) -> pd.DataFrame:
+        """
+        Lê um Parquet via `pyarrow.dataset` decodificando apenas as colunas
+        pedidas e os row groups que podem satisfazer `filters`.
+
+        Os bytes lidos (tamanho comprimido dos column chunks projetados nos row
+        groups mantidos) e o tempo de decodificação são registrados no log e
+        ficam em `df.attrs["read_stats"]`.
+
+        Args:
+            path (str): Caminho do arquivo (ou diretório de um dataset).
+            columns (Sequence[str], optional): Colunas obrigatórias (None lê todas).
+            optional_columns (Sequence[str]): Colunas lidas apenas se existirem.
+            filters (List[Tuple], optional): Predicados no formato do
+                `pd.read_parquet` (ex.: [("pageId", "in", ids)]).
+
+        Returns:
+            pd.DataFrame: Dados lidos.
+        """
+        start = time.time()
+        dataset = ds.dataset(self._dataset_source(path), format="parquet")
+        if columns is not None:
+            columns = list(columns) + [
+                col
+                for col in optional_columns
+                if col in dataset.schema.names and col not in columns
+            ]
+        expression = pq.filters_to_expression(filters) if filters else None
+
+        bytes_read = 0
+        for fragment in dataset.get_fragments(filter=expression):
+            metadata = fragment.metadata
+            for row_group in fragment.split_by_row_group(expression):
+                rg_metadata = metadata.row_group(row_group.row_groups[0].id)
+                for i in range(rg_metadata.num_columns):
+                    chunk = rg_metadata.column(i)
+                    if columns is None or chunk.path_in_schema.split(".")[0] in columns:
+                        bytes_read += chunk.total_compressed_size
+
+        decode_start = time.time()
+        table = dataset.to_table(columns=columns, filter=expression)
+        df = table.to_pandas()
+        stats = {
+            "bytes_read": bytes_read,
+            "rows": len(df),
+            "columns": len(df.columns),
+            "decode_s": time.time() - decode_start,
+            "total_s": time.time() - start,
+        }
+        df.attrs["read_stats"] = stats
+        logger.info(
+            "📥 [Storage] %s: %.1f MB lidos | %d linhas x %d colunas | decodificação %.2fs",
+            path,
+            bytes_read / 1024**2,
+            stats["rows"],
+            stats["columns"],
+            stats["decode_s"],
+        )
+        return df
@@ -1,4 +1,5 @@
-from typing import Optional, List, Any
+from typing import Optional, List, Any, BinaryIO, Iterator, Sequence, Tuple
+import numpy as np
 import pandas as pd
 from src.config import get_config, USE_S3
 from .base import BaseStorage
@@ -47,6 +48,44 @@ class Storage(BaseStorage):
         """
         self._storage.write_parquet(df, path, **kwargs)
 
+    def read_parquet_projected(
+        self,
+        path: str,
+        columns: Optional[Sequence[str]] = None,
+        optional_columns: Sequence[str] = (),
+        filters: Optional[List[Tuple[str, str, Any]]] = None,
+    ) -> pd.DataFrame:
+        """
+        Lê um Parquet com projeção de colunas e filtro de row groups,
+        registrando bytes lidos e tempo de decodificação.
+
+        Args:
+            path (str): Caminho do arquivo.
+            columns (Sequence[str], optional): Colunas obrigatórias.
+            optional_columns (Sequence[str]): Colunas lidas apenas se existirem.
+            filters (List[Tuple], optional): Predicados (ex.: [("pageId", "in", ids)]).
+
+        Returns:
+            pd.DataFrame: Dados lidos.
+        """
+        return self._storage.read_parquet_projected(path, columns, optional_columns, filters)
+
+    def iter_parquet_batches(
+        self, path: str, batch_size: int, columns: Optional[Sequence[str]] = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Lê um Parquet em blocos de até `batch_size` linhas.
+
+        Args:
+            path (str): Caminho do arquivo.
+            batch_size (int): Máximo de linhas por bloco.
+            columns (Sequence[str], optional): Colunas a ler (None lê todas).
+
+        Yields:
+            pd.DataFrame: Blocos na ordem do arquivo.
+        """
+        return self._storage.iter_parquet_batches(path, batch_size, columns)
+
     def read_csv(self, path: str, **kwargs) -> pd.DataFrame:
         """
         Lê um arquivo CSV.
@@ -83,6 +122,40 @@ class Storage(BaseStorage):
         """
         return self._storage.exists(path)
 
+    def open_write(self, path: str) -> BinaryIO:
+        """
+        Abre um arquivo binário para escrita incremental.
+
+        Args:
+            path (str): Caminho do arquivo.
+
+        Returns:
+            BinaryIO: Arquivo aberto para escrita (no S3, enviado ao fechar).
+        """
+        return self._storage.open_write(path)
+
+    def remove(self, path: str) -> None:
+        """
+        Remove um arquivo ou diretório (no S3, a chave e tudo sob `path/`),
+        se existir.
+
+        Args:
+            path (str): Caminho do arquivo ou diretório.
+        """
+        self._storage.remove(path)
+
+    def file_fingerprint(self, path: str) -> str:
+        """
+        Identificador da versão de um arquivo, usado para detectar mudanças.
+
+        Args:
+            path (str): Caminho do arquivo.
+
+        Returns:
+            str: Tamanho e data de modificação (local) ou ETag (S3).
+        """
+        return self._storage.file_fingerprint(path)
+
     def save_pickle(self, obj: Any, path: str) -> None:
         """
         Salva um objeto em pickle.
@@ -105,6 +178,29 @@ class Storage(BaseStorage):
         """
         return self._storage.load_pickle(path)
 
+    def save_numpy(self, array: np.ndarray, path: str) -> None:
+        """
+        Salva um array NumPy em `.npy`.
+
+        Args:
+            array (np.ndarray): Array a salvar.
+            path (str): Caminho para salvar.
+        """
+        self._storage.save_numpy(array, path)
+
+    def load_numpy(self, path: str, mmap_mode: Optional[str] = "r") -> np.ndarray:
+        """
+        Carrega um array `.npy` (com memory map no storage local).
+
+        Args:
+            path (str): Caminho do arquivo.
+            mmap_mode (str, optional): Modo de memory map (None lê tudo).
+
+        Returns:
+            np.ndarray: Array carregado.
+        """
+        return self._storage.load_numpy(path, mmap_mode=mmap_mode)
+
     def list_files(self, path: str, pattern: Optional[str] = None) -> List[str]:
         """
         Lista arquivos em um diretório.
@@ -1,12 +1,60 @@
 import os
 import pathlib
 import pickle
-from typing import Any, Optional, List
+import shutil
+from typing import Any, BinaryIO, Optional, List
+import numpy as np
 import pandas as pd
 from src.config import logger
 from .base import BaseStorage
 
 
+class LocalAtomicFile:
+    """
+    Arquivo local gravado em um caminho temporário e movido para o destino
+    só ao fechar, para que uma gravação interrompida não substitua o arquivo
+    anterior por um incompleto.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory, name = os.path.split(path)
+        self.temp_name = os.path.join(directory, f".{name}.tmp-{os.getpid()}")
+        self.temp_file = open(self.temp_name, "wb")
+        self.closed = False
+
+    def write(self, data: bytes) -> int:
+        return self.temp_file.write(data)
+
+    def tell(self) -> int:
+        return self.temp_file.tell()
+
+    def flush(self) -> None:
+        self.temp_file.flush()
+
+    def close(self) -> None:
+        if not self.closed:
+            self.temp_file.close()
+            os.replace(self.temp_name, self.path)
+            self.closed = True
+
+    def discard(self) -> None:
+        """Descarta o que foi gravado, mantendo o arquivo anterior."""
+        if not self.closed:
+            self.temp_file.close()
+            os.unlink(self.temp_name)
+            self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
 class LocalStorage(BaseStorage):
     """
     Implementa armazenamento local via sistema de arquivos.
@@ -25,6 +73,9 @@ class LocalStorage(BaseStorage):
         path = self._normalize_local_path(path)
         return pd.read_parquet(path, **kwargs)
 
+    def _dataset_source(self, path: str) -> str:
+        return self._normalize_local_path(path)
+
     def write_parquet(self, df: pd.DataFrame, path: str, **kwargs) -> None:
         path = self._normalize_local_path(path)
         os.makedirs(os.path.dirname(path), exist_ok=True)
@@ -47,6 +98,22 @@ class LocalStorage(BaseStorage):
         path = self._normalize_local_path(path)
         return os.path.exists(path)
 
+    def open_write(self, path: str) -> BinaryIO:
+        path = self._normalize_local_path(path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return LocalAtomicFile(path)
+
+    def remove(self, path: str) -> None:
+        path = self._normalize_local_path(path)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def file_fingerprint(self, path: str) -> str:
+        stat = os.stat(self._normalize_local_path(path))
+        return f"{stat.st_size}-{stat.st_mtime_ns}"
+
     def save_pickle(self, obj: Any, path: str) -> None:
         path = self._normalize_local_path(path)
         os.makedirs(os.path.dirname(path), exist_ok=True)
@@ -64,6 +131,16 @@ class LocalStorage(BaseStorage):
             logger.error(f"Erro ao carregar {path}: {e}")
             raise
 
+    def save_numpy(self, array: np.ndarray, path: str) -> None:
+        with self.open_write(path) as f:
+            np.save(f, np.asarray(array))
+        rel_path = os.path.relpath(self._normalize_local_path(path))
+        logger.info(f"Array salvo: {rel_path}")
+
+    def load_numpy(self, path: str, mmap_mode: Optional[str] = "r") -> np.ndarray:
+        path = self._normalize_local_path(path)
+        return np.load(path, mmap_mode=mmap_mode)
+
     def list_files(self, path: str, pattern: Optional[str] = None) -> List[str]:
         path = self._normalize_local_path(path)
         try:
@@ -3,6 +3,7 @@ import tempfile
 import pickle
 import fnmatch
 from typing import Any, Optional, List, BinaryIO
+import numpy as np
 import pandas as pd
 
 try:
@@ -31,6 +32,12 @@ class S3UploadFile:
     def write(self, data: bytes) -> int:
         return self.temp_file.write(data)
 
+    def tell(self) -> int:
+        return self.temp_file.tell()
+
+    def flush(self) -> None:
+        self.temp_file.flush()
+
     def close(self) -> None:
         if not self.closed:
             self.temp_file.close()
@@ -38,11 +45,21 @@ class S3UploadFile:
             os.unlink(self.temp_name)
             self.closed = True
 
+    def discard(self) -> None:
+        """Descarta o que foi gravado sem fazer o upload."""
+        if not self.closed:
+            self.temp_file.close()
+            os.unlink(self.temp_name)
+            self.closed = True
+
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.close()
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
 
 
 class S3Storage(BaseStorage):
@@ -89,6 +106,9 @@ class S3Storage(BaseStorage):
         norm_key = self._normalize_key(path)
         return pd.read_parquet(f"s3://{self.s3_bucket}/{norm_key}", **kwargs)
 
+    def _dataset_source(self, path: str) -> str:
+        return f"s3://{self.s3_bucket}/{self._normalize_key(path)}"
+
     def write_parquet(self, df: pd.DataFrame, path: str, **kwargs) -> None:
         norm_key = self._normalize_key(path)
         df.to_parquet(f"s3://{self.s3_bucket}/{norm_key}", **kwargs)
@@ -113,6 +133,24 @@ class S3Storage(BaseStorage):
                 return False
             raise
 
+    def open_write(self, path: str) -> BinaryIO:
+        return self._get_s3_file(path, "w")
+
+    def remove(self, path: str) -> None:
+        norm_key = self._normalize_key(path)
+        keys = [norm_key]
+        paginator = self.s3_client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.s3_bucket, Prefix=norm_key.rstrip("/") + "/"):
+            keys.extend(obj["Key"] for obj in page.get("Contents", []))
+        for start in range(0, len(keys), 1000):
+            objects = [{"Key": key} for key in keys[start : start + 1000]]
+            self.s3_client.delete_objects(Bucket=self.s3_bucket, Delete={"Objects": objects})
+
+    def file_fingerprint(self, path: str) -> str:
+        norm_key = self._normalize_key(path)
+        head = self.s3_client.head_object(Bucket=self.s3_bucket, Key=norm_key)
+        return head["ETag"].strip('"')
+
     def _get_s3_file(self, path: str, mode: str) -> BinaryIO:
         norm_key = self._normalize_key(path)
         if mode.startswith("r"):
@@ -140,6 +178,21 @@ class S3Storage(BaseStorage):
             logger.error(f"Erro ao carregar s3://{self.s3_bucket}/{norm_key}: {e}")
             raise
 
+    def save_numpy(self, array: np.ndarray, path: str) -> None:
+        norm_key = self._normalize_key(path)
+        with self._get_s3_file(norm_key, "w") as f:
+            np.save(f, np.asarray(array))
+        logger.info(f"Array salvo em s3://{self.s3_bucket}/{norm_key}")
+
+    def load_numpy(self, path: str, mmap_mode: Optional[str] = "r") -> np.ndarray:
+        # Sem memory map no S3: o arquivo temporário é lido e apagado
+        f = self._get_s3_file(self._normalize_key(path), "r")
+        try:
+            return np.load(f)
+        finally:
+            f.close()
+            os.unlink(f.name)
+
     def list_files(self, path: str, pattern: Optional[str] = None) -> List[str]:
         norm_key = self._normalize_key(path)
         try:
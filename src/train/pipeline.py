@@ -1,7 +1,7 @@
 import os
 import pandas as pd
 import mlflow
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, Optional, Tuple
 
 from src.train.utils import prepare_features, load_train_data
 from src.train.core import (
@@ -10,6 +10,8 @@ from src.train.core import (
     log_metrics,
 )
 from src.evaluation.pipeline import evaluate_model
+from src.data.serving_bundle import build_serving_bundle, save_serving_bundle
+from src.predict.constants import METADATA_COLS
 from src.config import logger, DATA_PATH, USE_S3, configure_mlflow, get_config
 from src.recommendation_model.lgbm_ranker import LightGBMRanker
 from src.storage.io import Storage
@@ -80,14 +82,37 @@ def validate_and_load_train_data(
     return X_train, y_train, group_train
 
 
+def export_serving_bundle(storage: Storage, trusted_data: Dict[str, Any], version: str) -> str:
+    """
+    Gera o serving bundle (notícias, clientes, metadados e afinidades) e o
+    vincula ao run ativo do MLflow.
+    """
+    metadata_path = os.path.join(DATA_PATH, "features", "news_feats.parquet")
+    try:
+        metadata_df = storage.read_parquet_projected(metadata_path, columns=METADATA_COLS)
+    except Exception as e:
+        logger.warning("⚠️ [Train] Metadados indisponíveis para o serving bundle: %s", e)
+        metadata_df = None
+
+    bundle = build_serving_bundle(trusted_data["X_train_full"], metadata_df)
+    bundle_dir = save_serving_bundle(bundle, storage, version)
+    mlflow.set_tags({"serving_bundle_version": version, "serving_bundle_path": bundle_dir})
+    if not USE_S3:
+        mlflow.log_artifacts(bundle_dir, artifact_path="serving_bundle")
+    logger.info("📦 [Train] Serving bundle %s exportado.", version)
+    return bundle_dir
+
+
 def train_and_log_model(
     X_train: pd.DataFrame,
     y_train: pd.DataFrame,
     group_train: pd.DataFrame,
     trusted_data: Dict[str, Any],
+    storage: Optional[Storage] = None,
 ) -> None:
     """
-    Treina o modelo LightGBMRanker e registra-o no MLflow.
+    Treina o modelo LightGBMRanker e registra-o no MLflow, junto com o
+    serving bundle versionado pelo run_id.
     """
     params = get_config("MODEL_PARAMS", {})
     params.pop("threshold", None)  # Removendo 'threshold' para modelos de ranking.
@@ -103,6 +128,7 @@ def train_and_log_model(
         metrics, _ = evaluate_model(model)
         log_metrics(X_train, metrics)
         log_model_to_mlflow(model, model_name, run.info.run_id)
+        export_serving_bundle(storage or Storage(use_s3=USE_S3), trusted_data, run.info.run_id)
         logger.info("🏁 [Train] Treinamento finalizado! MLflow run_id: %s", run.info.run_id)
 
 
@@ -118,7 +144,7 @@ def train_model_pipeline() -> None:
     X_train, y_train, group_train = validate_and_load_train_data(storage)
 
     configure_mlflow()
-    train_and_log_model(X_train, y_train, group_train, trusted_data)
+    train_and_log_model(X_train, y_train, group_train, trusted_data, storage)
 
     logger.info("=== ✅ [Train] Pipeline de Treinamento Finalizado ===")
 
@@ -41,7 +41,7 @@ def prepare_features(raw_data: pd.DataFrame) -> Dict[str, Any]:
         freq = X_train[col].value_counts(normalize=True)
         encoder_mapping[col] = freq.to_dict()
         new_col = f"{col}Freq"
-        X_train[new_col] = X_train[col].map(freq)
+        X_train[new_col] = X_train[col].map(freq).astype(float)
         X_test[new_col] = X_test[col].map(freq).astype(float).fillna(0)
 
     logger.info("🗑️ [Utils] Removendo identificadores e colunas redundantes...")
@@ -67,4 +67,18 @@ def test_model_info(mock_load_mlflow_model, mock_load_prediction_data, mock_get_
     assert "metadata" in data
     assert "cache" in data
     assert data["cache"]["cache_hit"] is False
-    assert data["cache"]["cache_size"] == 0
\ No newline at end of file
+    assert data["cache"]["cache_size"] == 0
+
+def test_predict_with_filters_without_candidate_store_returns_400():
+    data = {
+        "news_features": pd.DataFrame({"pageId": ["1"]}),
+        "clients_features": pd.DataFrame({"userId": ["test_user"]}),
+    }
+    with patch("src.api.app.get_model", return_value=MagicMock()), patch(
+        "src.api.app.get_prediction_data", return_value=data
+    ), patch("src.api.app.predict_for_userId") as mock_predict_for_userId:
+        payload = {"userId": "test_user", "themeMain": ["esportes"]}
+        response = client.post("/predict", json=payload)
+
+    assert response.status_code == 400
+    mock_predict_for_userId.assert_not_called()
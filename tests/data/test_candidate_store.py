@@ -0,0 +1,224 @@
+import numpy as np
+import pandas as pd
+
+from src.data.candidate_store import CandidateStore
+from src.predict.constants import CLIENT_FEATURES_COLUMNS, NEWS_FEATURES_COLUMNS
+from src.predict.pipeline import predict_for_userId
+
+
+def _news_df():
+    news = pd.DataFrame(
+        {
+            "pageId": ["p_old", "p_new", "p_mid", "p_nat"],
+            "issuedDatetime": pd.to_datetime(
+                ["2024-03-01 00:00", "2024-03-03 12:00", "2024-03-03 00:00", None]
+            ),
+        }
+    )
+    for col in NEWS_FEATURES_COLUMNS:
+        news[col] = 0.5
+    return news
+
+
+def test_store_is_sorted_by_issued_datetime():
+    store = CandidateStore(_news_df())
+    assert list(store.news_df["pageId"]) == ["p_nat", "p_old", "p_mid", "p_new"]
+    assert store.issued_ns.dtype == np.int64
+    assert np.all(store.issued_ns[:-1] <= store.issued_ns[1:])
+
+
+def test_select_applies_max_age_window():
+    store = CandidateStore(_news_df())
+
+    assert len(store.select()) == 4
+    window = store.news_df["pageId"].iloc[store.select(max_age_hours=12)]
+    assert list(window) == ["p_mid", "p_new"]
+    window = store.news_df["pageId"].iloc[store.select(24, now="2024-03-04 06:00")]
+    assert list(window) == ["p_new"]
+
+
+def test_evict_expired_removes_old_items():
+    store = CandidateStore(_news_df())
+    evicted = store.evict_expired(retention_hours=48)
+
+    assert evicted == 2
+    assert list(store.news_df["pageId"]) == ["p_mid", "p_new"]
+    assert len(store.issued_ns) == 2
+    assert store.evict_expired(None) == 0
+
+
+class _ConstantModel:
+    def predict(self, model_input):
+        return np.full(len(model_input), 50.0)
+
+
+def test_predict_for_userId_only_scores_fresh_news():
+    store = CandidateStore(_news_df())
+    clients = pd.DataFrame([{"userId": "u1", **{c: 1 for c in CLIENT_FEATURES_COLUMNS}}])
+
+    recs, cold_start = predict_for_userId(
+        "u1",
+        clients,
+        store.news_df,
+        _ConstantModel(),
+        n=10,
+        candidate_store=store,
+        max_age_hours=12,
+    )
+
+    assert cold_start is False
+    assert {rec["pageId"] for rec in recs} == {"p_mid", "p_new"}
+
+
+def _filterable_store():
+    news = _news_df()
+    news["themeMain"] = ["esportes", "economia", "esportes", "esportes"]
+    news["localState"] = ["sp", "rj", "rj", None]
+    return CandidateStore(news, filter_columns=["themeMain", "localState", "themeSub"])
+
+
+def test_filter_columns_ignore_missing_columns():
+    store = _filterable_store()
+    assert store.filter_columns == ["themeMain", "localState"]
+
+
+def test_select_combines_bitmaps_with_window():
+    store = _filterable_store()
+    page_ids = store.news_df["pageId"]
+
+    selected = store.select(filters={"themeMain": ["esportes"]})
+    assert list(page_ids.iloc[selected]) == ["p_nat", "p_old", "p_mid"]
+
+    # OR dentro da coluna, AND entre colunas
+    filters = {"themeMain": ["esportes", "economia"], "localState": ["rj"]}
+    assert list(page_ids.iloc[store.select(filters=filters)]) == ["p_mid", "p_new"]
+    selected = store.select(max_age_hours=6, filters=filters)
+    assert list(page_ids.iloc[selected]) == ["p_new"]
+
+    assert len(store.select(filters={"themeMain": ["inexistente"]})) == 0
+    assert len(store.select(filters={"themeMain": []})) == 4
+
+
+def test_select_matches_pandas_filter_after_eviction():
+    rng = np.random.default_rng(1)
+    n = 1000
+    news = pd.DataFrame(
+        {
+            "pageId": np.arange(n).astype(str),
+            "issuedDatetime": pd.Timestamp("2024-03-01")
+            + pd.to_timedelta(rng.integers(0, 240, n), unit="h"),
+            "themeMain": rng.choice(["a", "b", "c"], n),
+            "localState": rng.choice(["sp", "rj", "mg", "ba"], n),
+        }
+    )
+    store = CandidateStore(news, filter_columns=["themeMain", "localState"])
+    store.evict_expired(retention_hours=200)
+
+    filters = {"themeMain": ["a", "c"], "localState": ["sp"]}
+    selected = store.news_df.iloc[store.select(max_age_hours=100, filters=filters)]
+
+    df = store.news_df
+    cutoff = df["issuedDatetime"].max() - pd.Timedelta(hours=100)
+    expected = df[
+        (df["issuedDatetime"] >= cutoff)
+        & df["themeMain"].isin(["a", "c"])
+        & df["localState"].isin(["sp"])
+    ]
+    assert list(selected["pageId"]) == list(expected["pageId"])
+
+
+def _assert_same_store(store, expected):
+    assert list(store.news_df["pageId"]) == list(expected.news_df["pageId"])
+    np.testing.assert_array_equal(store.issued_ns, expected.issued_ns)
+    for col in expected.filter_columns:
+        for value in expected.news_df[col].dropna().unique():
+            filters = {col: [value]}
+            np.testing.assert_array_equal(
+                store.select(filters=filters), expected.select(filters=filters)
+            )
+
+
+def test_append_extends_catalogue_and_bitmaps():
+    store = _filterable_store()
+    new = pd.DataFrame(
+        {
+            "pageId": ["p_x", "p_y", "p_new"],
+            "issuedDatetime": pd.to_datetime(
+                ["2024-03-05 00:00", "2024-03-04 00:00", "2024-03-09 00:00"]
+            ),
+            "themeMain": ["politica", "esportes", "economia"],
+            "localState": ["sp", None, "rj"],
+        }
+    )
+    for col in NEWS_FEATURES_COLUMNS:
+        new[col] = 0.5
+
+    # p_new já está no catálogo e é ignorada
+    assert store.append(new) == 2
+    assert list(store.news_df["pageId"][-2:]) == ["p_y", "p_x"]
+    expected = CandidateStore(
+        pd.concat([_filterable_store().news_df, new.iloc[:2]], ignore_index=True),
+        filter_columns=["themeMain", "localState"],
+    )
+    _assert_same_store(store, expected)
+    assert list(store.news_df["pageId"].iloc[store.select(max_age_hours=12)]) == ["p_x"]
+    assert store.append(new) == 0
+
+
+def test_append_out_of_order_news_resorts_catalogue():
+    store = _filterable_store()
+    new = store.news_df.iloc[[1]].assign(pageId="p_late", themeMain="politica")
+
+    assert store.append(new) == 1
+    expected = CandidateStore(
+        pd.concat([_filterable_store().news_df, new], ignore_index=True),
+        filter_columns=["themeMain", "localState"],
+    )
+    _assert_same_store(store, expected)
+    catalogue, positions = store.select_candidates(filters={"themeMain": ["politica"]})
+    assert list(catalogue["pageId"].iloc[positions]) == ["p_late"]
+
+
+def test_sorted_catalogue_is_not_copied():
+    news = _news_df().sort_values("issuedDatetime", na_position="first", ignore_index=True)
+    freq = news["themeMainFreq"].to_numpy()
+    freq.flags.writeable = False
+
+    store = CandidateStore(news)
+    assert np.shares_memory(store.news_df["themeMainFreq"].to_numpy(), freq)
+
+
+def test_page_codes_follow_sort_append_and_eviction():
+    news = _news_df()
+    codes = np.arange(len(news), dtype=np.int32)
+    store = CandidateStore(news, page_codes=codes)
+    assert dict(zip(store.news_df["pageId"], store.page_codes)) == {
+        "p_old": 0,
+        "p_new": 1,
+        "p_mid": 2,
+        "p_nat": 3,
+    }
+
+    late = news.iloc[[0, 0]].assign(pageId=["p_late", "p_last"])
+    late["issuedDatetime"] = pd.to_datetime(["2024-03-02", "2024-03-10"])
+    assert store.append(late, page_codes=np.array([7, 8], dtype=np.int32)) == 2
+    store.evict_expired(retention_hours=24 * 8)
+    assert list(store.news_df["pageId"]) == ["p_late", "p_mid", "p_new", "p_last"]
+    assert list(store.page_codes) == [7, 2, 1, 8]
+
+
+def test_append_copies_only_new_rows():
+    store = _filterable_store()
+    last = store.news_df.iloc[[-1]]
+    for day in range(5, 9):
+        snapshot = store.news_df
+        new = last.assign(pageId=f"p_{day}", issuedDatetime=pd.Timestamp(f"2024-03-{day:02d}"))
+        assert store.append(new) == 1
+        # Catálogo anterior continua válido e compartilha os buffers
+        assert list(snapshot["pageId"]) == list(store.news_df["pageId"][:-1])
+        if day > 5:
+            assert np.shares_memory(
+                snapshot["themeMainFreq"].to_numpy(), store.news_df["themeMainFreq"].to_numpy()
+            )
+    assert list(store.news_df["pageId"][-4:]) == ["p_5", "p_6", "p_7", "p_8"]
+    assert store.news_df.dtypes.equals(_filterable_store().news_df.dtypes)
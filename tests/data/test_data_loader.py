@@ -19,6 +19,12 @@ class FakeStorage:
             return self.mapping["X_train_full"]
         raise FileNotFoundError(path)
 
+    def read_parquet_projected(self, path, columns=None, optional_columns=(), filters=None):
+        df = self.read_parquet(path)
+        if columns is not None:
+            df = df[list(columns) + [c for c in optional_columns if c in df.columns]]
+        return df
+
 
 def test_get_client_features_found_and_missing():
     clients = pd.DataFrame(
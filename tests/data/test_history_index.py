@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+from src.data.history_index import UserHistoryIndex, build_history_index, load_history_index
+from src.predict.constants import CLIENT_FEATURES_COLUMNS, NEWS_FEATURES_COLUMNS
+from src.predict.pipeline import build_model_input
+from src.storage.local import LocalStorage
+
+
+def _users_df():
+    return pd.DataFrame(
+        {
+            "userId": ["u1", "u1", "u1", "u2", "u3"],
+            "pageId": ["p3", "p1", "p3", "p2", "p1"],
+        }
+    )
+
+
+def test_build_history_index_csr_layout():
+    index = build_history_index(_users_df())
+
+    assert len(index) == 3
+    assert index.codes.dtype == np.int32
+    assert list(index.offsets) == [0, 2, 3, 4]
+    seen_u1 = set(index.page_ids[index.seen_codes("u1")])
+    assert seen_u1 == {"p1", "p3"}
+    assert len(index.seen_codes("desconhecido")) == 0
+
+
+def test_seen_mask_matches_dataframe_filter():
+    users_df = _users_df()
+    index = build_history_index(users_df)
+    candidates = pd.Series(["p1", "p2", "p3", "p4", "p1"])
+    codes = index.encode_pages(candidates)
+
+    for user in ["u1", "u2", "u3", "desconhecido"]:
+        expected = candidates.isin(users_df.loc[users_df["userId"] == user, "pageId"])
+        assert list(index.seen_mask(user, codes)) == list(expected)
+
+
+def test_save_and_load_with_memory_map(tmp_path):
+    index = build_history_index(_users_df())
+    index.save(str(tmp_path))
+
+    loaded = UserHistoryIndex.load(str(tmp_path))
+    assert isinstance(loaded.codes, np.memmap)
+    codes = loaded.encode_pages(["p1", "p2", "p3"])
+    assert list(loaded.seen_mask("u1", codes)) == [True, False, True]
+
+
+def test_load_history_index_prefers_saved_artifact(tmp_path):
+    index_dir = str(tmp_path / "history_index")
+    build_history_index(_users_df()).save(index_dir, LocalStorage())
+
+    loaded = load_history_index(LocalStorage(), index_dir=index_dir)
+    assert isinstance(loaded.offsets, np.memmap)
+    assert isinstance(loaded.codes, np.memmap)
+    assert len(loaded) == len(build_history_index(_users_df()))
+
+
+def test_build_model_input_excludes_seen_news():
+    index = build_history_index(_users_df())
+    clients = pd.DataFrame([{"userId": "u1", **{c: 1 for c in CLIENT_FEATURES_COLUMNS}}])
+    news = pd.DataFrame({"pageId": ["p1", "p2", "p3", "p4"]})
+    for col in NEWS_FEATURES_COLUMNS:
+        news[col] = 0.5
+
+    final_input, non_viewed = build_model_input("u1", clients, news, history_index=index)
+
+    assert list(non_viewed["pageId"]) == ["p2", "p4"]
+    assert len(final_input) == 2
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+from src.data.history_index import build_history_index
+from src.data.id_dictionary import UNKNOWN_CODE, IdDictionary, load_id_dictionary
+from src.predict.constants import CLIENT_FEATURES_COLUMNS, NEWS_FEATURES_COLUMNS
+from src.predict.pipeline import predict_for_userId
+from src.storage.local import LocalStorage
+
+
+def test_encode_extends_vocabulary_with_stable_codes():
+    ids = IdDictionary()
+    first = ids.encode("pageId", ["p1", "p2", "p1"], extend=True)
+    assert first.dtype == np.int32
+    assert list(first) == [0, 1, 0]
+
+    # IDs novos recebem os próximos códigos; os existentes não mudam
+    second = ids.encode("pageId", ["p3", "p2"], extend=True)
+    assert list(second) == [2, 1]
+    assert list(ids.encode("pageId", ["p9", None, "p3"])) == [UNKNOWN_CODE, UNKNOWN_CODE, 2]
+    assert list(ids.decode("pageId", [2, UNKNOWN_CODE, 0])) == ["p3", None, "p1"]
+    assert ids.size("userId") == 0
+
+
+def test_encode_frame_and_decode_records():
+    ids = IdDictionary({"userId": ["a", "b"], "pageId": ["x"]})
+    df = pd.DataFrame({"userId": ["b", "c"], "pageId": ["x", "y"], "score": [1.0, 2.0]})
+
+    encoded = ids.encode_frame(df, extend=True)
+    assert list(encoded["userId"]) == [1, 2]
+    assert list(encoded["pageId"]) == [0, 1]
+    assert list(df["userId"]) == ["b", "c"]
+    # Colunas já codificadas não são recodificadas
+    pd.testing.assert_frame_equal(ids.encode_frame(encoded), encoded)
+
+    records = [{"pageId": 1, "score": 2.0}, {"pageId": 0}]
+    assert ids.decode_records(records) == [{"pageId": "y", "score": 2.0}, {"pageId": "x"}]
+    assert records[0]["pageId"] == 1
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    storage = LocalStorage()
+    directory = str(tmp_path / "ids")
+    assert load_id_dictionary(storage, directory) is None
+
+    ids = IdDictionary()
+    ids.encode("userId", ["u1", "u2"], extend=True)
+    ids.encode("pageId", ["p1"], extend=True)
+    ids.save(storage, directory)
+
+    loaded = load_id_dictionary(storage, directory)
+    assert list(loaded.encode("userId", ["u2", "u1"])) == [1, 0]
+    assert list(loaded.decode("pageId", [0])) == ["p1"]
+
+
+def test_history_index_keeps_integer_codes():
+    ids = IdDictionary()
+    users = ids.encode_frame(
+        pd.DataFrame({"userId": ["u1", "u1", "u2"], "pageId": ["p1", "p2", "p2"]}), extend=True
+    )
+    history = build_history_index(users)
+
+    assert history.page_ids.dtype.kind == "i"
+    candidates = history.encode_pages(ids.encode("pageId", ["p2", "p1"]))
+    user_code = ids.encode("userId", ["u2"])[0]
+    assert list(history.seen_mask(user_code, candidates)) == [True, False]
+
+
+def test_predict_for_unknown_user_code_is_cold_start():
+    ids = IdDictionary()
+    clients = ids.encode_frame(
+        pd.DataFrame([{"userId": "u1", **{c: 1.0 for c in CLIENT_FEATURES_COLUMNS}}]), extend=True
+    )
+    news = ids.encode_frame(pd.DataFrame({"pageId": ["p1", "p2"]}), extend=True)
+    for col in NEWS_FEATURES_COLUMNS:
+        news[col] = 0.5
+
+    unknown = ids.encode("userId", ["novo"])[0]
+    recs, cold_start = predict_for_userId(unknown, clients, news, model=None, n=2)
+
+    assert cold_start is True
+    assert {rec["pageId"] for rec in ids.decode_records(recs)} == {"p1", "p2"}
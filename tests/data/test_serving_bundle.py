@@ -0,0 +1,178 @@
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from src.data.candidate_store import CandidateStore
+from src.data.serving_bundle import (
+    AffinityTables,
+    build_serving_bundle,
+    load_serving_bundle,
+    save_serving_bundle,
+)
+from src.predict.constants import (
+    AFFINITY_COLUMNS,
+    CLIENT_FEATURES_COLUMNS,
+    METADATA_COLS,
+    NEWS_FEATURES_COLUMNS,
+)
+from src.storage.local import LocalStorage
+
+
+def _x_train_full():
+    rows = [
+        ("u1", "p1", "sp", "esportes", 0.5, 0.75),
+        ("u1", "p2", "rj", "esportes", 0.5, 0.75),
+        ("u1", "p3", "sp", "economia", 0.5, 0.25),
+        ("u2", "p1", "sp", "esportes", 1.0, 1.0),
+    ]
+    df = pd.DataFrame(
+        rows,
+        columns=["userId", "pageId", "localState", "themeMain", "relLocalState", "relThemeMain"],
+    )
+    df["localRegion"] = df["localState"] + "-capital"
+    df["relLocalRegion"] = df["relLocalState"]
+    df["themeSub"] = df["themeMain"] + "/geral"
+    df["relThemeSub"] = df["relThemeMain"]
+    for col in NEWS_FEATURES_COLUMNS + CLIENT_FEATURES_COLUMNS:
+        if col not in df.columns:
+            df[col] = 0.1
+    df["issuedDatetime"] = pd.Timestamp("2024-03-01")
+    return df
+
+
+def test_build_serving_bundle_deduplicates():
+    bundle = build_serving_bundle(_x_train_full())
+
+    assert list(bundle["news"]["pageId"]) == ["p1", "p2", "p3"]
+    assert not any(col.startswith("rel") for col in bundle["news"].columns)
+    assert list(bundle["clients"]["userId"]) == ["u1", "u2"]
+    assert {name for name in bundle if name.startswith("affinity_")} == {
+        f"affinity_{col}" for col in AFFINITY_COLUMNS
+    }
+    assert len(bundle["affinity_localState"]) == 3
+    assert len(bundle["affinity_themeMain"]) == 3
+
+
+def test_affinity_tables_reproduce_training_features():
+    full = _x_train_full()
+    bundle = build_serving_bundle(full)
+    affinity = AffinityTables(
+        {
+            col: bundle[f"affinity_{col}"]
+            for col in AFFINITY_COLUMNS
+            if f"affinity_{col}" in bundle
+        }
+    )
+
+    for user, rows in full.groupby("userId"):
+        news = bundle["news"].set_index("pageId").loc[rows["pageId"]].reset_index()
+        enriched = affinity.user_features(user, news)
+        for rel_col in AFFINITY_COLUMNS.values():
+            assert np.allclose(enriched[rel_col], rows[rel_col])
+
+    # Categorias nunca lidas recebem afinidade 0
+    enriched = affinity.user_features("u2", bundle["news"])
+    assert list(enriched["relThemeMain"]) == [1.0, 1.0, 0.0]
+    enriched = affinity.user_features("desconhecido", bundle["news"])
+    assert list(enriched["relLocalState"]) == [0.0, 0.0, 0.0]
+
+
+def test_save_and_load_uses_version_cache(tmp_path):
+    storage = LocalStorage()
+    serving_dir = str(tmp_path / "serving")
+    cache_dir = str(tmp_path / "cache")
+    metadata = pd.DataFrame(
+        {
+            "pageId": ["p1", "p2", "p3", "p9"],
+            "url": ["u"] * 4,
+            "title": ["t1", "t2", "t3", "t9"],
+            "issuedDate": ["2024-03-01"] * 4,
+            "issuedTime": ["10:00:00"] * 4,
+        }
+    )
+    save_serving_bundle(
+        build_serving_bundle(_x_train_full(), metadata), storage, "run1", serving_dir
+    )
+
+    loaded = load_serving_bundle(storage, serving_dir=serving_dir, cache_dir=cache_dir)
+    assert loaded["bundle_version"] == "run1"
+    assert list(loaded["news_features"]["title"]) == ["t1", "t2", "t3"]
+
+    # Sem acesso ao storage, a versão é servida pelo cache local
+    shutil.rmtree(serving_dir)
+    cached = load_serving_bundle(None, "run1", serving_dir=serving_dir, cache_dir=cache_dir)
+    pd.testing.assert_frame_equal(cached["clients_features"], loaded["clients_features"])
+
+
+def test_arrow_cache_is_memory_mapped(tmp_path):
+    storage = LocalStorage()
+    serving_dir = str(tmp_path / "serving")
+    cache_dir = str(tmp_path / "cache")
+    save_serving_bundle(build_serving_bundle(_x_train_full()), storage, "run1", serving_dir)
+
+    loaded = load_serving_bundle(
+        storage, "run1", serving_dir=serving_dir, cache_dir=cache_dir, cache_format="arrow"
+    )
+    assert (tmp_path / "cache" / "run1" / "clients.arrow").exists()
+    assert not loaded["clients_features"]["userTypeFreq"].to_numpy().flags.writeable
+
+    shutil.rmtree(serving_dir)
+    cached = load_serving_bundle(None, "run1", serving_dir=serving_dir, cache_dir=cache_dir)
+    clients = cached["clients_features"]
+    assert clients["userTypeFreq"].dtype == np.float32
+    # Colunas numéricas são visões do arquivo mapeado (somente leitura)
+    assert not clients["userTypeFreq"].to_numpy().flags.writeable
+    pd.testing.assert_frame_equal(clients, loaded["clients_features"])
+    expected = _x_train_full().drop_duplicates("userId")["userTypeFreq"].to_numpy(np.float32)
+    np.testing.assert_array_equal(clients["userTypeFreq"].to_numpy(), expected)
+
+    # Catálogo e afinidades já gravados em ordem: nem a carga nem o
+    # CandidateStore copiam as colunas mapeadas
+    store = CandidateStore(cached["news_features"])
+    for col in ["themeMainFreq", "issuedDatetime"]:
+        values = store.news_df[col].to_numpy()
+        assert not values.flags.writeable
+        assert np.shares_memory(values, cached["news_features"][col].to_numpy())
+    for _, _, rel in cached["affinity"]._tables.values():
+        assert not rel.flags.writeable
+    enriched = cached["affinity"].user_features("u1", cached["news_features"])
+    assert list(enriched["relThemeMain"]) == [0.75, 0.75, 0.25]
+
+
+def test_build_serving_bundle_sorts_tables_for_serving():
+    full = _x_train_full()
+    full["issuedDatetime"] = pd.to_datetime(["2024-03-03", "2024-03-01", None, "2024-03-03"])
+    full = pd.concat([full.iloc[[3]], full.iloc[:3]], ignore_index=True)
+    metadata = pd.DataFrame({col: ["x"] * 3 for col in METADATA_COLS})
+    metadata["pageId"] = ["p1", "p2", "p3"]
+    metadata["title"] = ["t1", "t2", "t3"]
+
+    bundle = build_serving_bundle(full, metadata)
+
+    assert "metadata" not in bundle
+    assert list(bundle["news"]["pageId"]) == ["p3", "p2", "p1"]
+    assert list(bundle["news"]["title"]) == ["t3", "t2", "t1"]
+    table = bundle["affinity_themeMain"]
+    assert list(zip(table["userId"], table["themeMain"])) == [
+        ("u1", "economia"),
+        ("u1", "esportes"),
+        ("u2", "esportes"),
+    ]
+
+
+def test_build_model_input_fills_affinity_features():
+    from src.predict.pipeline import build_model_input
+
+    bundle = build_serving_bundle(_x_train_full())
+    affinity = AffinityTables(
+        {
+            col: bundle[f"affinity_{col}"]
+            for col in AFFINITY_COLUMNS
+            if f"affinity_{col}" in bundle
+        }
+    )
+    final_input, _ = build_model_input("u1", bundle["clients"], bundle["news"], affinity=affinity)
+
+    assert list(final_input.columns) == CLIENT_FEATURES_COLUMNS + NEWS_FEATURES_COLUMNS
+    assert list(final_input["relThemeMain"]) == [0.75, 0.75, 0.25]
@@ -0,0 +1,217 @@
+import os
+import threading
+
+import pandas as pd
+import pytest
+
+from src.data.history_index import UserHistoryIndex
+from src.features import dag, ingest, pipeline
+from src.features.dag import Stage, run_stages
+from src.features.pipeline import build_feature_stages
+from src.features.utils import ParquetTable
+from src.storage.local import LocalStorage
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    (raw / "a.csv").write_text("x\n1\n")
+    return tmp_path
+
+
+def _stages(workspace, calls, params=None, fail_on=None):
+    storage = LocalStorage()
+    out = str(workspace / "out")
+
+    def stage(name, inputs=(), sources=()):
+        path = os.path.join(out, f"{name}.pkl")
+
+        def run(values):
+            calls.append(name)
+            if name == fail_on:
+                raise RuntimeError(name)
+            value = [name] + [v for key in inputs for v in values[key]]
+            storage.save_pickle(value, path)
+            return value
+
+        return Stage(
+            name,
+            run,
+            lambda: storage.load_pickle(path),
+            outputs=[path],
+            inputs=inputs,
+            sources=sources,
+            params=(params or {}).get(name),
+            modules=[dag],
+        )
+
+    return [
+        stage("raw", sources=[str(workspace / "raw")]),
+        stage("side", inputs=["raw"]),
+        stage("model", inputs=["raw"]),
+        stage("report", inputs=["model"]),
+    ]
+
+
+def _run(workspace, calls, force=None, **kwargs):
+    state = str(workspace / "out" / "state.pkl")
+    return run_stages(_stages(workspace, calls, **kwargs), LocalStorage(), state, force=force)
+
+
+def test_up_to_date_stages_are_skipped(workspace):
+    calls = []
+    _run(workspace, calls)
+    assert calls == ["raw", "side", "model", "report"]
+
+    calls.clear()
+    status = _run(workspace, calls)
+    assert calls == []
+    assert set(status.values()) == {"reaproveitada"}
+
+
+def test_param_change_reruns_stage_and_dependents(workspace):
+    _run(workspace, [])
+    calls = []
+    _run(workspace, calls, params={"model": {"SCALING_RANGE": 10}})
+
+    assert calls == ["model", "report"]
+
+
+def test_source_change_and_missing_output_rerun(workspace):
+    _run(workspace, [])
+    os.remove(workspace / "out" / "side.pkl")
+    calls = []
+    _run(workspace, calls)
+    assert calls == ["side"]
+
+    (workspace / "raw" / "b.csv").write_text("x\n2\n")
+    calls = []
+    _run(workspace, calls)
+    assert calls == ["raw", "side", "model", "report"]
+
+
+def test_interrupted_run_resumes(workspace):
+    calls = []
+    with pytest.raises(RuntimeError):
+        _run(workspace, calls, fail_on="model")
+    assert calls == ["raw", "side", "model"]
+
+    calls = []
+    _run(workspace, calls)
+    assert calls == ["model", "report"]
+
+
+def test_force_includes_dependents_and_loads_skipped_inputs(workspace):
+    _run(workspace, [])
+    calls = []
+    _run(workspace, calls, force=["model"])
+
+    assert calls == ["model", "report"]
+    assert LocalStorage().load_pickle(str(workspace / "out" / "report.pkl")) == [
+        "report",
+        "model",
+        "raw",
+    ]
+    with pytest.raises(ValueError):
+        _run(workspace, [], force=["inexistente"])
+
+
+def test_feature_pipeline_stages_are_topologically_ordered(tmp_path):
+    stages = build_feature_stages(LocalStorage(), str(tmp_path))
+    seen = set()
+    for stage in stages:
+        assert set(stage.inputs) <= seen
+        seen.add(stage.name)
+    assert [stage.name for stage in stages][-1] == "final"
+
+
+def test_independent_stages_run_concurrently(workspace):
+    barrier = threading.Barrier(2, timeout=5)
+    storage = LocalStorage()
+    out = str(workspace / "out")
+
+    def stage(name, inputs=(), wait=False):
+        path = os.path.join(out, f"{name}.pkl")
+
+        def run(values):
+            if wait:
+                # Só passa se a outra etapa independente estiver rodando junto
+                barrier.wait()
+            storage.save_pickle(name, path)
+            return name
+
+        return Stage(name, run, lambda: storage.load_pickle(path), [path], inputs=inputs)
+
+    stages = [
+        stage("mix"),
+        stage("suggested", ["mix"], wait=True),
+        stage("target", ["mix"], wait=True),
+        stage("final", ["suggested", "target"]),
+    ]
+    status = run_stages(stages, storage, os.path.join(out, "state.pkl"), max_workers=2)
+
+    assert set(status.values()) == {"executada"}
+    assert storage.load_pickle(os.path.join(out, "final.pkl")) == "final"
+
+
+@pytest.mark.parametrize("partitions", [1, 4])
+def test_feature_pipeline_stages_hash_the_pipeline_module(tmp_path, partitions):
+    stages = build_feature_stages(LocalStorage(), str(tmp_path), partitions=partitions)
+
+    assert all(pipeline in stage.modules for stage in stages)
+    assert all(ingest in stage.modules for stage in stages if stage.name in ("users", "news"))
+
+
+def test_users_stage_saves_history_index(tmp_path):
+    features_dir = tmp_path / "features"
+    features_dir.mkdir()
+    users = pd.DataFrame({"userId": ["u1", "u1", "u2"], "pageId": ["p1", "p2", "p1"]})
+    users.to_parquet(features_dir / "users_feats.parquet")
+
+    pipeline._save_history_index(str(tmp_path), LocalStorage())
+
+    users_stage = build_feature_stages(LocalStorage(), str(tmp_path))[0]
+    assert all(os.path.exists(path) for path in users_stage.outputs)
+    index = UserHistoryIndex.load(str(features_dir / "history_index"))
+    assert list(index.seen_mask("u1", index.encode_pages(["p1", "p2"]))) == [True, True]
+
+
+def test_users_stage_result_is_read_on_demand(tmp_path, monkeypatch):
+    features_dir = tmp_path / "features"
+    features_dir.mkdir()
+    users = pd.DataFrame(
+        {
+            "userId": ["u1", "u1", "u2"],
+            "pageId": ["p2", "p1", "p2"],
+            "timestampHistoryDate": ["2024-03-01"] * 3,
+            "timestampHistoryTime": ["10:00:00"] * 3,
+            "historySize": [2, 2, 1],
+        }
+    )
+    users.to_parquet(features_dir / "users_feats.parquet")
+    stages = {stage.name: stage for stage in build_feature_stages(LocalStorage(), str(tmp_path))}
+
+    table = stages["users"].load()
+    assert isinstance(table, ParquetTable)
+
+    selected = {}
+    monkeypatch.setattr(pipeline, "ENCODE_IDS", False)
+    monkeypatch.setattr(
+        pipeline,
+        "_preprocess_and_save_news",
+        lambda data_path, page_ids, storage, ids: selected.setdefault("pageIds", page_ids),
+    )
+    pipeline._run_news_stage(str(tmp_path), table, LocalStorage())
+    assert selected["pageIds"] == ["p2", "p1"]
+
+    read_columns = {}
+    monkeypatch.setattr(
+        pipeline,
+        "compute_covisitation",
+        lambda users_df, **kwargs: read_columns.setdefault("columns", list(users_df.columns)),
+    )
+    with pytest.raises(AttributeError):
+        # O resultado falso de compute_covisitation não tem `save`
+        pipeline._preprocess_and_save_covisit(str(tmp_path), table, LocalStorage())
+    assert read_columns["columns"] == pipeline.COVISIT_COLUMNS
@@ -0,0 +1,93 @@
+import os
+
+import pandas as pd
+import pytest
+
+from src.features.constants import USERS_COLS_TO_EXPLODE
+from src.features.ingest import ingest_raw_dataset, load_raw_manifest, read_raw_parquet
+from src.features.pp_users import _process_history_columns
+from src.storage.local import LocalStorage
+
+
+def _users(offset):
+    return pd.DataFrame(
+        {
+            "userId": [f"u{offset}", f"u{offset + 1}"],
+            "userType": ["Logged", "Non-Logged"],
+            "historySize": [2, 1],
+            "history": ["p1, p2", "p3"],
+            "timestampHistory": ["1657146417045, 1657146605778", "1657146417046"],
+            "numberOfClicksHistory": ["1, 0", "3"],
+            "timeOnPageHistory": ["20380, 21184", "100"],
+            "scrollPercentageHistory": ["50.3, 18.18", "7.5"],
+            "pageVisitsCountHistory": ["1, 2", "1"],
+        }
+    )
+
+
+@pytest.fixture
+def sources(tmp_path):
+    users_dir, news_dir = tmp_path / "treino", tmp_path / "itens"
+    users_dir.mkdir()
+    news_dir.mkdir()
+    for i in range(2):
+        _users(i * 10).to_csv(users_dir / f"treino_{i}.csv", index=False)
+    pd.DataFrame(
+        {
+            "page": ["p1", "p2", "p3"],
+            "url": ["https://g1.globo.com/sp/noticia/a.ghtml"] * 3,
+            "issued": ["2022-07-01 10:00:00+00:00"] * 3,
+            "modified": ["2022-07-01 11:00:00+00:00"] * 3,
+            "title": ["a", "b", "c"],
+            "body": ["texto longo"] * 3,
+        }
+    ).to_csv(news_dir / "itens.csv", index=False)
+    return {"users": str(users_dir), "news": str(news_dir)}
+
+
+def test_converts_once_and_reconverts_only_changed_files(sources, tmp_path):
+    storage, raw_dir = LocalStorage(), str(tmp_path / "raw")
+
+    assert ingest_raw_dataset(storage, raw_dir, sources) == {"users": 2, "news": 1}
+    assert ingest_raw_dataset(storage, raw_dir, sources) == {"users": 0, "news": 0}
+
+    changed = os.path.join(sources["users"], "treino_1.csv")
+    _users(50).to_csv(changed, index=False)
+    os.utime(changed, ns=(1, 1))
+    assert ingest_raw_dataset(storage, raw_dir, sources) == {"users": 1, "news": 0}
+    assert ingest_raw_dataset(storage, raw_dir, sources, force=True) == {"users": 2, "news": 1}
+
+    os.remove(changed)
+    ingest_raw_dataset(storage, raw_dir, sources)
+    assert list(load_raw_manifest(storage, raw_dir)["users"]) == ["treino_0.csv"]
+
+
+def test_users_parquet_explodes_like_csv(sources, tmp_path):
+    storage, raw_dir = LocalStorage(), str(tmp_path / "raw")
+    ingest_raw_dataset(storage, raw_dir, sources)
+
+    users = read_raw_parquet("users", storage, raw_dir)
+    assert list(users["userId"]) == ["u0", "u1", "u10", "u11"]
+    assert list(users.loc[0, "timestampHistory"]) == [1657146417045, 1657146605778]
+
+    from_parquet = _process_history_columns(users, split=False)
+    from_csv = _process_history_columns(
+        pd.concat([_users(0), _users(10)], ignore_index=True), split=True
+    )
+    for col in USERS_COLS_TO_EXPLODE:
+        expected = from_csv[col] if col == "history" else pd.to_numeric(from_csv[col])
+        assert list(from_parquet[col]) == list(expected)
+
+
+def test_news_parquet_is_typed_and_filtered_on_read(sources, tmp_path):
+    storage, raw_dir = LocalStorage(), str(tmp_path / "raw")
+    ingest_raw_dataset(storage, raw_dir, sources)
+
+    news = read_raw_parquet(
+        "news", storage, raw_dir, columns=["page", "issued"], filters=[("page", "in", ["p2"])]
+    )
+
+    assert list(news.columns) == ["page", "issued"]
+    assert list(news["page"]) == ["p2"]
+    assert pd.api.types.is_datetime64_any_dtype(news["issued"])
+    assert read_raw_parquet("users", storage, str(tmp_path / "vazio")) is None
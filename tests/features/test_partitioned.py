@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.features.constants import MIX_FEATS_FILES
+from src.features.partitioned import (
+    FINAL_FILE,
+    TARGET_FILE,
+    USERS_PARTITIONS_DIR,
+    partitioned_outputs,
+    run_user_partitions,
+    split_by_user,
+)
+from src.features.pp_mix import generate_suggested_feats, preprocess_mix_feats
+from src.features.pp_target import merge_score_ranges, preprocess_target
+from src.features.utils import ParquetTable
+
+
+@pytest.fixture
+def frames():
+    rng = np.random.default_rng(0)
+    n, pages = 600, 40
+    users = pd.DataFrame(
+        {
+            "userId": rng.choice([f"u{i}" for i in range(60)], n),
+            "pageId": rng.choice([f"p{i}" for i in range(pages + 5)], n),
+            "timestampHistoryDate": rng.choice(["2022-07-02", "2022-07-05"], n),
+            "timestampHistoryTime": rng.choice(["08:10:00", "21:45:30"], n),
+            "coldStart": rng.random(n) > 0.7,
+            "userType": rng.choice(["Logged", "Non-Logged"], n),
+            "historySize": rng.integers(1, 200, n),
+            "dayPeriod": rng.choice(["morning", "night"], n),
+            "isWeekend": rng.random(n) > 0.5,
+            "numberOfClicksHistory": rng.integers(0, 10, n),
+            "timeOnPageHistory": rng.integers(0, 10**5, n),
+            "scrollPercentageHistory": rng.random(n) * 100,
+            "minutesSinceLastVisit": rng.integers(0, 600, n).astype(float),
+        }
+    )
+    news = pd.DataFrame(
+        {
+            "pageId": [f"p{i}" for i in range(pages)],
+            "issuedDate": rng.choice(["2022-07-01", "2022-07-03"], pages),
+            "issuedTime": rng.choice(["10:00:00", "18:30:00"], pages),
+            "localState": rng.choice(["sp", "rj", None], pages),
+            "localRegion": rng.choice(["a", "b", None], pages),
+            "themeMain": rng.choice(["economia", "esporte"], pages),
+            "themeSub": rng.choice(["x", "y", None], pages),
+        }
+    )
+    return users, news
+
+
+def _users_table(users, tmp_path):
+    path = str(tmp_path / "users_feats.parquet")
+    users.to_parquet(path, index=False, row_group_size=100)
+    return ParquetTable(path)
+
+
+def _sorted(df):
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+def test_split_keeps_users_together_in_original_order(frames):
+    users, _ = frames
+    parts = split_by_user(users, 4)
+
+    assert sum(len(part) for part in parts) == len(users)
+    owners = [set(part["userId"]) for part in parts]
+    assert all(not (a & b) for i, a in enumerate(owners) for b in owners[i + 1 :])
+    for part in parts:
+        expected = users[users["userId"].isin(part["userId"])].reset_index(drop=True)
+        pd.testing.assert_frame_equal(part, expected)
+
+
+def test_merge_score_ranges_ignores_empty_partitions():
+    assert merge_score_ranges([(1.0, 2.0), (np.nan, np.nan), (0.5, 1.5)]) == (0.5, 2.0)
+    assert np.isnan(merge_score_ranges([(np.nan, np.nan)])[0])
+
+
+def test_partitioned_run_matches_single_frame(frames, tmp_path):
+    users, news = frames
+    mix_df, gap_df, *tables = preprocess_mix_feats(news.copy(), users.copy())
+    suggested = generate_suggested_feats(mix_df, *tables)
+    target = preprocess_target(users.copy(), gap_df)
+    expected = suggested.merge(target, on=["userId", "pageId"])
+
+    features_dir = str(tmp_path / "features")
+    table = _users_table(users, tmp_path)
+    rows = run_user_partitions(
+        table, news, features_dir, partitions=3, max_workers=2, batch_size=100
+    )
+
+    result = pd.read_parquet(f"{features_dir}/{FINAL_FILE}")
+    assert rows[FINAL_FILE] == len(expected)
+    pd.testing.assert_frame_equal(_sorted(result), _sorted(expected), check_dtype=False)
+    assert len(pd.read_parquet(f"{features_dir}/{TARGET_FILE}")) == len(target)
+    assert all(
+        (tmp_path / "features").joinpath(path).exists()
+        for path in partitioned_outputs(features_dir, 3)
+    )
+    assert not (tmp_path / "features" / USERS_PARTITIONS_DIR).exists()
+
+
+def test_empty_partitions_keep_a_readable_dataset(frames, tmp_path):
+    users, news = frames
+    users = users[users["userId"].isin(["u1", "u2"])]
+
+    features_dir = str(tmp_path / "features")
+    table = _users_table(users, tmp_path)
+    rows = run_user_partitions(table, news, features_dir, partitions=8, max_workers=2)
+
+    result = pd.read_parquet(f"{features_dir}/{FINAL_FILE}")
+    assert len(result) == rows[FINAL_FILE]
+    assert set(result["userId"]) <= {"u1", "u2"}
+    for rel_file in MIX_FEATS_FILES:
+        pd.read_parquet(f"{features_dir}/{rel_file}")
@@ -0,0 +1,101 @@
+import itertools
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.features.pp_covisit import CoVisitationMatrix, compute_covisitation
+from src.storage.local import LocalStorage
+
+
+@pytest.fixture
+def users_df():
+    return pd.DataFrame(
+        {
+            "userId": ["u1", "u1", "u1", "u2", "u2", "u3", "u3"],
+            "pageId": ["a", "b", "c", "a", "b", "a", "c"],
+            "timestampHistoryDate": [
+                "2024-03-01",
+                "2024-03-01",
+                "2024-03-05",
+                "2024-03-05",
+                "2024-03-05",
+                "2024-03-05",
+                "2024-03-05",
+            ],
+            "timestampHistoryTime": [
+                "10:00:00",
+                "11:00:00",
+                "10:00:00",
+                "08:00:00",
+                "09:00:00",
+                "12:00:00",
+                "13:00:00",
+            ],
+        }
+    )
+
+
+def test_compute_covisitation_counts_pairs_in_same_window(users_df):
+    covisit = compute_covisitation(users_df, window_hours=24, top_n=10, half_life_days=None)
+
+    # a-b co-ocorrem para u1 (01/03) e u2 (05/03); a-c apenas para u3
+    assert dict(covisit.neighbors("a")) == {"b": 2.0, "c": 1.0}
+    assert dict(covisit.neighbors("b")) == {"a": 2.0}
+    # c de u1 está em outra janela, portanto não co-ocorre com a/b de u1
+    assert dict(covisit.neighbors("c")) == {"a": 1.0}
+    assert covisit.neighbors("inexistente") == []
+
+
+def test_compute_covisitation_applies_recency_weight(users_df):
+    covisit = compute_covisitation(users_df, window_hours=24, top_n=10, half_life_days=4)
+
+    weights = dict(covisit.neighbors("a"))
+    # Idade de cada sessão (em horas) relativa ao último evento (05/03 13:00)
+    expected_ab = 0.5 ** (98 / 96) + 0.5 ** (4 / 96)
+    assert weights["b"] == pytest.approx(expected_ab, rel=1e-5)
+    assert weights["c"] == pytest.approx(1.0, rel=1e-5)
+
+
+def test_compute_covisitation_matches_brute_force_with_chunks():
+    rng = np.random.default_rng(0)
+    n_events = 400
+    df = pd.DataFrame(
+        {
+            "userId": rng.integers(0, 30, n_events).astype(str),
+            "pageId": rng.integers(0, 25, n_events).astype(str),
+            "timestampHistoryDate": "2024-03-01",
+            "timestampHistoryTime": [f"{h:02d}:00:00" for h in rng.integers(0, 24, n_events)],
+        }
+    )
+    covisit = compute_covisitation(
+        df, window_hours=6, top_n=1000, chunk_size=4, half_life_days=None
+    )
+
+    expected = {}
+    df["bucket"] = df["timestampHistoryTime"].str[:2].astype(int) // 6
+    for _, group in df.groupby(["userId", "bucket"]):
+        for a, b in itertools.permutations(sorted(set(group["pageId"])), 2):
+            expected[(a, b)] = expected.get((a, b), 0) + 1
+
+    result = {
+        (page, neighbor): weight
+        for page in covisit.page_ids
+        for neighbor, weight in covisit.neighbors(page)
+    }
+    assert result == expected
+
+
+def test_compute_covisitation_keeps_top_n_and_roundtrips(users_df, tmp_path):
+    covisit = compute_covisitation(users_df, window_hours=24, top_n=1, half_life_days=None)
+    assert covisit.neighbors("a") == [("b", 2.0)]
+    assert np.diff(covisit.matrix.indptr).max() == 1
+    assert covisit.matrix.indices.dtype == np.int32
+
+    covisit.save(str(tmp_path), LocalStorage())
+    restored = CoVisitationMatrix.load(str(tmp_path), LocalStorage())
+    assert isinstance(restored, CoVisitationMatrix)
+    assert restored.neighbors("a") == covisit.neighbors("a")
+    assert not restored.matrix.indices.flags.writeable
+    assert all(os.path.exists(path) for path in CoVisitationMatrix.files(str(tmp_path)))
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from features.constants import (
+    FINAL_MIX_FEAT_COLS,
+    GAP_COLS,
+    REGION_COLS,
+    STATE_COLS,
+    THEME_MAIN_COLS,
+    THEME_SUB_COLS,
+)
+from features.pp_mix import _compute_category_counts, _split_dataframes, generate_suggested_feats
+
+AFFINITY_COLS = [STATE_COLS, REGION_COLS, THEME_MAIN_COLS, THEME_SUB_COLS]
+
+
+def _split_reference(df_mix):
+    """Implementação anterior (cópia + filtro + `drop_duplicates` por dimensão)."""
+    gap_df = df_mix[GAP_COLS].copy()
+    gap_df = gap_df[gap_df["timeGapDays"] >= 0].reset_index(drop=True)
+    tables = []
+    for cols in AFFINITY_COLS:
+        table = df_mix[cols].copy()
+        table = table[table[cols[2]] > 0].reset_index(drop=True)
+        tables.append(table.drop_duplicates(subset=cols[:2]))
+    return (gap_df, *tables)
+
+
+def _suggested_reference(df_mix, *tables):
+    """Implementação anterior (um `merge` por dimensão)."""
+    suggested = df_mix[FINAL_MIX_FEAT_COLS]
+    for table, cols in zip(tables, AFFINITY_COLS):
+        suggested = suggested.merge(table, on=cols[:2], how="left")
+    return suggested.drop(columns=[col for col in suggested.columns if col.startswith("count")])
+
+
+@pytest.fixture
+def df_mix():
+    rng = np.random.default_rng(0)
+    n = 2000
+    states = np.array(["sp", "rj", "mg", None], dtype=object)
+    themes = np.array(["economia", "politica", "esporte", None], dtype=object)
+    df_mix = pd.DataFrame(
+        {
+            "userId": rng.choice([f"u{i}" for i in range(80)], n),
+            "pageId": rng.choice([f"p{i}" for i in range(300)], n),
+            "userType": "Logged",
+            "isWeekend": rng.random(n) > 0.5,
+            "dayPeriod": "morning",
+            "issuedDatetime": pd.Timestamp("2022-07-01"),
+            "timestampHistoryDatetime": pd.Timestamp("2022-07-02"),
+            "coldStart": False,
+            "localState": rng.choice(states, n),
+            "localRegion": pd.Categorical(rng.choice(states, n)),
+            "themeMain": rng.choice(themes, n),
+            "themeSub": pd.Categorical(rng.choice(themes, n)),
+            "timeGapDays": rng.integers(-2, 5, n),
+            "timeGapHours": rng.random(n),
+            "timeGapMinutes": rng.random(n),
+            "timeGapLessThanOneDay": rng.random(n) > 0.5,
+        },
+        index=np.arange(n) * 3,
+    )
+    return _compute_category_counts(df_mix)
+
+
+def test_split_matches_reference(df_mix):
+    _, *result = _split_dataframes(df_mix)
+
+    for table, expected in zip(result, _split_reference(df_mix)):
+        pd.testing.assert_frame_equal(table, expected.reset_index(drop=True))
+
+
+def test_suggested_matches_merges(df_mix):
+    _, _, *tables = _split_dataframes(df_mix)
+    expected = _suggested_reference(df_mix, *tables)
+
+    pd.testing.assert_frame_equal(generate_suggested_feats(df_mix, *tables), expected)
+
+
+def test_suggested_with_partial_tables(df_mix):
+    _, _, *tables = _split_dataframes(df_mix)
+    tables = [table.iloc[::2] for table in tables]
+    tables[0] = tables[0].assign(userId=tables[0]["userId"].where(tables[0].index % 3 > 0, "x"))
+    expected = _suggested_reference(df_mix, *tables)
+    result = generate_suggested_feats(df_mix, *tables)
+
+    pd.testing.assert_frame_equal(result, expected)
+    assert result["relThemeSub"].isna().any()
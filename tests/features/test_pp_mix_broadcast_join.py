@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from features.pp_mix import _broadcast_join
+
+COLUMNS = ["userId", "pageId", "issuedDatetime", "localState", "userType", "historySize"]
+
+
+@pytest.fixture
+def frames():
+    rng = np.random.default_rng(0)
+    n = 1000
+    df_users = pd.DataFrame(
+        {
+            "userId": rng.choice([f"u{i}" for i in range(50)], n),
+            "pageId": rng.choice([f"p{i}" for i in range(120)], n),
+            "userType": pd.Categorical(rng.choice(["Logged", "Non-Logged"], n)),
+            "historySize": rng.integers(1, 30, n).astype("int32"),
+            "scrollPercentageHistory": rng.random(n),
+        },
+        index=np.arange(n) * 2,
+    )
+    df_news = pd.DataFrame(
+        {
+            "pageId": [f"p{i}" for i in rng.permutation(100)],
+            "issuedDatetime": pd.date_range("2022-07-01", periods=100, freq="h", tz="UTC"),
+            "localState": pd.Categorical(rng.choice(["sp", "rj", None], 100)),
+            "body": "texto",
+        }
+    )
+    return df_users, df_news
+
+
+@pytest.mark.parametrize("chunk_rows", [None, 1, 7, 5000])
+def test_matches_inner_merge(frames, chunk_rows):
+    df_users, df_news = frames
+    expected = pd.merge(df_users, df_news, on="pageId", how="inner")[COLUMNS]
+    result = _broadcast_join(df_users, df_news, COLUMNS, chunk_rows=chunk_rows)
+
+    pd.testing.assert_frame_equal(result, expected)
+    assert len(result) < len(df_users)
+
+
+def test_empty_users(frames):
+    df_users, df_news = frames
+    result = _broadcast_join(df_users.iloc[:0], df_news, COLUMNS)
+
+    assert list(result.columns) == COLUMNS
+    assert result.empty
+
+
+def test_repeated_news_falls_back_to_merge(frames):
+    df_users, df_news = frames
+    df_news = pd.concat([df_news, df_news.iloc[:3]], ignore_index=True)
+    expected = pd.merge(df_users, df_news, on="pageId", how="inner")[COLUMNS]
+
+    pd.testing.assert_frame_equal(_broadcast_join(df_users, df_news, COLUMNS), expected)
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from features.pp_mix import _compute_category_counts
+
+CATEGORY_COLUMNS = ["localState", "localRegion", "themeMain", "themeSub"]
+
+
+def _groupby_reference(df_mix, category_columns=CATEGORY_COLUMNS):
+    """Implementação anterior (um `groupby(...).transform("count")` por coluna)."""
+    for col in category_columns:
+        title = col[0].upper() + col[1:]
+        df_mix[f"count{title}User"] = df_mix.groupby(["userId", col], observed=True)[
+            "pageId"
+        ].transform("count")
+    df_mix["totalUserNews"] = df_mix.groupby("userId")["pageId"].transform("count")
+    for col in category_columns:
+        title = col[0].upper() + col[1:]
+        df_mix[f"rel{title}"] = df_mix[f"count{title}User"] / df_mix["totalUserNews"]
+    return df_mix
+
+
+@pytest.fixture
+def df_mix():
+    rng = np.random.default_rng(0)
+    n = 3000
+    states = np.array(["sp", "rj", "mg", None], dtype=object)
+    themes = np.array(["economia", "politica", "esporte", None], dtype=object)
+    return pd.DataFrame(
+        {
+            "userId": rng.choice([f"u{i}" for i in range(120)], n),
+            "pageId": rng.choice([f"p{i}" for i in range(400)], n),
+            "localState": rng.choice(states, n),
+            "localRegion": pd.Categorical(rng.choice(states, n)),
+            "themeMain": rng.choice(themes, n),
+            "themeSub": pd.Categorical(rng.choice(themes, n), categories=["politica", "x"]),
+        },
+        index=np.arange(n) * 2,
+    )
+
+
+def test_matches_groupby_reference(df_mix):
+    df_mix.loc[df_mix.index[:5], "pageId"] = None
+    expected = _groupby_reference(df_mix.copy())
+    result = _compute_category_counts(df_mix.copy())
+
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_dtypes_without_missing_categories(df_mix):
+    df_mix = df_mix.dropna(subset=CATEGORY_COLUMNS)
+    expected = _groupby_reference(df_mix.copy())
+    result = _compute_category_counts(df_mix.copy())
+
+    pd.testing.assert_frame_equal(result, expected)
+    assert result["countLocalStateUser"].dtype == "int64"
+
+
+def test_custom_columns_and_empty_frame(df_mix):
+    columns = ["themeMain"]
+    expected = _groupby_reference(df_mix.copy(), columns)
+    result = _compute_category_counts(df_mix.copy(), columns)
+    pd.testing.assert_frame_equal(result, expected)
+
+    empty = df_mix.iloc[:0]
+    result = _compute_category_counts(empty.copy())
+    assert len(result) == 0
+    assert "relThemeSub" in result.columns
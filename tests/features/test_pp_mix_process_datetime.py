@@ -1,8 +1,11 @@
+import numpy as np
 import pandas as pd
 import pytest
 import datetime
 from pandas.testing import assert_frame_equal
 
+from features.pp_mix import _process_datetime as _process_datetime_vectorized
+
 # Função _process_datetime (SIMPLIFICADA)
 def _process_datetime(df_news: pd.DataFrame, df_users: pd.DataFrame):
     """Converte datas/horas para datetime e cria timestamps completos."""
@@ -126,4 +129,62 @@ def test_empty_dataframes():
     assert df_news_result.empty
     assert df_users_result.empty
     assert "issuedDatetime" in df_news_result.columns
-    assert "timestampHistoryDatetime" in df_users_result.columns
\ No newline at end of file
+    assert "timestampHistoryDatetime" in df_users_result.columns
+
+
+# Teste 5: Implementação vetorizada do pipeline x implementação de referência acima
+def _random_frames(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    days = pd.to_timedelta(rng.integers(0, 90, n), unit='D')
+    dates = pd.Series(pd.Timestamp('2022-07-01') + days)
+    seconds = rng.integers(0, 86400, n)
+    times = pd.Series([f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}" for s in seconds])
+    times[rng.random(n) < 0.05] = None
+    times[rng.random(n) < 0.02] = '25:99:00'
+    df_news = pd.DataFrame({'issuedDate': dates.dt.strftime('%Y-%m-%d'), 'issuedTime': times})
+    df_users = pd.DataFrame({
+        'timestampHistoryDate': dates.dt.date,
+        'timestampHistoryTime': pd.to_datetime(times, format='%H:%M:%S', errors='coerce').dt.time,
+    })
+    return df_news, df_users
+
+
+@pytest.mark.parametrize('frames', [
+    lambda: (pd.DataFrame({'issuedDate': ['2024-01-01'], 'issuedTime': ['10:00:00']}),
+             pd.DataFrame({'timestampHistoryDate': ['2024-01-02'],
+                           'timestampHistoryTime': ['12:30:00']})),
+    lambda: (pd.DataFrame({'issuedDate': [None], 'issuedTime': [None]}),
+             pd.DataFrame({'timestampHistoryDate': [None], 'timestampHistoryTime': [None]})),
+    lambda: (pd.DataFrame({'issuedDate': ['2024-01-01', None, '2024-01-03'],
+                           'issuedTime': ['10:00:00', '15:45:00', None]}),
+             pd.DataFrame({'timestampHistoryDate': ['2024-01-02', '2024-01-04', None],
+                           'timestampHistoryTime': [None, '12:30:00', '09:15:00']})),
+    _random_frames,
+])
+def test_vectorized_matches_reference(frames):
+    df_news, df_users = frames()
+    expected_news, expected_users = _process_datetime(df_news.copy(), df_users.copy())
+    result_news, result_users = _process_datetime_vectorized(df_news.copy(), df_users.copy())
+
+    assert_frame_equal(result_news, expected_news)
+    assert_frame_equal(result_users, expected_users)
+
+
+def test_vectorized_empty_dataframes():
+    df_news, df_users = _process_datetime_vectorized(
+        pd.DataFrame(columns=["issuedDate", "issuedTime"]),
+        pd.DataFrame(columns=["timestampHistoryDate", "timestampHistoryTime"]),
+    )
+
+    assert df_news.empty and "issuedDatetime" in df_news.columns
+    assert df_users.empty and "timestampHistoryDatetime" in df_users.columns
+
+
+def test_vectorized_leaves_inputs_unchanged():
+    df_news, df_users = _random_frames(n=50)
+    news_before, users_before = df_news.copy(), df_users.copy()
+
+    _process_datetime_vectorized(df_news, df_users)
+
+    assert_frame_equal(df_news, news_before)
+    assert_frame_equal(df_users, users_before)
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.features.pp_news import (
+    URL_PART_COLUMNS,
+    _extract_location,
+    _extract_theme,
+    _extract_url_mid_section,
+    extract_news_features,
+    extract_url_parts,
+)
+
+URLS = [
+    "https://g1.globo.com/sp/sao-paulo/noticia/2022/07/01/a.ghtml",
+    "https://g1.globo.com/rj/regiao-serrana/noticia/2022/07/01/b.ghtml",
+    "https://g1.globo.com/economia/agronegocios/noticia/2022/07/01/c.ghtml",
+    "https://g1.globo.com/politica/noticia/2022/07/01/d.ghtml",
+    "https://g1.globo.com/sp/campinas-regiao/educacao/vestibular/noticia/2022/e.ghtml",
+    "https://g1.globo.com/pe/caruaru-regiao/noticia/2022/f.ghtml",
+    "https://g1.globo.com/mg/minas-gerais/eleicoes/2022/noticia/2022/g.ghtml",
+    "https://g1.globo.com/sp/sao-paulo2/x/noticia/h.ghtml",
+    "https://g1.globo.com/sp/sao-paulo//noticia/i.ghtml",
+    "https://g1.globo.com/sp/sao-paulo/a//b/noticia/j.ghtml",
+    "https://g1.globo.com//economia/noticia/k.ghtml",
+    "https://g1.globo.com//noticia/l.ghtml",
+    "https://g1.globo.com/sp/sp/sp-x/noticia/m.ghtml",
+    "https://g1.globo.com/ba/bahia/tema/ba/bahia/noticia/n.ghtml",
+    "https://g1.globo.com/SP/sao-paulo/noticia/o.ghtml",
+    "https://g1.globo.com/sp/noticia/x/noticia/p.ghtml",
+    "https://ge.globo.com/futebol/noticia/q.ghtml",
+    "https://g1.globo.com/economia/",
+]
+
+
+def _legacy_url_parts(urls):
+    """Implementação anterior (`apply` linha a linha + `str.split`)."""
+    df = pd.DataFrame({"url": urls})
+    df["urlExtracted"] = df["url"].apply(_extract_url_mid_section)
+    df["local"] = df["urlExtracted"].apply(_extract_location)
+    df["localState"] = df["local"].str.split("/").str[0]
+    df["localRegion"] = df["local"].str.split("/").str[1]
+    df["theme"] = df["urlExtracted"].apply(_extract_theme)
+    df["themeMain"] = df["theme"].str.split("/").str[0]
+    df["themeSub"] = df["theme"].str.split("/").str[1]
+    return df[URL_PART_COLUMNS]
+
+
+@pytest.mark.parametrize("url", URLS)
+def test_matches_legacy_per_url(url):
+    expected = _legacy_url_parts([url]).iloc[0].to_dict()
+    result = extract_url_parts(pd.Series([url])).iloc[0].to_dict()
+
+    assert {k: None if pd.isna(v) else v for k, v in result.items()} == {
+        k: None if pd.isna(v) else v for k, v in expected.items()
+    }
+
+
+def test_matches_legacy_on_sample():
+    urls = pd.Series(np.random.default_rng(0).choice(URLS, 500), index=np.arange(500) * 3)
+    expected = _legacy_url_parts(urls.to_list()).set_axis(urls.index)
+    result = extract_url_parts(urls)
+
+    assert all(str(result[col].dtype) == "category" for col in URL_PART_COLUMNS)
+    pd.testing.assert_frame_equal(result.astype(object), expected.astype(object))
+
+
+def test_extract_news_features_outputs_categories():
+    news = pd.DataFrame(
+        {
+            "pageId": ["a", "b"],
+            "url": URLS[:2],
+            "issued": ["2022-07-01 10:00:00", "2022-07-01 11:00:00"],
+            "modified": ["2022-07-01 10:30:00", "2022-07-01 11:30:00"],
+        }
+    )
+    result = extract_news_features(news)
+
+    assert list(result["localState"]) == ["sp", "rj"]
+    assert list(result["localRegion"]) == ["sao-paulo", "regiao-serrana"]
+    assert result["themeMain"].isna().all()
+    assert "urlExtracted" not in result.columns
@@ -0,0 +1,128 @@
+import os
+
+import pandas as pd
+import pytest
+
+from src.features import pp_users
+from src.features.pp_users import (
+    USERS_MIN_CHUNK_ROWS,
+    _process_users_frame,
+    estimate_user_chunk_rows,
+    hash_sample_users,
+    iter_preprocessed_users,
+)
+from src.features.utils import ParquetChunkWriter, ParquetTable
+from src.storage.local import LocalStorage
+
+
+def _raw_users(n, offset=0):
+    return pd.DataFrame(
+        {
+            "userId": [f"user{offset + i:04d}" for i in range(n)],
+            "userType": ["Logged", "Non-Logged"] * (n // 2),
+            "historySize": [2] * n,
+            "history": ["p1, p2"] * n,
+            "timestampHistory": [f"{1657146417045 + i}, {1657146605778 + i}" for i in range(n)],
+            "numberOfClicksHistory": ["1, 0"] * n,
+            "timeOnPageHistory": ["20380, 21184"] * n,
+            "scrollPercentageHistory": ["50.3, 18.18"] * n,
+            "pageVisitsCountHistory": ["1, 2"] * n,
+            "timestampHistory_new": ["x"] * n,
+        }
+    )
+
+
+@pytest.fixture
+def users_dir(tmp_path, monkeypatch):
+    for i in range(3):
+        _raw_users(40, offset=i * 40).to_csv(tmp_path / f"treino_{i}.csv", index=False)
+    monkeypatch.setattr(pp_users, "USERS_DIRECTORY", str(tmp_path))
+    monkeypatch.setattr(pp_users, "RAW_PARQUET_INGESTION", False)
+    return tmp_path
+
+
+def _collect(**kwargs):
+    users = pd.concat(list(iter_preprocessed_users(**kwargs)), ignore_index=True)
+    # Categorias diferentes entre blocos viram object no concat (no Parquet, dicionário)
+    users["userType"] = users["userType"].astype(str)
+    return users.sort_values(["userId", "timestampHistoryTime"]).reset_index(drop=True)
+
+
+def test_hash_sampling_is_deterministic_and_chunk_independent(users_dir):
+    small = _collect(sample_rate=0.5, chunk_rows=7)
+    large = _collect(sample_rate=0.5, chunk_rows=500)
+
+    pd.testing.assert_frame_equal(small, large)
+    assert 0 < small["userId"].nunique() < 120
+    raw = _raw_users(120)
+    assert list(hash_sample_users(raw, 0.5)["userId"]) == list(
+        hash_sample_users(raw.iloc[::-1], 0.5)["userId"].iloc[::-1]
+    )
+
+
+def test_chunked_output_matches_in_memory_processing(users_dir):
+    chunked = _collect(sample_rate=1.0, chunk_rows=25)
+    expected = _process_users_frame(
+        pd.concat([_raw_users(40, offset=i * 40) for i in range(3)], ignore_index=True)
+    )
+    expected = expected.sort_values(["userId", "timestampHistoryTime"]).reset_index(drop=True)
+    expected["userType"] = expected["userType"].astype(str)
+
+    assert len(chunked) == 240
+    pd.testing.assert_frame_equal(chunked, expected[chunked.columns], check_dtype=False)
+
+
+def test_chunks_written_to_single_parquet(users_dir, tmp_path):
+    path = str(tmp_path / "out" / "users_feats.parquet")
+    with ParquetChunkWriter(path, LocalStorage()) as writer:
+        for chunk in iter_preprocessed_users(sample_rate=1.0, chunk_rows=30):
+            writer.write(chunk)
+
+    written = pd.read_parquet(path)
+    assert len(written) == writer.rows == 240
+    assert written["historySize"].dtype == "int32"
+
+
+def test_chunk_rows_follow_available_memory(users_dir):
+    small = estimate_user_chunk_rows(1.0, 0.25, available_bytes=1024**2)
+    large = estimate_user_chunk_rows(1.0, 0.25, available_bytes=1024**4)
+
+    assert small == USERS_MIN_CHUNK_ROWS
+    assert large > small
+
+
+def test_failed_write_keeps_previous_file(tmp_path):
+    path = str(tmp_path / "users_feats.parquet")
+    previous = pd.DataFrame({"userId": [f"u{i}" for i in range(100)]})
+    previous.to_parquet(path)
+
+    with pytest.raises(RuntimeError):
+        with ParquetChunkWriter(path, LocalStorage()) as writer:
+            writer.write(previous.head(2))
+            raise RuntimeError("falha no meio")
+
+    pd.testing.assert_frame_equal(pd.read_parquet(path), previous)
+    assert os.listdir(tmp_path) == ["users_feats.parquet"]
+
+
+def test_no_chunks_removes_previous_file(tmp_path):
+    path = str(tmp_path / "users_feats.parquet")
+    pd.DataFrame({"userId": ["u0"]}).to_parquet(path)
+
+    with ParquetChunkWriter(path, LocalStorage()) as writer:
+        pass
+
+    assert writer.rows == 0
+    assert not os.path.exists(path)
+
+
+def test_parquet_table_reads_projections_and_batches(tmp_path):
+    path = str(tmp_path / "users_feats.parquet")
+    with ParquetChunkWriter(path, LocalStorage()) as writer:
+        writer.write(pd.DataFrame({"userId": ["u1", "u1"], "pageId": ["p2", "p1"]}))
+        writer.write(pd.DataFrame({"userId": ["u2", "u3"], "pageId": ["p1", "p3"]}))
+
+    table = ParquetTable(path, LocalStorage())
+    assert list(table.read(["pageId"]).columns) == ["pageId"]
+    assert [len(batch) for batch in table.iter_batches(1)] == [1, 1, 1, 1]
+    assert list(table.unique("pageId", batch_size=1)) == ["p2", "p1", "p3"]
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.features.constants import USERS_COLS_TO_EXPLODE, USERS_DTYPES
+from src.features.ingest import split_history_columns
+from src.features.pp_users import _process_history_columns
+
+
+def _explode_reference(users_df):
+    """Implementação anterior (split + explode + strip em listas Python)."""
+    users_df = users_df.copy()
+    users_df[USERS_COLS_TO_EXPLODE] = users_df[USERS_COLS_TO_EXPLODE].apply(
+        lambda col: col.str.split(",")
+    )
+    users_df = users_df.explode(USERS_COLS_TO_EXPLODE)
+    users_df[USERS_COLS_TO_EXPLODE] = users_df[USERS_COLS_TO_EXPLODE].apply(
+        lambda col: col.str.strip()
+    )
+    return users_df
+
+
+@pytest.fixture
+def users_df():
+    rng = np.random.default_rng(0)
+    rows = []
+    for i in range(200):
+        size = int(rng.integers(1, 8))
+        rows.append(
+            {
+                "userId": f"u{i}",
+                "userType": "Logged" if i % 3 else "Non-Logged",
+                "historySize": size,
+                "history": ", ".join(f"p{j}" for j in rng.integers(0, 50, size)),
+                "timestampHistory": ", ".join(
+                    str(v) for v in 1657146417045 + rng.integers(0, 10**8, size)
+                ),
+                "numberOfClicksHistory": ", ".join(str(v) for v in rng.integers(0, 9, size)),
+                "timeOnPageHistory": ",".join(str(v) for v in rng.integers(0, 10**5, size)),
+                "scrollPercentageHistory": ", ".join(f"{v:.2f}" for v in rng.random(size) * 100),
+                "pageVisitsCountHistory": ", ".join(str(v) for v in rng.integers(1, 4, size)),
+            }
+        )
+    return pd.DataFrame(rows, index=np.arange(200) * 2)
+
+
+def test_matches_split_explode_strip(users_df):
+    expected = _explode_reference(users_df).astype(USERS_DTYPES)
+    result = _process_history_columns(users_df.copy()).astype(USERS_DTYPES)
+
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_matches_for_parquet_lists(users_df):
+    expected = _explode_reference(users_df).astype(USERS_DTYPES)
+    result = _process_history_columns(split_history_columns(users_df), split=False)
+
+    pd.testing.assert_frame_equal(result.astype(USERS_DTYPES), expected)
+
+
+def test_missing_history_keeps_one_null_row(users_df):
+    users_df.loc[users_df.index[:2], USERS_COLS_TO_EXPLODE] = np.nan
+    expected = _explode_reference(users_df)
+    result = _process_history_columns(users_df.copy())
+
+    assert list(result.index) == list(expected.index)
+    assert result["history"].iloc[:2].isna().all()
+    assert result["timeOnPageHistory"].iloc[:2].isna().all()
+
+
+def test_mismatched_lengths_raise(users_df):
+    users_df.loc[users_df.index[0], "history"] += ", extra"
+    with pytest.raises(ValueError):
+        _process_history_columns(users_df)
@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+
+from src.features.utils import concatenate_csv_files
+from src.storage.local import LocalStorage
+
+
+@pytest.fixture
+def csv_dir(tmp_path):
+    for i in range(5):
+        pd.DataFrame({"userId": [f"u{i}", f"v{i}"], "value": [i, i * 10]}).to_csv(
+            tmp_path / f"part_{i}.csv", index=False
+        )
+    return tmp_path
+
+
+@pytest.mark.parametrize("max_workers", [1, 3])
+def test_concatenates_files_in_order(csv_dir, max_workers):
+    result = concatenate_csv_files(str(csv_dir), LocalStorage(), max_workers=max_workers)
+
+    assert list(result["userId"]) == [f"{p}{i}" for i in range(5) for p in ("u", "v")]
+    assert list(result.index) == list(range(10))
+
+
+def test_pyarrow_engine_and_read_kwargs(csv_dir):
+    expected = concatenate_csv_files(str(csv_dir), LocalStorage(), usecols=["value"])
+    result = concatenate_csv_files(
+        str(csv_dir), LocalStorage(), engine="pyarrow", usecols=["value"]
+    )
+
+    assert list(result.columns) == ["value"]
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_skips_unreadable_files_and_empty_directories(csv_dir, tmp_path_factory):
+    (csv_dir / "part_9.csv").write_text("")
+    result = concatenate_csv_files(str(csv_dir), LocalStorage(), max_workers=2)
+    assert len(result) == 10
+
+    empty = concatenate_csv_files(str(tmp_path_factory.mktemp("vazio")), LocalStorage())
+    assert empty.empty
+
+
+@pytest.mark.parametrize(
+    "read_kwargs", [{}, {"engine": "pyarrow"}, {"chunksize": 1, "engine": "pyarrow"}]
+)
+def test_projection_and_row_filters_applied_per_file(csv_dir, read_kwargs):
+    result = concatenate_csv_files(
+        str(csv_dir),
+        LocalStorage(),
+        usecols=["userId"],
+        row_filters={"userId": ["u1", "v3", "x9"]},
+        **read_kwargs,
+    )
+
+    assert list(result.columns) == ["userId"]
+    assert list(result["userId"]) == ["u1", "v3"]
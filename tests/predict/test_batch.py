@@ -0,0 +1,240 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.history_index import build_history_index
+from src.data.id_dictionary import IdDictionary
+from src.data.serving_bundle import AffinityTables
+from src.predict import batch
+from src.predict.batch import part_path, score_users, shard_users, write_submission
+from src.predict.constants import CLIENT_FEATURES_COLUMNS, NEWS_FEATURES_COLUMNS
+from src.predict.pipeline import predict_for_userId
+
+
+class _SumModel:
+    """Score = soma das features de notícia (determinístico e picklable)."""
+
+    def predict(self, model_input):
+        return model_input[NEWS_FEATURES_COLUMNS].sum(axis=1).to_numpy() * 10
+
+
+class _NanSumModel(_SumModel):
+    """Como `_SumModel`, tratando afinidade ausente (NaN) como 0."""
+
+    def predict(self, model_input):
+        return super().predict(model_input.fillna(0.0))
+
+
+def _data():
+    clients = pd.DataFrame({"userId": [f"u{i}" for i in range(7)]})
+    for col in CLIENT_FEATURES_COLUMNS:
+        clients[col] = 1.0
+    news = pd.DataFrame({"pageId": ["p0", "p1", "p2", "p3", "p1"]})
+    for col in NEWS_FEATURES_COLUMNS:
+        news[col] = [0.1, 0.4, 0.3, 0.2, 0.4]
+    news["issuedDatetime"] = pd.to_datetime(
+        ["2024-03-01", "2024-03-02", "2024-03-03", "2024-03-04", "2024-03-02"]
+    )
+    history = build_history_index(pd.DataFrame({"userId": ["u1", "u1"], "pageId": ["p1", "p2"]}))
+    return clients, news, history
+
+
+def test_shard_users_is_deterministic():
+    shards = shard_users(["c", "a", "b", "a", "d"], shard_size=3)
+    assert [list(shard) for shard in shards] == [["a", "b", "c"], ["d"]]
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_score_users_writes_ranked_parts(tmp_path, max_workers):
+    clients, news, history = _data()
+    users = list(clients["userId"]) + ["novo"]
+    stats = score_users(
+        users,
+        clients,
+        news,
+        _SumModel(),
+        output_dir=str(tmp_path),
+        history_index=history,
+        n=2,
+        score_threshold=0,
+        shard_size=3,
+        max_workers=max_workers,
+    )
+
+    assert stats["scored_users"] == 8
+    assert sorted(os.listdir(tmp_path)) == ["_manifest.json"] + [
+        f"part-0000{i}.parquet" for i in range(3)
+    ]
+    result = pd.read_parquet(tmp_path).set_index(["userId", "rank"])
+    assert list(result.loc["u0", "pageId"]) == ["p1", "p2"]
+    # u1 já leu p1 e p2
+    assert list(result.loc["u1", "pageId"]) == ["p3", "p0"]
+    # usuário sem features recebe as notícias mais recentes
+    assert list(result.loc["novo", "pageId"]) == ["p3", "p2"]
+    assert result.loc["novo", "coldStart"].all()
+
+
+def test_score_users_resumes_and_writes_submission(tmp_path):
+    clients, news, _ = _data()
+    kwargs = dict(output_dir=str(tmp_path), n=1, score_threshold=0, shard_size=3)
+    score_users(clients["userId"], clients, news, _SumModel(), **kwargs)
+    os.remove(part_path(str(tmp_path), 1))
+
+    stats = score_users(clients["userId"], clients, news, _SumModel(), **kwargs)
+    assert stats["scored_users"] == 3
+    assert stats["skipped_users"] == 4
+
+    submission = write_submission(str(tmp_path), str(tmp_path / "sub" / "submission.csv"))
+    assert list(submission.columns) == ["userId", "acessos_futuros"]
+    assert len(submission) == 7
+    assert set(submission["acessos_futuros"]) == {"['p1']"}
+    assert np.all(
+        pd.read_csv(tmp_path / "sub" / "submission.csv")["userId"] == submission["userId"]
+    )
+
+
+def test_score_users_discards_parts_from_a_different_run(tmp_path):
+    clients, news, _ = _data()
+    kwargs = dict(output_dir=str(tmp_path), n=1, score_threshold=0, shard_size=3)
+    score_users(clients["userId"], clients, news, _SumModel(), model_version="a", **kwargs)
+
+    stats = score_users(
+        clients["userId"], clients, news, _SumModel(), model_version="b", **kwargs
+    )
+    assert stats["scored_users"] == 7
+    assert stats["skipped_users"] == 0
+
+    stats = score_users(
+        clients["userId"][:4], clients, news, _SumModel(), model_version="b", **kwargs
+    )
+    assert stats["scored_users"] == 4
+    assert sorted(pd.read_parquet(tmp_path)["userId"]) == ["u0", "u1", "u2", "u3"]
+
+
+def test_score_users_ignores_and_removes_stale_temp_files(tmp_path):
+    clients, news, _ = _data()
+    kwargs = dict(output_dir=str(tmp_path), n=1, score_threshold=0, shard_size=3)
+    score_users(clients["userId"], clients, news, _SumModel(), **kwargs)
+    stale = tmp_path / ".part-00001.parquet.tmp-999"
+    stale.write_bytes(b"incompleto")
+
+    assert len(pd.read_parquet(tmp_path)) == 7
+    score_users(clients["userId"], clients, news, _SumModel(), **kwargs)
+    assert not stale.exists()
+
+
+def test_submission_decodes_integer_ids(tmp_path):
+    clients, news, _ = _data()
+    ids = IdDictionary()
+    clients = ids.encode_frame(clients, extend=True)
+    news = ids.encode_frame(news, extend=True)
+    users = ids.encode("userId", ["u0", "novo"], extend=True)
+
+    score_users(
+        users, clients, news, _SumModel(), output_dir=str(tmp_path), n=1, score_threshold=0
+    )
+    assert pd.read_parquet(tmp_path)["userId"].dtype.kind == "i"
+
+    submission = write_submission(str(tmp_path), str(tmp_path / "submission.csv"), ids)
+    assert dict(zip(submission["userId"], submission["acessos_futuros"])) == {
+        "u0": "['p1']",
+        "novo": "['p3']",
+    }
+
+
+@pytest.mark.parametrize("source", ["all", "validation"])
+def test_main_keeps_integer_user_codes(tmp_path, monkeypatch, source):
+    clients, news, _ = _data()
+    ids = IdDictionary()
+    clients = ids.encode_frame(clients, extend=True)
+    news = ids.encode_frame(news, extend=True)
+    monkeypatch.setattr(
+        batch,
+        "load_data_for_prediction",
+        lambda: {"clients_features": clients, "news_features": news},
+    )
+    monkeypatch.setattr(batch, "load_model_bundle", lambda run_id: None)
+    monkeypatch.setattr(batch, "load_history_index", lambda: None)
+    monkeypatch.setattr(batch, "load_id_dictionary", lambda: ids)
+    monkeypatch.setattr(batch, "configure_mlflow", lambda: None)
+    monkeypatch.setattr(batch, "load_model_from_mlflow", lambda: _SumModel())
+    monkeypatch.setattr(
+        batch,
+        "load_user_ids",
+        lambda src, df: df["userId"].unique() if src == "all" else np.array(["u0", "novo"]),
+    )
+
+    submission_path = str(tmp_path / "submission.csv")
+    batch.main(
+        ["--users", source, "--output-dir", str(tmp_path / "out"), "--workers", "1"]
+        + ["--submission", submission_path, "--n", "1", "--score-threshold", "0"]
+    )
+
+    submission = pd.read_csv(submission_path)
+    expected = [f"u{i}" for i in range(7)] if source == "all" else ["novo", "u0"]
+    assert sorted(submission["userId"]) == expected
+    assert ids.size("userId") == 7 + (source == "validation")
+    cold_start = pd.read_parquet(tmp_path / "out").set_index("userId")["coldStart"]
+    assert cold_start.sum() == (source == "validation")
+
+
+def test_score_users_matches_predict_for_user_id_with_affinity(tmp_path):
+    clients, _, history = _data()
+    # Catálogo do bundle: sem colunas rel*, com as categorias das notícias
+    news = pd.DataFrame(
+        {
+            "pageId": ["p0", "p1", "p2", "p3"],
+            "themeMain": ["esportes", "politica", "esportes", "economia"],
+            "localState": ["SP", "RJ", None, "SP"],
+        }
+    )
+    for col in NEWS_FEATURES_COLUMNS:
+        if not col.startswith("rel"):
+            news[col] = [0.01, 0.02, 0.03, 0.04]
+    affinity = AffinityTables(
+        {
+            "themeMain": pd.DataFrame(
+                {
+                    "userId": ["u0", "u0", "u1", "u2"],
+                    "themeMain": ["esportes", "economia", "politica", "politica"],
+                    "relThemeMain": [0.7, 0.3, 1.0, 0.5],
+                }
+            ),
+            "localState": pd.DataFrame(
+                {"userId": ["u0", "u2"], "localState": ["RJ", "SP"], "relLocalState": [0.9, 0.6]}
+            ),
+        }
+    )
+    users = ["u0", "u1", "u2"]
+    score_users(
+        users,
+        clients,
+        news,
+        _NanSumModel(),
+        output_dir=str(tmp_path),
+        history_index=history,
+        n=3,
+        score_threshold=0,
+        affinity=affinity,
+    )
+
+    result = pd.read_parquet(tmp_path)
+    for user_id in users:
+        expected, cold_start = predict_for_userId(
+            user_id,
+            clients,
+            news,
+            _NanSumModel(),
+            n=3,
+            score_threshold=0,
+            history_index=history,
+            affinity=affinity,
+        )
+        assert not cold_start
+        batch_top = result[result["userId"] == user_id].sort_values("rank")["pageId"]
+        assert list(batch_top) == [rec["pageId"] for rec in expected]
+    # Afinidades diferentes geram rankings diferentes para o mesmo catálogo
+    rankings = result.groupby("userId")["pageId"].agg(list)
+    assert rankings["u0"] != rankings["u2"]
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.recommendation_model.compiled_predictor import CompiledTreePredictor
+from src.recommendation_model.lgbm_ranker import LightGBMRanker
+
+
+def _trained_ranker(seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(600, 6)).astype(np.float32)
+    X[rng.random(X.shape) < 0.1] = np.nan
+    X[:, 5] = np.where(rng.random(600) < 0.3, 0.0, X[:, 5])
+    y = rng.integers(0, 4, size=600)
+    params = {
+        "objective": "lambdarank",
+        "num_leaves": 15,
+        "min_data_in_leaf": 5,
+        "verbose": -1,
+        "seed": seed,
+    }
+    ranker = LightGBMRanker(params=params, num_boost_round=30)
+    ranker.train(X, y, group=[100] * 6)
+    return ranker, X
+
+
+def test_compiled_predictor_matches_booster():
+    ranker, X = _trained_ranker()
+    compiled = CompiledTreePredictor.from_ranker(ranker)
+
+    expected = ranker.model.predict(X)
+    np.testing.assert_allclose(compiled.predict(X), expected, rtol=1e-9, atol=1e-12)
+
+
+def test_compiled_predictor_accepts_ranker_inputs():
+    ranker, X = _trained_ranker(seed=1)
+    compiled = CompiledTreePredictor.from_ranker(ranker)
+    expected = ranker.predict(pd.DataFrame(X))
+
+    np.testing.assert_allclose(compiled.predict(pd.DataFrame(X)), expected, rtol=1e-9)
+    split = {"client_features": X[:, :3], "news_features": X[:, 3:]}
+    np.testing.assert_allclose(compiled.predict(split), expected, rtol=1e-9)
+    assert len(compiled.predict(X[:0])) == 0
+
+
+def test_compiled_predictor_rejects_wrong_shape():
+    ranker, X = _trained_ranker()
+    compiled = CompiledTreePredictor.from_ranker(ranker)
+
+    with pytest.raises(ValueError):
+        compiled.predict(X[:, :4])
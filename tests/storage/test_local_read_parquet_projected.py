@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.storage.local import LocalStorage
+
+
+@pytest.fixture
+def parquet_path(tmp_path):
+    df = pd.DataFrame(
+        {
+            "pageId": [f"p{i:04d}" for i in range(1000)],
+            "bucket": np.repeat(np.arange(10), 100),
+            "payload": np.random.default_rng(0).random(1000),
+            "extra": ["x" * 20] * 1000,
+        }
+    )
+    path = tmp_path / "data.parquet"
+    df.to_parquet(path, row_group_size=100, index=False)
+    return str(path)
+
+
+def test_projection_reads_only_requested_columns(parquet_path):
+    storage = LocalStorage()
+    full = storage.read_parquet_projected(parquet_path)
+    projected = storage.read_parquet_projected(
+        parquet_path, columns=["pageId", "bucket"], optional_columns=["payload", "missing"]
+    )
+
+    assert list(projected.columns) == ["pageId", "bucket", "payload"]
+    assert len(projected) == 1000
+    projected_bytes = projected.attrs["read_stats"]["bytes_read"]
+    assert 0 < projected_bytes < full.attrs["read_stats"]["bytes_read"]
+
+
+def test_filters_prune_row_groups(parquet_path):
+    storage = LocalStorage()
+    all_rows = storage.read_parquet_projected(parquet_path, columns=["pageId", "bucket"])
+    filtered = storage.read_parquet_projected(
+        parquet_path, columns=["pageId", "bucket"], filters=[("bucket", ">=", 8)]
+    )
+
+    assert sorted(filtered["bucket"].unique()) == [8, 9]
+    assert len(filtered) == 200
+    # Apenas 2 dos 10 row groups são lidos
+    filtered_bytes = filtered.attrs["read_stats"]["bytes_read"]
+    ratio = filtered_bytes / all_rows.attrs["read_stats"]["bytes_read"]
+    assert ratio == pytest.approx(0.2, abs=0.05)
+    in_filter = storage.read_parquet_projected(
+        parquet_path, columns=["pageId"], filters=[("pageId", "in", ["p0001", "p0999"])]
+    )
+    assert list(in_filter["pageId"]) == ["p0001", "p0999"]
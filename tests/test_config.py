@@ -0,0 +1,80 @@
+import json
+import logging
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+from src.config import (
+    LOG_SETTINGS,
+    DeferredQueueHandler,
+    JsonFormatter,
+    SamplingFilter,
+    configure_logger,
+    use_sync_logging,
+)
+
+
+def _record(level=logging.INFO, msg="msg %s", args=("x",)):
+    return logging.LogRecord("test", level, __file__, 1, msg, args, None)
+
+
+def test_sampling_filter_keeps_fraction_and_all_errors():
+    sampler = SamplingFilter(0.25)
+    kept = [sampler.filter(_record()) for _ in range(100)]
+    assert sum(kept) == 25
+    assert kept[0]
+    assert all(sampler.filter(_record(logging.ERROR)) for _ in range(10))
+    assert all(sampler.filter(_record(logging.WARNING)) for _ in range(10))
+
+
+def test_sampling_filter_is_exact_across_threads():
+    sampler = SamplingFilter(0.1)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        kept = list(pool.map(lambda _: sampler.filter(_record()), range(10000)))
+    assert sum(kept) == 1000
+
+
+def test_json_formatter_emits_one_object_per_record():
+    payload = json.loads(JsonFormatter().format(_record()))
+    assert payload["message"] == "msg x"
+    assert payload["level"] == "INFO"
+    assert payload["logger"] == "test"
+
+
+def test_deferred_queue_handler_freezes_message_in_caller():
+    log_queue = queue.SimpleQueue()
+    handler = DeferredQueueHandler(log_queue)
+    items = ["a"]
+    record = _record(args=(items,))
+    handler.emit(record)
+    items.append("b")
+
+    queued = log_queue.get_nowait()
+    assert queued.msg == "msg ['a']"
+    assert queued.args is None
+    assert queued.getMessage() == "msg ['a']"
+    # Data e nível continuam sendo formatados pelo listener
+    assert not hasattr(queued, "asctime")
+
+
+def test_configure_logger_async_and_sampled():
+    # Isola do handler de captura que o pytest instala no logger raiz
+    logging.getLogger("tests.async_sampled").propagate = False
+    logger = configure_logger("tests.async_sampled", async_mode=True, sample_rate=0.1)
+    assert isinstance(logger.handlers[0], DeferredQueueHandler)
+    assert [f.rate for f in logger.filters if isinstance(f, SamplingFilter)] == [0.1]
+
+    configure_logger("tests.async_sampled", sample_rate=1.0)
+    assert not any(isinstance(f, SamplingFilter) for f in logger.filters)
+
+
+def test_use_sync_logging_replaces_deferred_handlers(monkeypatch):
+    monkeypatch.setitem(LOG_SETTINGS, "async", True)
+    logging.getLogger("tests.sync_worker").propagate = False
+    logger = configure_logger("tests.sync_worker", async_mode=True)
+    assert isinstance(logger.handlers[0], DeferredQueueHandler)
+
+    use_sync_logging()
+
+    assert LOG_SETTINGS["async"] is False
+    assert logger.handlers
+    assert not any(isinstance(h, DeferredQueueHandler) for h in logger.handlers)